@@ -4,35 +4,39 @@
 # See this guide on how to implement these action:
 # https://rasa.com/docs/rasa/custom-actions
 
-from transformers import AutoTokenizer, AutoModelForSeq2SeqLM
 from rasa_sdk import Action
 from rasa_sdk.events import SlotSet, ActionExecuted
 from rasa_sdk.executor import CollectingDispatcher
-from typing import Any, Text, Dict, List
+from typing import Any, Text, Dict, List, Optional
 from rasa_sdk import Tracker
 import logging
 from googleapiclient.discovery import build
 from googleapiclient.errors import HttpError
+from functools import partial
+from urllib.parse import quote_plus
+import asyncio
+import httplib2
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 
-logger = logging.getLogger(__name__)
-
-class ActionGenerateContent(Action):
-    def __init__(self):
-        self.model_name = "google/flan-t5-large"
-        try:
-            self.tokenizer = AutoTokenizer.from_pretrained(self.model_name)
-            self.model = AutoModelForSeq2SeqLM.from_pretrained(self.model_name)
-            logger.info(f"Model {self.model_name} loaded successfully")
-        except Exception as e:
-            logger.error(f"Error loading model: {e}")
-            self.model = None
-            self.tokenizer = None
+from . import settings
+from .batching import BatchGenerator, GenerationQueueFull
+from .cache import GenerationCache, TTLCache, make_cache_key, normalize_topic
+from .http_server import register_route, start_http_server
+from .instrumentation import count, in_context, instrumented, serve_metrics, span
+from .knowledge_base import KnowledgeBase, knowledge_base_context
+from .profiles import GENERATION_PROFILES, select_profile, streaming_params
+from .registry import ModelUnavailable, model_registry
+from .resilience import CircuitBreaker, CircuitOpenError, ResilientFetcher
+from .semantic_cache import SemanticCache, SentenceEmbedder
+from .streaming import StreamRegistry, TokenStream, stream_route
+from .topic_policy import TopicPolicy
 
-    def name(self) -> Text:
-        return "action_generate_content"
+logger = logging.getLogger(__name__)
 
-    def generate_prompt(self, topic: str) -> str:
-        return f"""Generate a detailed and educational explanation about {topic}.
+PROMPT_TEMPLATE = """Generate a detailed and educational explanation about {topic}.
         Include:
         - Definition and key concepts
         - Main principles or components
@@ -41,15 +45,88 @@ class ActionGenerateContent(Action):
         - Current trends or future perspectives
         Make it informative yet easy to understand."""
 
-    def run(
+# The most thorough profile; used for precomputed answers and benchmarks.
+# Live requests pick a profile per learner (see profiles.py).
+GENERATION_PARAMS = GENERATION_PROFILES["quality"]
+
+class ActionGenerateContent(Action):
+    def __init__(self):
+        self.model_name = settings.GENERATION_MODEL
+        if settings.MODEL_LOAD_MODE == "eager":
+            try:
+                model_registry.preload(**self.backend_spec())
+            except ModelUnavailable:
+                pass  # logged by the registry, retried on the first request
+        elif settings.MODEL_LOAD_MODE == "background":
+            model_registry.warm_up(**self.backend_spec())
+
+        self.batcher = BatchGenerator(
+            lambda: model_registry.get(**self.backend_spec()),
+            max_batch_size=settings.GENERATION_BATCH_MAX_SIZE,
+            max_wait_ms=settings.GENERATION_BATCH_MAX_WAIT_MS,
+            max_queue_depth=settings.GENERATION_MAX_QUEUE_DEPTH,
+            num_workers=settings.GENERATION_WORKERS,
+        )
+
+        self.cache = None
+        if settings.GENERATION_CACHE_ENABLED:
+            self.cache = GenerationCache(
+                max_entries=settings.GENERATION_CACHE_SIZE,
+                ttl=settings.GENERATION_CACHE_TTL,
+                disk_path=settings.GENERATION_CACHE_PATH,
+                disk_ttl=settings.GENERATION_CACHE_DISK_TTL,
+                log_every=settings.GENERATION_CACHE_LOG_EVERY,
+            )
+
+        self.topic_policy = TopicPolicy(settings.TOPIC_POLICY_PATH, settings.TOPIC_POLICY_RELOAD_SECONDS)
+
+        self.knowledge_base = KnowledgeBase.open(
+            settings.KNOWLEDGE_BASE_PATH, knowledge_base_context(PROMPT_TEMPLATE, self.model_name)
+        )
+
+        self.semantic_cache = None
+        if settings.SEMANTIC_CACHE_ENABLED:
+            self.semantic_cache = SemanticCache(
+                SentenceEmbedder(settings.SEMANTIC_CACHE_MODEL),
+                threshold=settings.SEMANTIC_CACHE_THRESHOLD,
+                max_entries=settings.SEMANTIC_CACHE_SIZE,
+                ttl=settings.SEMANTIC_CACHE_TTL,
+                log_every=settings.GENERATION_CACHE_LOG_EVERY,
+            )
+        # cache writes (and the topic embedding they need) run here, off the request
+        # path and off the batcher threads, which would otherwise wait for the embedder
+        self.cache_writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="cache-writer")
+
+        self.streams = None
+        if settings.STREAMING_ENABLED:
+            self.streams = StreamRegistry(ttl=settings.STREAM_TTL)
+            register_route("/stream/", stream_route(self.streams, settings.STREAM_IDLE_TIMEOUT))
+            if start_http_server(settings.STREAM_SERVER_HOST, settings.STREAM_SERVER_PORT) is None:
+                self.streams = None
+        serve_metrics()
+
+    def name(self) -> Text:
+        return "action_generate_content"
+
+    def backend_spec(self) -> Dict[Text, Any]:
+        return {
+            "backend_name": settings.GENERATION_BACKEND,
+            "model_name": self.model_name,
+            "export_dir": os.path.join(settings.ONNX_EXPORT_DIR, self.model_name.replace("/", "--")),
+            "draft_model_name": settings.GENERATION_DRAFT_MODEL,
+        }
+
+    def generate_prompt(self, topic: str) -> str:
+        return PROMPT_TEMPLATE.format(topic=topic)
+
+    @instrumented("action_generate_content")
+    async def run(
         self,
         dispatcher: CollectingDispatcher,
         tracker: Tracker,
         domain: Dict[Text, Any]
     ) -> List[Dict[Text, Any]]:
-        if not self.model or not self.tokenizer:
-            dispatcher.utter_message(text="Sorry, I'm having technical difficulties. Please try again later.")
-            return []
+        loop = asyncio.get_running_loop()
 
         topic = next(tracker.get_latest_entity_values("topic"), None)
         if not topic:
@@ -57,43 +134,166 @@ class ActionGenerateContent(Action):
             return []
         
         # Check if the topic is non-educational
-        non_educational_keywords = ["pizza", "food", "Infosys", "company", "movie", "celebrity", "sports", "music", "recipe", "travel", "fashion", "gossip", "weather", "news", "politics", "games", "shopping", "cars"]
-        if any(keyword in topic.lower() for keyword in non_educational_keywords):
+        with span("filter"):
+            blocked = self.topic_policy.is_blocked(topic)
+        if blocked:
+            count("topic_rejected")
             dispatcher.utter_message(text="Sorry, I couldn't find this topic. Can you please ask some other topic that you'd like to learn about?")
             return []
         
+        # precomputed popular topics: a lookup in the memory-mapped store, no model involved
+        content = None
+        if self.knowledge_base:
+            with span("cache_lookup", cache="knowledge_base"):
+                content = self.knowledge_base.get(topic)
+            count("cache", cache="knowledge_base", result="miss" if content is None else "hit")
+        if content is not None:
+            self.utter_content(dispatcher, topic, content)
+            logger.info(f"Served precomputed content for topic: {topic}")
+            return [SlotSet("topic", topic)]
+
+        # only the Streamlit app (REST channel) knows how to follow a token stream
+        use_stream = self.streams is not None and tracker.get_latest_input_channel() == "rest"
+        # the decoding profile (and so the cost) follows the learner context sent by the app
+        metadata = tracker.latest_message.get("metadata") or {}
+        profile = select_profile(metadata.get("education_level"), metadata.get("learning_style"))
+        params = GENERATION_PROFILES[profile]
+        if use_stream:
+            params = streaming_params(params)
+
+        cache_key = make_cache_key(topic, PROMPT_TEMPLATE, dict(params, model=self.model_name))
+        # the disk tier does file I/O, keep it off the event loop
+        content = None
+        if self.cache:
+            with span("cache_lookup", cache="exact"):
+                content = await loop.run_in_executor(None, in_context(self.cache.get, cache_key))
+            count("cache", cache="exact", result="miss" if content is None else "hit")
+        if content is not None:
+            self.utter_content(dispatcher, topic, content)
+            logger.info(f"Served cached content for topic: {topic}")
+            return [SlotSet("topic", topic)]
+
+        # the same question in other words: everything but the topic must match
+        semantic_context = make_cache_key("", PROMPT_TEMPLATE, dict(params, model=self.model_name))
+        content = None
+        if self.semantic_cache is not None:
+            with span("cache_lookup", cache="semantic"):
+                content = await loop.run_in_executor(None, in_context(self.semantic_lookup, topic, semantic_context))
+            count("cache", cache="semantic", result="miss" if content is None else "hit")
+        if content is not None:
+            self.utter_content(dispatcher, topic, content)
+            logger.info(f"Served semantically cached content for topic: {topic}")
+            return [SlotSet("topic", topic)]
+
         try:
+            started = time.perf_counter()
             input_text = self.generate_prompt(topic)
-            inputs = self.tokenizer(input_text, return_tensors="pt", max_length=1024, truncation=True)
-            
-            outputs = self.model.generate(
-                inputs.input_ids,
-                max_length=512,          # Increased length for more detailed content
-                min_length=100,          # Ensure minimum content length
-                num_beams=5,            
-                temperature=0.7,         # Slightly increased for more creativity
-                do_sample=True,
-                top_p=0.92,             # Adjusted for better quality
-                top_k=50,               # Added top-k sampling
-                repetition_penalty=2.5,  # Increased penalty for repetitions
-                length_penalty=1.5,      # Encourage longer outputs
-                no_repeat_ngram_size=3,  # Prevent 3-gram repetitions
-                early_stopping=True
-            )
-            
-            content = self.tokenizer.decode(outputs[0], skip_special_tokens=True)
-            
-            # Format the content for better readability
-            formatted_content = content.replace(". ", ".\n\n")
-            
-            dispatcher.utter_message(text=f"Here's a detailed explanation about {topic}:\n\n\n{formatted_content}")
-            logger.info(f"Generated content for topic: {topic}")
+
+            if use_stream:
+                # reply right away with a stream handle; the app renders tokens as they arrive
+                stream = self.streams.create()
+                try:
+                    future = self.batcher.submit(input_text, params, stream=stream)
+                except Exception:
+                    # nobody will follow a stream that was never queued
+                    stream.close(error="not queued")
+                    self.streams.discard(stream.id)
+                    raise
+                future.add_done_callback(
+                    lambda done: self.finish_stream(done, stream, topic, cache_key, semantic_context, started)
+                )
+                dispatcher.utter_message(json_message={
+                    "stream": {
+                        "id": stream.id,
+                        "url": f"{settings.STREAM_PUBLIC_URL}/stream/{stream.id}",
+                        "prefix": f"Here's a detailed explanation about {topic}:\n\n\n",
+                    }
+                })
+                logger.info(f"Streaming content for topic: {topic} ({profile} profile)")
+                return [SlotSet("topic", topic)]
+
+            # concurrent requests are padded into one generate() call by the batcher,
+            # which runs on its own worker threads so the event loop stays free
+            future = self.batcher.submit(input_text, params)
+            # queueing plus generation; tokenize/generate/decode are timed by the backend
+            with span("generation", profile=profile):
+                content = await asyncio.wait_for(asyncio.wrap_future(future), timeout=settings.GENERATION_TIMEOUT)
+            cost = time.perf_counter() - started
+            self.cache_writer.submit(self.remember, topic, cache_key, semantic_context, content, cost)
+
+            self.utter_content(dispatcher, topic, content)
+            logger.info(f"Generated content for topic: {topic} ({profile} profile)")
             
+        except GenerationQueueFull as e:
+            logger.warning(f"Generation queue full, rejecting topic {topic}: {e}")
+            count("error", kind="queue_full", action="action_generate_content")
+            dispatcher.utter_message(text="I'm busy helping a lot of learners right now. Please try again in a moment.")
+            return []
+
+        except ModelUnavailable:
+            count("error", kind="model_unavailable", action="action_generate_content")
+            dispatcher.utter_message(text="Sorry, I'm having technical difficulties. Please try again later.")
+            return []
+
+        except asyncio.TimeoutError:
+            logger.error(f"Timed out generating content for topic: {topic}")
+            count("error", kind="timeout", action="action_generate_content")
+            dispatcher.utter_message(text="This is taking longer than expected. Please try again in a moment.")
+            return []
+
         except Exception as e:
             logger.error(f"Error generating content: {e}")
+            count("error", kind="exception", action="action_generate_content")
             dispatcher.utter_message(text="I apologize, but I couldn't generate the content at this moment.")
         
         return [SlotSet("topic", topic)]
+
+    def finish_stream(
+        self, future, stream: TokenStream, topic: Text, cache_key: Text, semantic_context: Text, started: float
+    ) -> None:
+        # runs on the batcher worker thread once generation has finished
+        error = None if future.cancelled() else future.exception()
+        if future.cancelled() or error is not None:
+            logger.error(f"Error streaming content for topic {topic}: {error}")
+            count("error", kind="stream", action="action_generate_content")
+            stream.put("\n\nI apologize, but I couldn't generate the content at this moment.")
+            stream.close(error=str(error))
+            return
+
+        stream.close()
+        self.cache_writer.submit(
+            self.remember, topic, cache_key, semantic_context, future.result(), time.perf_counter() - started
+        )
+        ttft = stream.time_to_first_token()
+        logger.info(
+            f"Streamed content for topic: {topic} "
+            f"(first token after {ttft or 0:.2f}s, total {time.perf_counter() - started:.2f}s)"
+        )
+
+    def semantic_lookup(self, topic: Text, context: Text) -> Optional[Text]:
+        if self.semantic_cache is None:
+            return None
+        try:
+            return self.semantic_cache.lookup(topic, context)
+        except Exception as e:
+            # an unavailable embedding model only costs us the cache, not the answer
+            logger.error(f"Error searching semantic cache: {e}")
+            return None
+
+    def remember(self, topic: Text, cache_key: Text, semantic_context: Text, content: Text, cost: float) -> None:
+        if self.cache:
+            self.cache.set(cache_key, content, cost=cost)
+        if self.semantic_cache is not None:
+            try:
+                self.semantic_cache.add(topic, semantic_context, content)
+            except Exception as e:
+                logger.error(f"Error updating semantic cache: {e}")
+
+    def utter_content(self, dispatcher: CollectingDispatcher, topic: Text, content: Text) -> None:
+        # Format the content for better readability
+        with span("format"):
+            formatted_content = content.replace(". ", ".\n\n")
+            dispatcher.utter_message(text=f"Here's a detailed explanation about {topic}:\n\n\n{formatted_content}")
     
 
 
@@ -102,30 +302,84 @@ class ActionFetchYoutubeVideos(Action):
         return "action_fetch_youtube_videos"
         
     def __init__(self):
+        # YOUTUBE_API_ROOT points the client at a local stub (see scripts/youtube_stub.py)
+        client_options = {"api_endpoint": settings.YOUTUBE_API_ROOT} if settings.YOUTUBE_API_ROOT else None
+        self.youtube = build(
+            'youtube', 'v3',
+            developerKey=settings.YOUTUBE_API_KEY,
+            client_options=client_options
+        )
+        # ranked videos per normalized topic, and raw details per video id
+        self.topic_cache = TTLCache(max_entries=settings.YOUTUBE_CACHE_SIZE, ttl=settings.YOUTUBE_CACHE_TTL)
+        self.details_cache = TTLCache(max_entries=settings.YOUTUBE_CACHE_SIZE * 5, ttl=settings.YOUTUBE_CACHE_TTL)
+        self.fetcher = ResilientFetcher(
+            "youtube",
+            max_concurrency=settings.YOUTUBE_MAX_CONCURRENCY,
+            timeout=settings.YOUTUBE_TIMEOUT,
+            retries=settings.YOUTUBE_RETRIES,
+            backoff_base=settings.YOUTUBE_BACKOFF_BASE,
+            breaker=CircuitBreaker(
+                "youtube",
+                failure_threshold=settings.YOUTUBE_BREAKER_THRESHOLD,
+                reset_timeout=settings.YOUTUBE_BREAKER_RESET,
+            ),
+            is_retryable=is_retryable_youtube_error,
+        )
+        # httplib2 connections are not thread-safe, so each fetch thread keeps its own
+        self._http = threading.local()
+        serve_metrics()
 
-        self.youtube = build('youtube', 'v3', developerKey='YOUR_API_KEY')
+    def execute(self, request) -> Dict[Text, Any]:
+        http = getattr(self._http, "client", None)
+        if http is None:
+            http = self._http.client = httplib2.Http(timeout=settings.YOUTUBE_TIMEOUT)
+        return request.execute(http=http)
 
-    def get_video_details(self, video_id):
-        try:
-            response = self.youtube.videos().list(
+    async def get_video_details(self, video_ids: List[Text]) -> Dict[Text, Dict[Text, Any]]:
+        details = {}
+        missing = []
+        for video_id in video_ids:
+            cached = self.details_cache.get(video_id)
+            if cached is not None:
+                details[video_id] = cached
+            else:
+                missing.append(video_id)
+        if not missing:
+            return details
+
+        # one request per 50 ids (the API maximum) instead of one per video, fanned out concurrently
+        chunks = [missing[i:i + 50] for i in range(0, len(missing), 50)]
+        responses = await self.fetcher.gather(
+            partial(self.fetcher.call, self.execute, self.youtube.videos().list(
                 part='snippet,statistics,contentDetails',
-                id=video_id
-            ).execute()
-            return response['items'][0] if response['items'] else None
-        except Exception:
-            return None
+                id=",".join(chunk)
+            ))
+            for chunk in chunks
+        )
 
-    def run(self, dispatcher: CollectingDispatcher, tracker: Tracker, domain: Dict[Text, Any]) -> List[Dict[Text, Any]]:
-        try:
-            topic = tracker.get_slot("topic")
-            if not topic:
-                dispatcher.utter_message(text="I need a topic to search for videos.")
-                return []
+        for response in responses:
+            if isinstance(response, Exception):
+                logger.error(f"Error fetching video details: {response!r}")
+                continue
+            for item in response.get('items', []):
+                self.details_cache.set(item['id'], item)
+                details[item['id']] = item
+        return details
 
-            # Add educational keywords to search
-            search_query = f"{topic} tutorial how to learn"
-            
-            search_response = self.youtube.search().list(
+    async def search_videos(self, topic: Text) -> Optional[List[Dict[Text, Any]]]:
+        """Return the ranked educational videos for a topic, or None when the search found nothing."""
+        cache_key = normalize_topic(topic)
+        cached = self.topic_cache.get(cache_key)
+        count("cache", cache="youtube", result="miss" if cached is None else "hit")
+        if cached is not None:
+            logger.info(f"Served cached videos for topic: {topic}")
+            return cached
+
+        # Add educational keywords to search
+        search_query = f"{topic} tutorial how to learn"
+        
+        with span("search"):
+            search_response = await self.fetcher.call(self.execute, self.youtube.search().list(
                 q=search_query,
                 part='snippet',
                 maxResults=5,
@@ -134,59 +388,104 @@ class ActionFetchYoutubeVideos(Action):
                 order='relevance',
                 safeSearch='moderate',
                 relevanceLanguage='en'
-            ).execute()
+            ))
 
-            if not search_response.get('items'):
-                dispatcher.utter_message(text=f"Sorry, I couldn't find any tutorial videos about {topic}")
-                return []
+        if not search_response.get('items'):
+            return None
 
-            videos = []
-            for item in search_response['items']:
-                video_id = item['id']['videoId']
-                details = self.get_video_details(video_id)
+        items = search_response['items']
+        with span("details"):
+            details_by_id = await self.get_video_details([item['id']['videoId'] for item in items])
+
+        with span("rank"):
+            videos = self.rank_videos(items, details_by_id)
+        self.topic_cache.set(cache_key, videos)
+        return videos
+
+    def rank_videos(self, items: List[Dict[Text, Any]], details_by_id: Dict[Text, Dict[Text, Any]]) -> List[Dict[Text, Any]]:
+        videos = []
+        for item in items:
+            video_id = item['id']['videoId']
+            details = details_by_id.get(video_id)
+            
+            if details:
+                description = details['snippet']['description'].lower()
+                # Check for educational indicators
+                edu_terms = ['learn', 'tutorial', 'guide', 'course', 'lesson', 'example', 'explained']
+                edu_score = sum(1 for term in edu_terms if term in description)
                 
-                if details:
-                    description = details['snippet']['description'].lower()
-                    # Check for educational indicators
-                    edu_terms = ['learn', 'tutorial', 'guide', 'course', 'lesson', 'example', 'explained']
-                    edu_score = sum(1 for term in edu_terms if term in description)
+                if edu_score > 0:
+                    title = item['snippet']['title']
+                    channel = item['snippet']['channelTitle']
+                    url = f"https://www.youtube.com/watch?v={video_id}"
+                    views = int(details['statistics'].get('viewCount', 0))
+                    likes = int(details['statistics'].get('likeCount', 0))
                     
-                    if edu_score > 0:
-                        title = item['snippet']['title']
-                        channel = item['snippet']['channelTitle']
-                        url = f"https://www.youtube.com/watch?v={video_id}"
-                        views = int(details['statistics'].get('viewCount', 0))
-                        likes = int(details['statistics'].get('likeCount', 0))
-                        
-                        videos.append({
-                            'title': title,
-                            'channel': channel,
-                            'url': url,
-                            'edu_score': edu_score,
-                            'engagement': views + (likes * 100)
-                        })
-
-            # Sort by educational score and engagement
-            videos.sort(key=lambda x: (x['edu_score'], x['engagement']), reverse=True)
-            top_videos = videos[:3]
-
-            if not top_videos:
-                dispatcher.utter_message(text=f"Sorry, I couldn't find any quality tutorial videos about {topic}")
-                return []
+                    videos.append({
+                        'title': title,
+                        'channel': channel,
+                        'url': url,
+                        'edu_score': edu_score,
+                        'engagement': views + (likes * 100)
+                    })
+
+        # Sort by educational score and engagement
+        videos.sort(key=lambda x: (x['edu_score'], x['engagement']), reverse=True)
+        return videos
 
-            response = f"🎥 Educational Videos about <b>{topic}</b><br><br>"
-            for i, video in enumerate(top_videos, 1):
-                response += f"<b>Video {i}</b><br>"
-                response += f"📌 <b>Title:</b> {video['title']}<br>"
-                response += f"👤 <b>Channel:</b> {video['channel']}<br>"
-                response += f'🔗 <b>Watch Now:</b> <a href="{video["url"]}">Click Here</a><br><br>'
+    @instrumented("action_fetch_youtube_videos")
+    async def run(self, dispatcher: CollectingDispatcher, tracker: Tracker, domain: Dict[Text, Any]) -> List[Dict[Text, Any]]:
+        topic = tracker.get_slot("topic")
+        if not topic:
+            dispatcher.utter_message(text="I need a topic to search for videos.")
+            return []
 
-            # Add a helpful closing message
-            response += "These videos are curated to help you learn more about the topic. Enjoy your learning journey!"
+        try:
+            videos = await self.search_videos(topic)
+        except Exception as e:
+            if not isinstance(e, CircuitOpenError):
+                logger.error(f"Error fetching videos for topic {topic}: {e!r}")
+            count("error", kind="circuit_open" if isinstance(e, CircuitOpenError) else "fetch", action="action_fetch_youtube_videos")
+            # degrade instead of failing: expired results are better than none
+            stale = self.topic_cache.get(normalize_topic(topic), allow_stale=True)
+            if stale:
+                logger.info(f"Served stale videos for topic: {topic}")
+                count("cache", cache="youtube_stale", result="hit")
+                videos = stale
+            else:
+                search_url = f"https://www.youtube.com/results?search_query={quote_plus(topic + ' tutorial')}"
+                dispatcher.utter_message(
+                    text="Sorry, I couldn't fetch any videos at the moment. "
+                         f'You can still <a href="{search_url}">search YouTube for {topic} tutorials</a>.'
+                )
+                return []
 
-            dispatcher.utter_message(text=response)
+        if videos is None:
+            dispatcher.utter_message(text=f"Sorry, I couldn't find any tutorial videos about {topic}")
             return []
 
-        except HttpError as e:
-            dispatcher.utter_message(text="Sorry, I couldn't fetch any videos at the moment.")
+        top_videos = videos[:3]
+
+        if not top_videos:
+            dispatcher.utter_message(text=f"Sorry, I couldn't find any quality tutorial videos about {topic}")
             return []
+
+        response = f"🎥 Educational Videos about <b>{topic}</b><br><br>"
+        for i, video in enumerate(top_videos, 1):
+            response += f"<b>Video {i}</b><br>"
+            response += f"📌 <b>Title:</b> {video['title']}<br>"
+            response += f"👤 <b>Channel:</b> {video['channel']}<br>"
+            response += f'🔗 <b>Watch Now:</b> <a href="{video["url"]}">Click Here</a><br><br>'
+
+        # Add a helpful closing message
+        response += "These videos are curated to help you learn more about the topic. Enjoy your learning journey!"
+
+        dispatcher.utter_message(text=response)
+        return []
+
+
+def is_retryable_youtube_error(error: Exception) -> bool:
+    # quota and bad-request errors will not fix themselves on retry; rate limits and 5xx might
+    if isinstance(error, HttpError):
+        return error.resp.status == 429 or error.resp.status >= 500
+    return True
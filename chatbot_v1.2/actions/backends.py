@@ -0,0 +1,179 @@
+# Pluggable inference backends for content generation.
+#
+# All backends expose the same `generate(prompts, params)` call so the
+# batcher and the actions do not care how the model is executed:
+#
+# - "torch":      the original PyTorch fp32 model
+# - "torch-int8": PyTorch with dynamic int8 quantization of the Linear layers,
+#                 roughly a quarter of the weight memory and faster on CPU
+# - "onnx":       ONNX Runtime export (encoder, decoder and decoder-with-past,
+#                 so the KV cache is reused between decoding steps);
+#                 requires `pip install optimum[onnxruntime]`
+#
+# The PyTorch backends can also run assisted ("speculative") generation: a
+# small draft model sharing the tokenizer (e.g. flan-t5-small for
+# flan-t5-large) proposes a few tokens and the large model verifies them in
+# a single forward pass. The output follows the large model's distribution
+# (identical for greedy decoding); only the number of large-model passes
+# shrinks.
+
+import logging
+import os
+from typing import Any, Callable, Dict, List, Optional, Text
+
+from .instrumentation import span
+
+logger = logging.getLogger(__name__)
+
+
+class InferenceBackend:
+    name = "base"
+
+    def __init__(self, model_name: Text, max_input_length: int = 1024):
+        self.model_name = model_name
+        self.max_input_length = max_input_length
+        self.tokenizer = None
+        self.model = None
+
+    def load(self) -> "InferenceBackend":
+        raise NotImplementedError
+
+    def tokenize(self, prompts: List[Text]):
+        return self.tokenizer(
+            prompts,
+            return_tensors="pt",
+            padding=True,
+            max_length=self.max_input_length,
+            truncation=True,
+        )
+
+    def generate(self, prompts: List[Text], params: Dict[Text, Any]) -> List[Text]:
+        with span("tokenize", backend=self.name):
+            inputs = self.tokenize(prompts)
+        with span("generate", backend=self.name):
+            outputs = self.model.generate(
+                input_ids=inputs.input_ids,
+                attention_mask=inputs.attention_mask,
+                **params
+            )
+        with span("decode", backend=self.name):
+            return self.tokenizer.batch_decode(outputs, skip_special_tokens=True)
+
+    def generate_stream(self, prompt: Text, params: Dict[Text, Any], on_text: Callable[[Text], None]) -> Text:
+        """Generate for a single prompt, calling `on_text` with each newly decoded piece of text."""
+        from transformers import TextStreamer
+
+        class CallbackStreamer(TextStreamer):
+            def on_finalized_text(self, text: Text, stream_end: bool = False) -> None:
+                on_text(text)
+
+        with span("tokenize", backend=self.name):
+            inputs = self.tokenize([prompt])
+        # streamed text is decoded token by token inside this span
+        with span("generate_stream", backend=self.name):
+            outputs = self.model.generate(
+                input_ids=inputs.input_ids,
+                attention_mask=inputs.attention_mask,
+                streamer=CallbackStreamer(self.tokenizer, skip_prompt=True, skip_special_tokens=True),
+                **params
+            )
+        with span("decode", backend=self.name):
+            return self.tokenizer.decode(outputs[0], skip_special_tokens=True)
+
+
+class TorchBackend(InferenceBackend):
+    name = "torch"
+
+    def __init__(self, model_name: Text, max_input_length: int = 1024, draft_model_name: Optional[Text] = None):
+        super().__init__(model_name, max_input_length)
+        self.draft_model_name = draft_model_name
+        self.draft_model = None
+
+    def load(self) -> "TorchBackend":
+        from transformers import AutoTokenizer, AutoModelForSeq2SeqLM
+
+        self.tokenizer = AutoTokenizer.from_pretrained(self.model_name)
+        self.model = AutoModelForSeq2SeqLM.from_pretrained(self.model_name)
+        self.model.eval()
+        if self.draft_model_name:
+            self.draft_model = AutoModelForSeq2SeqLM.from_pretrained(self.draft_model_name)
+            self.draft_model.eval()
+        return self
+
+    def assisted(self, batch_size: int, params: Dict[Text, Any]) -> Dict[Text, Any]:
+        # transformers only assists single-sequence decoding of one prompt at a time;
+        # beam search and padded batches run on the large model alone
+        if self.draft_model is None or batch_size != 1 or params.get("num_beams", 1) != 1:
+            return params
+        return dict(params, assistant_model=self.draft_model)
+
+    def generate(self, prompts: List[Text], params: Dict[Text, Any]) -> List[Text]:
+        import torch
+
+        with torch.inference_mode():
+            return super().generate(prompts, self.assisted(len(prompts), params))
+
+    def generate_stream(self, prompt: Text, params: Dict[Text, Any], on_text: Callable[[Text], None]) -> Text:
+        import torch
+
+        with torch.inference_mode():
+            return super().generate_stream(prompt, self.assisted(1, params), on_text)
+
+
+class TorchInt8Backend(TorchBackend):
+    name = "torch-int8"
+
+    def load(self) -> "TorchInt8Backend":
+        import torch
+
+        super().load()
+        self.model = torch.quantization.quantize_dynamic(self.model, {torch.nn.Linear}, dtype=torch.qint8)
+        if self.draft_model is not None:
+            self.draft_model = torch.quantization.quantize_dynamic(
+                self.draft_model, {torch.nn.Linear}, dtype=torch.qint8
+            )
+        return self
+
+
+class OnnxBackend(InferenceBackend):
+    name = "onnx"
+
+    def __init__(self, model_name: Text, max_input_length: int = 1024, export_dir: Optional[Text] = None):
+        super().__init__(model_name, max_input_length)
+        self.export_dir = export_dir
+
+    def load(self) -> "OnnxBackend":
+        from transformers import AutoTokenizer
+        try:
+            from optimum.onnxruntime import ORTModelForSeq2SeqLM
+        except ImportError as e:
+            raise ImportError("The onnx backend requires `pip install optimum[onnxruntime]`") from e
+
+        self.tokenizer = AutoTokenizer.from_pretrained(self.model_name)
+        if self.export_dir and os.path.isdir(self.export_dir) and os.listdir(self.export_dir):
+            self.model = ORTModelForSeq2SeqLM.from_pretrained(self.export_dir, use_cache=True)
+        else:
+            # the export takes minutes for flan-t5-large, keep the result for the next start
+            logger.info(f"Exporting {self.model_name} to ONNX")
+            self.model = ORTModelForSeq2SeqLM.from_pretrained(self.model_name, export=True, use_cache=True)
+            if self.export_dir:
+                self.model.save_pretrained(self.export_dir)
+                self.tokenizer.save_pretrained(self.export_dir)
+        return self
+
+
+BACKENDS = {
+    TorchBackend.name: TorchBackend,
+    TorchInt8Backend.name: TorchInt8Backend,
+    OnnxBackend.name: OnnxBackend,
+}
+
+
+def create_backend(name: Text, model_name: Text, **kwargs: Any) -> InferenceBackend:
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown inference backend '{name}', expected one of {sorted(BACKENDS)}")
+    if name != OnnxBackend.name:
+        kwargs.pop("export_dir", None)
+    elif kwargs.pop("draft_model_name", None):
+        logger.warning("Assisted generation is not supported by the onnx backend, ignoring the draft model")
+    return BACKENDS[name](model_name, **kwargs)
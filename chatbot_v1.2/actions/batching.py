@@ -0,0 +1,156 @@
+# Micro-batching scheduler for seq2seq generation.
+#
+# Concurrent generate requests are queued and a worker thread drains the
+# queue in small windows: it waits for the first request, keeps collecting
+# until either `max_batch_size` requests are queued or `max_wait_ms` has
+# passed, and then runs them through the inference backend as one padded batch.
+# Each caller gets its own decoded string back through a Future.
+# Requests that carry a TokenStream are generated on their own (streamers
+# follow a single sequence) and feed the stream as tokens are decoded, so
+# they get no batching benefit; streaming is off by default for that reason.
+#
+# The queue is bounded: once `max_queue_depth` requests are waiting,
+# `submit` raises GenerationQueueFull straight away so the caller can tell
+# the learner to retry instead of piling more work onto a saturated CPU.
+
+import json
+import logging
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, List, Optional, Text
+
+from .backends import InferenceBackend
+from .instrumentation import attribute, current_request, recording
+from .streaming import TokenStream
+
+logger = logging.getLogger(__name__)
+
+
+class GenerationQueueFull(Exception):
+    """Raised by `BatchGenerator.submit` when the request queue is saturated."""
+
+
+class GenerationRequest:
+    __slots__ = ("prompt", "params", "params_key", "stream", "future", "request_log")
+
+    def __init__(self, prompt: Text, params: Dict[Text, Any], stream: Optional[TokenStream] = None):
+        self.prompt = prompt
+        self.params = params
+        self.stream = stream
+        # requests can only share a batch when they decode with the same settings
+        self.params_key = json.dumps(params, sort_keys=True)
+        self.future: Future = Future()
+        # the submitting request's instrumentation log; the worker thread cannot see its context
+        self.request_log = current_request()
+
+
+class BatchGenerator:
+    def __init__(
+        self,
+        backend: Callable[[], InferenceBackend],
+        max_batch_size: int = 8,
+        max_wait_ms: float = 30.0,
+        max_queue_depth: int = 32,
+        num_workers: int = 1,
+    ):
+        # resolved on the worker thread, so a lazily loaded model never blocks the caller
+        self.backend = backend
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_wait = max(0.0, max_wait_ms) / 1000.0
+        self._queue: "queue.Queue[Optional[GenerationRequest]]" = queue.Queue(maxsize=max(0, max_queue_depth))
+        self._workers = [
+            threading.Thread(target=self._run, name=f"generation-batcher-{i}", daemon=True)
+            for i in range(max(1, num_workers))
+        ]
+        for worker in self._workers:
+            worker.start()
+
+    def submit(self, prompt: Text, params: Dict[Text, Any], stream: Optional[TokenStream] = None) -> Future:
+        request = GenerationRequest(prompt, params, stream)
+        try:
+            self._queue.put_nowait(request)
+        except queue.Full:
+            raise GenerationQueueFull(f"{self._queue.qsize()} generation requests already queued")
+        return request.future
+
+    def queue_depth(self) -> int:
+        return self._queue.qsize()
+
+    def generate(self, prompt: Text, params: Dict[Text, Any], timeout: Optional[float] = None) -> Text:
+        return self.submit(prompt, params).result(timeout=timeout)
+
+    def close(self) -> None:
+        for _ in self._workers:
+            self._queue.put(None)
+        for worker in self._workers:
+            worker.join()
+
+    def _collect(self, first: GenerationRequest) -> List[GenerationRequest]:
+        batch = [first]
+        deadline = time.monotonic() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                request = self._queue.get(timeout=remaining)
+            except queue.Empty:
+                break
+            if request is None:
+                # keep the shutdown signal for the main loop
+                self._queue.put(None)
+                break
+            batch.append(request)
+        return batch
+
+    def _run(self) -> None:
+        while True:
+            first = self._queue.get()
+            if first is None:
+                return
+            # claim the futures; requests cancelled while queued are dropped
+            batch = [request for request in self._collect(first) if request.future.set_running_or_notify_cancel()]
+
+            groups: Dict[Text, List[GenerationRequest]] = {}
+            for request in batch:
+                if request.stream is not None:
+                    self._generate_stream(request)
+                else:
+                    groups.setdefault(request.params_key, []).append(request)
+            for requests in groups.values():
+                self._generate_batch(requests)
+
+    def _generate_batch(self, requests: List[GenerationRequest]) -> None:
+        # identical prompts in the same window are generated once
+        prompts = list(dict.fromkeys(request.prompt for request in requests))
+        try:
+            started = time.perf_counter()
+            with recording() as records:
+                texts = self.backend().generate(prompts, requests[0].params)
+            logger.debug(
+                f"Generated batch of {len(prompts)} prompt(s) for {len(requests)} request(s) "
+                f"in {time.perf_counter() - started:.2f}s"
+            )
+        except Exception as e:
+            for request in requests:
+                request.future.set_exception(e)
+            return
+        # before the futures resolve, so the requests log the spans of their batch
+        attribute(records, (request.request_log for request in requests), batch_size=len(prompts))
+
+        results = dict(zip(prompts, texts))
+        for request in requests:
+            request.future.set_result(results[request.prompt])
+
+    def _generate_stream(self, request: GenerationRequest) -> None:
+        # the caller owns the stream and closes it from the future's callback
+        try:
+            with recording() as records:
+                text = self.backend().generate_stream(request.prompt, request.params, request.stream.put)
+        except Exception as e:
+            request.future.set_exception(e)
+            return
+        attribute(records, [request.request_log], batch_size=1)
+        request.future.set_result(text)
@@ -0,0 +1,220 @@
+# Two-tier cache for generated explanations.
+#
+# The memory tier is a small LRU with a TTL that serves hot topics without
+# touching the disk. The disk tier is a SQLite table that survives action
+# server restarts, so a freshly started server does not have to regenerate
+# everything it already produced yesterday.
+
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import string
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Text, Tuple
+
+logger = logging.getLogger(__name__)
+
+_STRIP_CHARS = string.whitespace + string.punctuation
+
+
+def normalize_topic(topic: Text) -> Text:
+    # "  Machine   Learning? " and "machine learning" should share an entry
+    return " ".join(topic.lower().split()).strip(_STRIP_CHARS)
+
+
+def make_cache_key(topic: Text, prompt_template: Text, generation_params: Dict[Text, Any]) -> Text:
+    payload = json.dumps(
+        {
+            "topic": normalize_topic(topic),
+            "prompt": prompt_template,
+            "params": generation_params,
+        },
+        sort_keys=True,
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class TTLCache:
+    """In-memory LRU cache whose entries expire after `ttl` seconds."""
+
+    def __init__(self, max_entries: int = 1024, ttl: float = 3600.0):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries: "OrderedDict[Text, Tuple[float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Text, allow_stale: bool = False) -> Optional[Any]:
+        """
+        Return the cached value, or None when missing or expired.
+
+        Expired entries stay until the LRU evicts them, so `allow_stale`
+        can still serve them when the source of truth is unavailable.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at < time.monotonic() and not allow_stale:
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key: Text, value: Any) -> None:
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class SQLiteCache:
+    """Disk-backed key/value tier stored in a single SQLite file."""
+
+    def __init__(self, path: Text, ttl: float = 7 * 24 * 3600.0):
+        self.path = path
+        self.ttl = ttl
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        # one connection shared by the action server threads, guarded by a lock
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS generation_cache ("
+            " key TEXT PRIMARY KEY,"
+            " value TEXT NOT NULL,"
+            " cost REAL NOT NULL DEFAULT 0,"
+            " created_at REAL NOT NULL)"
+        )
+        self._conn.commit()
+        self._lock = threading.Lock()
+
+    def get(self, key: Text) -> Optional[Tuple[Text, float]]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value, cost, created_at FROM generation_cache WHERE key = ?", (key,)
+            ).fetchone()
+        if row is None:
+            return None
+        value, cost, created_at = row
+        if created_at + self.ttl < time.time():
+            return None
+        return value, cost
+
+    def set(self, key: Text, value: Text, cost: float = 0.0) -> None:
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO generation_cache (key, value, cost, created_at) VALUES (?, ?, ?, ?)",
+                (key, value, cost, time.time()),
+            )
+            self._conn.commit()
+
+    def purge_expired(self) -> int:
+        with self._lock:
+            cursor = self._conn.execute(
+                "DELETE FROM generation_cache WHERE created_at < ?", (time.time() - self.ttl,)
+            )
+            self._conn.commit()
+        return cursor.rowcount
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+class GenerationCache:
+    """
+    Cache for generated content with hit/miss accounting.
+
+    `cost` is the number of seconds the original generation took; every hit
+    adds it to `saved_seconds` so the logs show how much model time the
+    cache is saving.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = 1024,
+        ttl: float = 3600.0,
+        disk_path: Optional[Text] = None,
+        disk_ttl: float = 7 * 24 * 3600.0,
+        log_every: int = 100,
+    ):
+        self.memory = TTLCache(max_entries=max_entries, ttl=ttl)
+        self.disk = None
+        if disk_path:
+            try:
+                self.disk = SQLiteCache(disk_path, ttl=disk_ttl)
+                removed = self.disk.purge_expired()
+                logger.info(f"Generation cache opened at {disk_path} ({removed} expired entries removed)")
+            except sqlite3.Error as e:
+                logger.error(f"Error opening generation cache at {disk_path}, using memory only: {e}")
+                self.disk = None
+        self.log_every = log_every
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.saved_seconds = 0.0
+        self._stats_lock = threading.Lock()
+
+    def get(self, key: Text) -> Optional[Text]:
+        entry = self.memory.get(key)
+        tier = "memory"
+        if entry is None and self.disk is not None:
+            try:
+                entry = self.disk.get(key)
+            except sqlite3.Error as e:
+                logger.error(f"Error reading generation cache: {e}")
+                entry = None
+            if entry is not None:
+                # promote so the next lookup stays in memory
+                self.memory.set(key, entry)
+            tier = "disk"
+
+        with self._stats_lock:
+            if entry is None:
+                self.misses += 1
+            elif tier == "memory":
+                self.memory_hits += 1
+            else:
+                self.disk_hits += 1
+            if entry is not None:
+                self.saved_seconds += entry[1]
+            lookups = self.memory_hits + self.disk_hits + self.misses
+        if self.log_every and lookups % self.log_every == 0:
+            logger.info(f"Generation cache stats: {self.stats()}")
+
+        return entry[0] if entry is not None else None
+
+    def set(self, key: Text, value: Text, cost: float = 0.0) -> None:
+        self.memory.set(key, (value, cost))
+        if self.disk is not None:
+            try:
+                self.disk.set(key, value, cost)
+            except sqlite3.Error as e:
+                logger.error(f"Error writing generation cache: {e}")
+
+    def stats(self) -> Dict[Text, Any]:
+        with self._stats_lock:
+            hits = self.memory_hits + self.disk_hits
+            lookups = hits + self.misses
+            return {
+                "memory_hits": self.memory_hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "hit_rate": round(hits / lookups, 4) if lookups else 0.0,
+                "saved_seconds": round(self.saved_seconds, 2),
+                "memory_entries": len(self.memory),
+            }
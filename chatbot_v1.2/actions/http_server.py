@@ -0,0 +1,60 @@
+# Small HTTP side server running next to the rasa_sdk action server.
+#
+# The action server only exposes the `/webhook` route Rasa talks to. Routes
+# that clients call directly (token streams for the Streamlit app) are
+# served from this threaded stdlib server on a separate port, so they need
+# no changes to rasa_sdk and do not compete with the webhook's event loop.
+
+import logging
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Dict, Optional, Text
+
+logger = logging.getLogger(__name__)
+
+# handler(request, path_remainder) writes the complete response itself
+RouteHandler = Callable[[BaseHTTPRequestHandler, Text], None]
+
+_routes: Dict[Text, RouteHandler] = {}
+_server: Optional[ThreadingHTTPServer] = None
+_lock = threading.Lock()
+
+
+def register_route(prefix: Text, handler: RouteHandler) -> None:
+    """Serve GET requests whose path starts with `prefix` with `handler`."""
+    _routes[prefix] = handler
+
+
+class _RequestHandler(BaseHTTPRequestHandler):
+    server_version = "LearningSarthiActions"
+
+    def do_GET(self) -> None:
+        path = self.path.split("?", 1)[0]
+        # longest prefix wins so "/stream/" can coexist with "/"
+        for prefix in sorted(_routes, key=len, reverse=True):
+            if path.startswith(prefix):
+                try:
+                    _routes[prefix](self, path[len(prefix):])
+                except (BrokenPipeError, ConnectionResetError):
+                    logger.debug(f"Client disconnected from {path}")
+                return
+        self.send_error(404)
+
+    def log_message(self, format: Text, *args) -> None:
+        logger.debug(f"{self.address_string()} {format % args}")
+
+
+def start_http_server(host: Text, port: int) -> Optional[ThreadingHTTPServer]:
+    """Start the side server once per process; later calls return the running server."""
+    global _server
+    with _lock:
+        if _server is None:
+            try:
+                _server = ThreadingHTTPServer((host, port), _RequestHandler)
+            except OSError as e:
+                logger.error(f"Could not start HTTP side server on {host}:{port}: {e}")
+                return None
+            _server.daemon_threads = True
+            threading.Thread(target=_server.serve_forever, name="action-http-server", daemon=True).start()
+            logger.info(f"HTTP side server listening on {host}:{port}")
+        return _server
@@ -0,0 +1,265 @@
+# Lightweight instrumentation for the action server hot paths.
+#
+# - `span(name)` times a block into the `learning_sarthi_span_seconds` histogram
+# - `count(name, **labels)` increments a counter (cache hits, errors, rejections)
+# - `metrics.set(name, value, **labels)` sets a gauge (model load time and memory)
+# - `instrumented(action)` wraps an action's `run`, timing the whole request
+#   and, when structured logs are on, logging one JSON line per request with
+#   the Rasa sender_id and every span and counter recorded while handling it
+#
+# The request log lives in a context variable, which `run_in_executor` and
+# the batcher threads do not inherit: executor jobs are wrapped with
+# `in_context`, and the batcher records shared work with `recording` and
+# hands it to every request of the batch with `attribute`.
+#
+# Everything is kept in process memory and rendered in the Prometheus text
+# format on the side HTTP server's `/metrics` route. With METRICS_ENABLED off
+# `span` returns a shared no-op context manager and `count` returns at once.
+
+import contextlib
+import contextvars
+import functools
+import json
+import logging
+import threading
+import time
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Text, Tuple
+
+from . import settings
+from .http_server import register_route, start_http_server
+
+logger = logging.getLogger(__name__)
+
+PREFIX = "learning_sarthi_"
+LATENCY_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+
+LabelKey = Tuple[Tuple[Text, Text], ...]
+
+
+def _label_key(labels: Dict[Text, Any]) -> LabelKey:
+    return tuple(sorted((key, str(value)) for key, value in labels.items()))
+
+
+def _format_labels(labels: LabelKey, extra: Optional[Tuple[Text, Text]] = None) -> Text:
+    pairs = list(labels) + ([extra] if extra else [])
+    if not pairs:
+        return ""
+    escaped = (value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") for _, value in pairs)
+    return "{" + ",".join(f'{key}="{value}"' for (key, _), value in zip(pairs, escaped)) + "}"
+
+
+class _Histogram:
+    __slots__ = ("buckets", "counts", "sum", "count")
+
+    def __init__(self, buckets: Tuple[float, ...]):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[i] += 1
+                break
+        self.sum += value
+        self.count += 1
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self._counters: Dict[Text, Dict[LabelKey, float]] = {}
+        self._histograms: Dict[Text, Dict[LabelKey, _Histogram]] = {}
+        self._gauges: Dict[Text, Dict[LabelKey, float]] = {}
+        self._help: Dict[Text, Text] = {}
+        self._lock = threading.Lock()
+
+    def describe(self, name: Text, help_text: Text) -> None:
+        self._help[PREFIX + name] = help_text
+
+    def inc(self, name: Text, value: float = 1.0, **labels: Any) -> None:
+        key = _label_key(labels)
+        with self._lock:
+            series = self._counters.setdefault(PREFIX + name, {})
+            series[key] = series.get(key, 0.0) + value
+
+    def set(self, name: Text, value: float, **labels: Any) -> None:
+        key = _label_key(labels)
+        with self._lock:
+            self._gauges.setdefault(PREFIX + name, {})[key] = value
+
+    def observe(self, name: Text, value: float, buckets: Tuple[float, ...] = LATENCY_BUCKETS, **labels: Any) -> None:
+        key = _label_key(labels)
+        with self._lock:
+            series = self._histograms.setdefault(PREFIX + name, {})
+            histogram = series.get(key)
+            if histogram is None:
+                histogram = series[key] = _Histogram(buckets)
+            histogram.observe(value)
+
+    def render(self) -> Text:
+        """All metrics in the Prometheus text exposition format."""
+        lines: List[Text] = []
+        with self._lock:
+            for name, series in sorted(self._counters.items()):
+                lines.append(f"# HELP {name} {self._help.get(name, name)}")
+                lines.append(f"# TYPE {name} counter")
+                for labels, value in sorted(series.items()):
+                    lines.append(f"{name}{_format_labels(labels)} {value:g}")
+            for name, series in sorted(self._gauges.items()):
+                lines.append(f"# HELP {name} {self._help.get(name, name)}")
+                lines.append(f"# TYPE {name} gauge")
+                for labels, value in sorted(series.items()):
+                    lines.append(f"{name}{_format_labels(labels)} {value:g}")
+            for name, series in sorted(self._histograms.items()):
+                lines.append(f"# HELP {name} {self._help.get(name, name)}")
+                lines.append(f"# TYPE {name} histogram")
+                for labels, histogram in sorted(series.items()):
+                    cumulative = 0
+                    for bound, bucket_count in zip(histogram.buckets, histogram.counts):
+                        cumulative += bucket_count
+                        lines.append(f"{name}_bucket{_format_labels(labels, ('le', f'{bound:g}'))} {cumulative}")
+                    lines.append(f"{name}_bucket{_format_labels(labels, ('le', '+Inf'))} {histogram.count}")
+                    lines.append(f"{name}_sum{_format_labels(labels)} {histogram.sum:.6f}")
+                    lines.append(f"{name}_count{_format_labels(labels)} {histogram.count}")
+        return "\n".join(lines) + "\n"
+
+
+metrics = MetricsRegistry()
+metrics.describe("span_seconds", "Time spent in instrumented steps of the actions")
+metrics.describe("action_seconds", "Time to run a custom action, per action")
+metrics.describe("events_total", "Cache hits and misses, errors and topic rejections")
+
+# spans and counters of the request being handled, for the structured log line
+_request: contextvars.ContextVar[Optional[Dict[Text, Any]]] = contextvars.ContextVar("request", default=None)
+
+
+class _Span:
+    __slots__ = ("name", "labels", "started")
+
+    def __init__(self, name: Text, labels: Dict[Text, Any]):
+        self.name = name
+        self.labels = labels
+
+    def __enter__(self) -> "_Span":
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        elapsed = time.perf_counter() - self.started
+        metrics.observe("span_seconds", elapsed, span=self.name, **self.labels)
+        request = _request.get()
+        if request is not None:
+            request["spans"].append(dict(self.labels, span=self.name, seconds=round(elapsed, 6)))
+
+
+class _NoopSpan:
+    __slots__ = ()
+
+    def __enter__(self) -> "_NoopSpan":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        pass
+
+
+_NOOP_SPAN = _NoopSpan()
+
+
+def span(name: Text, **labels: Any):
+    """Time the enclosed block as step `name`."""
+    if not settings.METRICS_ENABLED:
+        return _NOOP_SPAN
+    return _Span(name, labels)
+
+
+def count(event: Text, **labels: Any) -> None:
+    """Count one occurrence of `event`, e.g. `count("cache", cache="exact", result="hit")`."""
+    if not settings.METRICS_ENABLED:
+        return
+    metrics.inc("events_total", event=event, **labels)
+    request = _request.get()
+    if request is not None:
+        request["events"].append(dict(labels, event=event))
+
+
+def current_request() -> Optional[Dict[Text, Any]]:
+    """The log of the request being handled, to pass along with work done on other threads."""
+    return _request.get()
+
+
+def in_context(fn: Callable, *args: Any, **kwargs: Any) -> Callable[[], Any]:
+    """`fn(*args, **kwargs)` bound to a copy of the current context, for `run_in_executor`."""
+    return functools.partial(contextvars.copy_context().run, fn, *args, **kwargs)
+
+
+@contextlib.contextmanager
+def recording() -> Iterator[Dict[Text, Any]]:
+    """Collect the spans and counters of the enclosed block, e.g. a generation shared by a batch."""
+    records = {"spans": [], "events": []}
+    token = _request.set(records)
+    try:
+        yield records
+    finally:
+        _request.reset(token)
+
+
+def attribute(records: Dict[Text, Any], requests: Iterable[Optional[Dict[Text, Any]]], **labels: Any) -> None:
+    """Add `recording` output to the log of each request it was done for."""
+    for request in requests:
+        if request is not None:
+            request["spans"].extend(dict(record, **labels) for record in records["spans"])
+            request["events"].extend(records["events"])
+
+
+def instrumented(action_name: Text) -> Callable:
+    """Decorate an async `run(self, dispatcher, tracker, domain)` to time and log each request."""
+
+    def decorate(run: Callable) -> Callable:
+        @functools.wraps(run)
+        async def wrapper(self, dispatcher, tracker, domain):
+            if not settings.METRICS_ENABLED:
+                return await run(self, dispatcher, tracker, domain)
+
+            request = {"spans": [], "events": []}
+            token = _request.set(request)
+            started = time.perf_counter()
+            try:
+                return await run(self, dispatcher, tracker, domain)
+            finally:
+                elapsed = time.perf_counter() - started
+                _request.reset(token)
+                metrics.observe("action_seconds", elapsed, action=action_name)
+                if settings.METRICS_LOG_REQUESTS:
+                    logger.info(json.dumps({
+                        "action": action_name,
+                        "sender_id": tracker.sender_id,
+                        "seconds": round(elapsed, 6),
+                        "spans": request["spans"],
+                        "events": request["events"],
+                    }))
+
+        return wrapper
+
+    return decorate
+
+
+def metrics_route():
+    """HTTP handler serving `/metrics` for Prometheus."""
+
+    def handle(request, remainder: Text) -> None:
+        body = metrics.render().encode("utf-8")
+        request.send_response(200)
+        request.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        request.send_header("Content-Length", str(len(body)))
+        request.end_headers()
+        request.wfile.write(body)
+
+    return handle
+
+
+def serve_metrics() -> None:
+    """Expose `/metrics` on the side HTTP server (started once per process)."""
+    if settings.METRICS_ENABLED:
+        register_route("/metrics", metrics_route())
+        start_http_server(settings.STREAM_SERVER_HOST, settings.STREAM_SERVER_PORT)
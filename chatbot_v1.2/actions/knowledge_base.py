@@ -0,0 +1,145 @@
+# Read-only store of precomputed explanations for popular topics.
+#
+# The file is built offline by `scripts/build_knowledge_base.py` and
+# memory-mapped at runtime, so a lookup is a binary search over a fixed-size
+# index plus one slice of the mapped file: no model, no SQLite, no copy of
+# the whole store per worker process (the pages are shared by the OS).
+#
+# Layout (little endian):
+#
+#   header   magic "EDKB", version u32, entry count u32, context (64 ascii hex chars)
+#   index    count x (topic hash u64, offset u64, topic length u32, content length u32),
+#            sorted by topic hash
+#   blob     for every entry: normalized topic (utf-8) followed by the content (utf-8)
+
+import hashlib
+import logging
+import mmap
+import os
+import struct
+from typing import Dict, Iterator, Optional, Text, Tuple
+
+from .cache import make_cache_key, normalize_topic
+
+logger = logging.getLogger(__name__)
+
+MAGIC = b"EDKB"
+VERSION = 1
+_HEADER = struct.Struct("<4sII64s")
+_ENTRY = struct.Struct("<QQII")
+
+
+def knowledge_base_context(prompt_template: Text, model_name: Text) -> Text:
+    """Fingerprint of what shaped the stored answers; a store built for another model or prompt is ignored."""
+    return make_cache_key("", prompt_template, {"model": model_name})
+
+
+def topic_hash(topic: Text) -> int:
+    digest = hashlib.sha256(normalize_topic(topic).encode("utf-8")).digest()
+    return int.from_bytes(digest[:8], "little")
+
+
+def write_knowledge_base(path: Text, entries: Dict[Text, Text], context: Text) -> int:
+    """
+    Write `entries` (topic -> content) to `path` and return the number stored.
+
+    Topics are normalized like the generation cache keys, so "DevOps" and
+    "devops" are one entry. The file is written next to `path` and renamed
+    into place, so running servers never map a half-written store.
+    """
+    records: Dict[int, Tuple[bytes, bytes]] = {}
+    for topic, content in entries.items():
+        normalized = normalize_topic(topic)
+        records[topic_hash(normalized)] = (normalized.encode("utf-8"), content.encode("utf-8"))
+
+    ordered = sorted(records.items())
+    offset = _HEADER.size + _ENTRY.size * len(ordered)
+    index = []
+    for key, (topic_bytes, content_bytes) in ordered:
+        index.append(_ENTRY.pack(key, offset, len(topic_bytes), len(content_bytes)))
+        offset += len(topic_bytes) + len(content_bytes)
+
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(_HEADER.pack(MAGIC, VERSION, len(ordered), context.encode("ascii")))
+        f.write(b"".join(index))
+        for _, (topic_bytes, content_bytes) in ordered:
+            f.write(topic_bytes)
+            f.write(content_bytes)
+    os.replace(tmp_path, path)
+    return len(ordered)
+
+
+class KnowledgeBase:
+    def __init__(self, path: Text):
+        self.path = path
+        with open(path, "rb") as f:
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, self.count, context = _HEADER.unpack_from(self._map, 0)
+        if magic != MAGIC or version != VERSION:
+            self._map.close()
+            raise ValueError(f"{path} is not a version {VERSION} knowledge base")
+        self.context = context.decode("ascii")
+
+    @classmethod
+    def open(cls, path: Optional[Text], context: Text) -> Optional["KnowledgeBase"]:
+        """Map the store at `path`, or return None when it is missing or built for another model/prompt."""
+        if not path or not os.path.exists(path):
+            return None
+        try:
+            knowledge_base = cls(path)
+        except (OSError, ValueError, struct.error) as e:
+            logger.error(f"Error opening knowledge base at {path}: {e}")
+            return None
+        if knowledge_base.context != context:
+            logger.warning(f"Knowledge base at {path} was built for another model or prompt, ignoring it")
+            knowledge_base.close()
+            return None
+        logger.info(f"Knowledge base opened at {path} ({knowledge_base.count} topics)")
+        return knowledge_base
+
+    def _entry(self, position: int) -> Tuple[int, int, int, int]:
+        return _ENTRY.unpack_from(self._map, _HEADER.size + position * _ENTRY.size)
+
+    def get(self, topic: Text) -> Optional[Text]:
+        normalized = normalize_topic(topic)
+        key = topic_hash(normalized)
+        low, high = 0, self.count
+        while low < high:
+            middle = (low + high) // 2
+            if self._entry(middle)[0] < key:
+                low = middle + 1
+            else:
+                high = middle
+        if low == self.count:
+            return None
+
+        entry_key, offset, topic_length, content_length = self._entry(low)
+        if entry_key != key:
+            return None
+        # the hash is only 64 bits, confirm the topic itself
+        if self._map[offset:offset + topic_length] != normalized.encode("utf-8"):
+            return None
+        start = offset + topic_length
+        return self._map[start:start + content_length].decode("utf-8")
+
+    def items(self) -> Iterator[Tuple[Text, Text]]:
+        for position in range(self.count):
+            _, offset, topic_length, content_length = self._entry(position)
+            start = offset + topic_length
+            yield (
+                self._map[offset:start].decode("utf-8"),
+                self._map[start:start + content_length].decode("utf-8"),
+            )
+
+    def __contains__(self, topic: Text) -> bool:
+        return self.get(topic) is not None
+
+    def __len__(self) -> int:
+        return self.count
+
+    def close(self) -> None:
+        self._map.close()
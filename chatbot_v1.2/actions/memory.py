@@ -0,0 +1,29 @@
+# Process memory helpers used for load/benchmark reporting.
+#
+# procfs and the `resource` module are Unix-only; on Windows both helpers
+# return 0.0 instead of failing the import of the action server.
+
+import os
+import sys
+
+
+def rss_mb() -> float:
+    """Current resident set size of this process in MiB."""
+    try:
+        with open("/proc/self/statm") as statm:
+            resident_pages = int(statm.read().split()[1])
+        return resident_pages * os.sysconf("SC_PAGE_SIZE") / (1024 * 1024)
+    except (OSError, ValueError, IndexError, AttributeError):
+        # no procfs (macOS, Windows): fall back to the peak, which is the best we have
+        return peak_rss_mb()
+
+
+def peak_rss_mb() -> float:
+    """Peak resident set size of this process in MiB, 0.0 where it cannot be read."""
+    try:
+        import resource
+    except ImportError:
+        return 0.0
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in bytes on macOS and in KiB everywhere else
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
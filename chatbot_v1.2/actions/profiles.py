@@ -0,0 +1,80 @@
+# Decoding profiles for content generation.
+#
+# Beam search over 512 tokens is the right call for a postgraduate asking
+# for a thorough explanation, and far too much for a quick high-school
+# question. Each profile pairs one decoding strategy with its own token
+# budget, and the profile is picked from the learner context the Streamlit
+# app sends as message metadata.
+
+from typing import Any, Dict, Optional, Text
+
+from . import settings
+
+GENERATION_PROFILES: Dict[Text, Dict[Text, Any]] = {
+    # greedy decoding, short answer
+    "fast": {
+        "max_length": 192,
+        "min_length": 48,
+        "num_beams": 1,
+        "do_sample": False,
+        "repetition_penalty": 2.5,
+        "no_repeat_ngram_size": 3,
+    },
+    # single-sequence nucleus sampling, medium answer
+    "balanced": {
+        "max_length": 320,
+        "min_length": 80,
+        "num_beams": 1,
+        "do_sample": True,
+        "temperature": 0.7,
+        "top_p": 0.92,
+        "top_k": 50,
+        "repetition_penalty": 2.5,
+        "no_repeat_ngram_size": 3,
+    },
+    # deterministic beam search, long answer
+    "quality": {
+        "max_length": 512,
+        "min_length": 100,
+        "num_beams": 5,
+        "do_sample": False,
+        "repetition_penalty": 2.5,
+        "length_penalty": 1.5,
+        "no_repeat_ngram_size": 3,
+        "early_stopping": True,
+    },
+}
+
+PROFILE_ORDER = ["fast", "balanced", "quality"]
+
+EDUCATION_LEVEL_PROFILES = {
+    "High School": "fast",
+    "Undergraduate": "balanced",
+    "Postgraduate": "quality",
+    "Professional": "quality",
+}
+
+# readers get one step more text, visual and hands-on learners one step less (they get videos too)
+LEARNING_STYLE_ADJUSTMENT = {
+    "Reading/Writing": 1,
+    "Auditory": 0,
+    "Visual": -1,
+    "Kinesthetic": -1,
+}
+
+
+def select_profile(education_level: Optional[Text] = None, learning_style: Optional[Text] = None) -> Text:
+    """Name of the decoding profile for a learner; the default profile when nothing is known."""
+    base = EDUCATION_LEVEL_PROFILES.get(education_level) if education_level else None
+    if base is None:
+        return settings.GENERATION_DEFAULT_PROFILE
+    rank = PROFILE_ORDER.index(base) + LEARNING_STYLE_ADJUSTMENT.get(learning_style, 0)
+    return PROFILE_ORDER[max(0, min(rank, len(PROFILE_ORDER) - 1))]
+
+
+def streaming_params(params: Dict[Text, Any]) -> Dict[Text, Any]:
+    # Streamers follow a single sequence, so streamed answers drop beam search
+    return {
+        key: value for key, value in params.items()
+        if key not in ("num_beams", "length_penalty", "early_stopping")
+    }
@@ -0,0 +1,130 @@
+# Process-wide registry of loaded models.
+#
+# Models are loaded at most once per process, on first use, instead of in
+# every action's constructor. Loading can also be started in the background
+# so the action server accepts requests (greetings, videos) while the
+# weights are still being read.
+#
+# Sharing between worker processes relies on copy-on-write: call `preload`
+# in the parent before forking and the children reuse the parent's weight
+# pages. Without a fork every process holds its own copy. safetensors
+# checkpoints are read through a memory map rather than unpickled, which
+# lowers the peak while loading; the weights still end up in process memory.
+#
+# Load time, resident memory growth and load state of every model are
+# published as gauges on `/metrics`.
+
+import gc
+import logging
+import threading
+import time
+from typing import Any, Dict, Optional, Text, Tuple
+
+from . import settings
+from .backends import InferenceBackend, create_backend
+from .instrumentation import metrics
+from .memory import rss_mb
+
+logger = logging.getLogger(__name__)
+
+metrics.describe("model_loaded", "1 once a model is loaded, 0 after a failed load")
+metrics.describe("model_load_seconds", "Time it took to load a model")
+metrics.describe("model_memory_mb", "Resident memory growth of the process while loading a model")
+
+
+class ModelUnavailable(Exception):
+    """Raised when a model failed to load and the retry interval has not passed yet."""
+
+
+class _Entry:
+    __slots__ = ("lock", "backend", "load_seconds", "memory_mb", "error", "failed_at")
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.backend: Optional[InferenceBackend] = None
+        self.load_seconds = 0.0
+        self.memory_mb = 0.0
+        self.error: Optional[Text] = None
+        self.failed_at = 0.0
+
+
+class ModelRegistry:
+    def __init__(self, retry_after: float = 60.0):
+        self.retry_after = retry_after
+        # keyed by backend, model and draft model: a draft changes what `generate` does
+        self._entries: Dict[Tuple[Text, Text, Optional[Text]], _Entry] = {}
+        self._lock = threading.Lock()
+
+    def _entry(self, backend_name: Text, model_name: Text, draft_model_name: Optional[Text] = None) -> _Entry:
+        with self._lock:
+            return self._entries.setdefault((backend_name, model_name, draft_model_name or None), _Entry())
+
+    def get(self, backend_name: Text, model_name: Text, **kwargs: Any) -> InferenceBackend:
+        """Return the loaded backend, loading it first if needed. Blocks while another thread loads it."""
+        entry = self._entry(backend_name, model_name, kwargs.get("draft_model_name"))
+        if entry.backend is not None:
+            return entry.backend
+        labels = {"backend": backend_name, "model": model_name, "draft_model": kwargs.get("draft_model_name") or ""}
+
+        with entry.lock:
+            if entry.backend is not None:
+                return entry.backend
+            if entry.error and time.monotonic() - entry.failed_at < self.retry_after:
+                raise ModelUnavailable(f"{model_name} failed to load: {entry.error}")
+
+            rss_before = rss_mb()
+            started = time.perf_counter()
+            try:
+                backend = create_backend(backend_name, model_name, **kwargs).load()
+            except Exception as e:
+                entry.error = str(e)
+                entry.failed_at = time.monotonic()
+                metrics.set("model_loaded", 0, **labels)
+                logger.error(f"Error loading model {model_name} ({backend_name}): {e}")
+                raise ModelUnavailable(f"{model_name} failed to load: {e}") from e
+
+            entry.load_seconds = time.perf_counter() - started
+            entry.memory_mb = rss_mb() - rss_before
+            entry.error = None
+            entry.backend = backend
+            metrics.set("model_loaded", 1, **labels)
+            metrics.set("model_load_seconds", entry.load_seconds, **labels)
+            metrics.set("model_memory_mb", entry.memory_mb, **labels)
+            logger.info(
+                f"Model {model_name} loaded with the {backend_name} backend "
+                f"in {entry.load_seconds:.1f}s (+{entry.memory_mb:.0f} MB resident)"
+            )
+            return backend
+
+    def warm_up(self, backend_name: Text, model_name: Text, **kwargs: Any) -> threading.Thread:
+        """Load a model on a background thread; requests arriving meanwhile wait for it."""
+
+        def load() -> None:
+            try:
+                self.get(backend_name, model_name, **kwargs)
+            except ModelUnavailable:
+                pass  # already logged, the next request retries
+
+        thread = threading.Thread(target=load, name=f"warm-up-{model_name}", daemon=True)
+        thread.start()
+        return thread
+
+    def preload(self, backend_name: Text, model_name: Text, **kwargs: Any) -> InferenceBackend:
+        """
+        Load a model before forking worker processes so they share its pages copy-on-write.
+
+        Only useful when the server forks after this call; a server that
+        does not fork loads the same way with `get`.
+        """
+        backend = self.get(backend_name, model_name, **kwargs)
+        # keep the collector of forked children from touching (and so copying) the loaded objects;
+        # frozen objects are never collected, which is fine for weights kept for the process lifetime
+        gc.collect()
+        gc.freeze()
+        return backend
+
+    def is_loaded(self, backend_name: Text, model_name: Text, draft_model_name: Optional[Text] = None, **kwargs: Any) -> bool:
+        return self._entry(backend_name, model_name, draft_model_name).backend is not None
+
+
+model_registry = ModelRegistry(retry_after=settings.MODEL_LOAD_RETRY_SECONDS)
@@ -0,0 +1,158 @@
+# Resilient calls to external services from async actions.
+#
+# Blocking client calls (googleapiclient's `.execute()`) run on a bounded
+# thread pool and are awaited with a deadline, so a slow upstream can no
+# longer hold the action server. Failures are retried with full-jitter
+# exponential backoff, and a circuit breaker stops calling an upstream that
+# keeps failing so callers can fall back to cached or degraded results.
+
+import asyncio
+import logging
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Awaitable, Callable, Iterable, List, Optional, Text
+
+from .instrumentation import in_context
+
+logger = logging.getLogger(__name__)
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling an upstream whose circuit breaker is open."""
+
+
+class CircuitBreaker:
+    """
+    Classic three-state breaker.
+
+    closed:    calls go through; `failure_threshold` consecutive failures open it
+    open:      calls are rejected until `reset_timeout` seconds have passed
+    half-open: one trial call goes through; success closes, failure re-opens,
+               a trial that ends without either (cancelled) is released
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half-open"
+
+    def __init__(self, name: Text, failure_threshold: int = 5, reset_timeout: float = 30.0):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self._trial_running = False
+        self._lock = threading.Lock()
+
+    def allow(self) -> bool:
+        with self._lock:
+            if self.state == self.CLOSED:
+                return True
+            if self.state == self.OPEN and time.monotonic() - self.opened_at >= self.reset_timeout:
+                self.state = self.HALF_OPEN
+                self._trial_running = False
+            if self.state == self.HALF_OPEN and not self._trial_running:
+                self._trial_running = True
+                return True
+            return False
+
+    def record_success(self) -> None:
+        with self._lock:
+            if self.state != self.CLOSED:
+                logger.info(f"Circuit {self.name} closed")
+            self.state = self.CLOSED
+            self.failures = 0
+            self._trial_running = False
+
+    def release(self) -> None:
+        """Let another call be the half-open trial, e.g. after the trial was cancelled."""
+        with self._lock:
+            self._trial_running = False
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self.failures += 1
+            if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+                if self.state != self.OPEN:
+                    logger.warning(f"Circuit {self.name} opened after {self.failures} failure(s)")
+                self.state = self.OPEN
+                self.opened_at = time.monotonic()
+                self._trial_running = False
+
+
+class ResilientFetcher:
+    def __init__(
+        self,
+        name: Text,
+        max_concurrency: int = 8,
+        timeout: float = 5.0,
+        retries: int = 2,
+        backoff_base: float = 0.25,
+        backoff_max: float = 2.0,
+        breaker: Optional[CircuitBreaker] = None,
+        # transport errors, 5xx and rate limits: retried, and counted by the circuit breaker
+        is_retryable: Callable[[Exception], bool] = lambda e: True,
+    ):
+        self.name = name
+        self.timeout = timeout
+        self.retries = retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.breaker = breaker or CircuitBreaker(name)
+        self.is_retryable = is_retryable
+        self._executor = ThreadPoolExecutor(max_workers=max_concurrency, thread_name_prefix=f"{name}-fetch")
+        # created lazily: the semaphore must belong to the action server's event loop
+        self._max_concurrency = max_concurrency
+        self._semaphore: Optional[asyncio.Semaphore] = None
+
+    def _backoff(self, attempt: int) -> float:
+        # "full jitter": anywhere between 0 and the exponential cap
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * (2 ** attempt)))
+
+    async def call(self, fn: Callable[..., Any], *args: Any, timeout: Optional[float] = None, **kwargs: Any) -> Any:
+        """Run the blocking `fn(*args, **kwargs)` with a deadline, retries and the circuit breaker."""
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self._max_concurrency)
+        if not self.breaker.allow():
+            raise CircuitOpenError(f"{self.name} is unavailable, circuit open")
+
+        # the call that moved the breaker to half-open is its trial
+        trial = self.breaker.state == CircuitBreaker.HALF_OPEN
+
+        loop = asyncio.get_running_loop()
+        deadline = timeout if timeout is not None else self.timeout
+        recorded = False
+        try:
+            async with self._semaphore:
+                for attempt in range(self.retries + 1):
+                    try:
+                        result = await asyncio.wait_for(
+                            loop.run_in_executor(self._executor, in_context(fn, *args, **kwargs)),
+                            timeout=deadline,
+                        )
+                    except Exception as e:
+                        retryable = self.is_retryable(e)
+                        if attempt == self.retries or not retryable:
+                            # only upstream trouble counts against the circuit, not e.g. a bad key or request
+                            if retryable:
+                                self.breaker.record_failure()
+                                recorded = True
+                            raise
+                        delay = self._backoff(attempt)
+                        logger.warning(f"{self.name} call failed ({e!r}), retry {attempt + 1} in {delay:.2f}s")
+                        await asyncio.sleep(delay)
+                    else:
+                        self.breaker.record_success()
+                        recorded = True
+                        return result
+        finally:
+            # a cancelled or caller-error trial must not leave the breaker rejecting every call
+            if trial and not recorded:
+                self.breaker.release()
+
+    async def gather(self, calls: Iterable[Callable[[], Awaitable[Any]]]) -> List[Any]:
+        """Fan out several `call`s concurrently; failed calls come back as exceptions."""
+        return await asyncio.gather(*(make_call() for make_call in calls), return_exceptions=True)
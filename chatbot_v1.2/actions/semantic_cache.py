@@ -0,0 +1,187 @@
+# Semantic cache for generated explanations.
+#
+# The exact cache only helps when two learners type the same topic.
+# "what is ML" and "explain machine learning" should share an answer too,
+# so topics are embedded with a small sentence-embedding model and
+# compared against the topics we already generated content for. When the
+# best match is similar enough, its content is served instead of running
+# the generation model again.
+#
+# The index is a preallocated NumPy matrix of unit vectors searched by
+# brute force: a few thousand 384-dimensional rows take well under a
+# millisecond to scan, far less than the embedding itself.
+
+import logging
+import threading
+import time
+from typing import Any, Dict, List, Optional, Text
+
+from .cache import TTLCache, normalize_topic
+
+logger = logging.getLogger(__name__)
+
+
+class SentenceEmbedder:
+    """
+    Mean-pooled sentence embeddings from a Hugging Face encoder.
+
+    Uses plain `transformers` (already needed for generation), so no extra
+    dependency is required. The model is loaded on first use.
+    """
+
+    def __init__(self, model_name: Text, max_length: int = 64):
+        self.model_name = model_name
+        self.max_length = max_length
+        self.tokenizer = None
+        self.model = None
+        # fast tokenizers are not safe to share between threads, so embedding is serialized
+        self._lock = threading.RLock()
+
+    def load(self) -> "SentenceEmbedder":
+        with self._lock:
+            if self.model is None:
+                from transformers import AutoModel, AutoTokenizer
+
+                started = time.perf_counter()
+                self.tokenizer = AutoTokenizer.from_pretrained(self.model_name)
+                self.model = AutoModel.from_pretrained(self.model_name).eval()
+                logger.info(f"Embedding model {self.model_name} loaded in {time.perf_counter() - started:.1f}s")
+        return self
+
+    def embed(self, texts: List[Text]):
+        import numpy as np
+        import torch
+
+        with self._lock:
+            if self.model is None:
+                self.load()
+            inputs = self.tokenizer(
+                texts,
+                return_tensors="pt",
+                padding=True,
+                max_length=self.max_length,
+                truncation=True,
+            )
+            with torch.inference_mode():
+                hidden = self.model(**inputs).last_hidden_state
+        mask = inputs.attention_mask.unsqueeze(-1).to(hidden.dtype)
+        pooled = (hidden * mask).sum(dim=1) / mask.sum(dim=1).clamp(min=1e-9)
+        vectors = pooled.numpy().astype(np.float32)
+        return vectors / np.maximum(np.linalg.norm(vectors, axis=1, keepdims=True), 1e-12)
+
+
+class SemanticCache:
+    """
+    Nearest-neighbour cache keyed by topic meaning.
+
+    `context` identifies everything besides the topic that shapes the
+    answer (prompt template, generation parameters, model), so answers are
+    only reused between requests that would have been generated the same
+    way. Full slots are recycled least-recently-used first; entries older
+    than `ttl` are never served.
+    """
+
+    def __init__(
+        self,
+        embedder: SentenceEmbedder,
+        threshold: float = 0.85,
+        max_entries: int = 2048,
+        ttl: float = 7 * 24 * 3600.0,
+        log_every: int = 100,
+    ):
+        self.embedder = embedder
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.log_every = log_every
+        # embeddings of recent topics, so `add` after a `lookup` does not embed twice
+        self._embeddings = TTLCache(max_entries=256, ttl=600.0)
+        self._vectors = None  # (max_entries, dim) float32, allocated on the first add
+        self._contexts: List[Optional[Text]] = [None] * max_entries
+        self._topics: List[Optional[Text]] = [None] * max_entries
+        self._values: List[Optional[Text]] = [None] * max_entries
+        self._created_at = [0.0] * max_entries
+        self._last_used = [0.0] * max_entries
+        self._slots: Dict[Any, int] = {}  # (context, normalized topic) -> row
+        self._size = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def embedding(self, topic: Text):
+        key = normalize_topic(topic)
+        vector = self._embeddings.get(key)
+        if vector is None:
+            vector = self.embedder.embed([key])[0]
+            self._embeddings.set(key, vector)
+        return vector
+
+    def lookup(self, topic: Text, context: Text) -> Optional[Text]:
+        """Return the content cached for the most similar topic, or None below the threshold."""
+        import numpy as np
+
+        vector = self.embedding(topic)
+        now = time.monotonic()
+        match = None
+        with self._lock:
+            if self._size:
+                scores = self._vectors[:self._size] @ vector
+                for row in np.argsort(scores)[::-1]:
+                    if scores[row] < self.threshold:
+                        break
+                    if self._contexts[row] == context and now - self._created_at[row] <= self.ttl:
+                        self._last_used[row] = now
+                        match = (self._topics[row], self._values[row], float(scores[row]))
+                        break
+            if match is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+            lookups = self.hits + self.misses
+
+        if match is not None:
+            logger.info(f"Semantic cache hit: '{topic}' matched '{match[0]}' (similarity {match[2]:.3f})")
+        if self.log_every and lookups % self.log_every == 0:
+            logger.info(f"Semantic cache stats: {self.stats()}")
+        return match[1] if match is not None else None
+
+    def add(self, topic: Text, context: Text, value: Text) -> None:
+        import numpy as np
+
+        vector = self.embedding(topic)
+        key = (context, normalize_topic(topic))
+        now = time.monotonic()
+        with self._lock:
+            if self._vectors is None:
+                self._vectors = np.zeros((self.max_entries, vector.shape[0]), dtype=np.float32)
+
+            row = self._slots.get(key)
+            if row is None:
+                if self._size < self.max_entries:
+                    row = self._size
+                    self._size += 1
+                else:
+                    # evict the least recently used entry
+                    row = min(range(self.max_entries), key=self._last_used.__getitem__)
+                    del self._slots[(self._contexts[row], normalize_topic(self._topics[row]))]
+                self._slots[key] = row
+
+            self._vectors[row] = vector
+            self._contexts[row] = context
+            self._topics[row] = topic
+            self._values[row] = value
+            self._created_at[row] = now
+            self._last_used[row] = now
+
+    def __len__(self) -> int:
+        return self._size
+
+    def stats(self) -> Dict[Text, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+                "entries": self._size,
+            }
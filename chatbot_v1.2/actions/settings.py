@@ -0,0 +1,102 @@
+# Runtime settings for the action server.
+#
+# Every knob can be overridden through an environment variable so the same
+# code runs unchanged on a laptop and on the CPU-only serving nodes.
+
+import os
+from typing import Optional, Text
+
+
+def env_str(name: Text, default: Optional[Text] = None) -> Optional[Text]:
+    value = os.environ.get(name)
+    return value if value not in (None, "") else default
+
+
+def env_int(name: Text, default: int) -> int:
+    value = os.environ.get(name)
+    return int(value) if value not in (None, "") else default
+
+
+def env_float(name: Text, default: float) -> float:
+    value = os.environ.get(name)
+    return float(value) if value not in (None, "") else default
+
+
+def env_bool(name: Text, default: bool) -> bool:
+    value = os.environ.get(name)
+    if value in (None, ""):
+        return default
+    return value.strip().lower() in ("1", "true", "yes", "on")
+
+
+# Model and inference backend ("torch", "torch-int8" or "onnx")
+GENERATION_MODEL = env_str("GENERATION_MODEL", "google/flan-t5-large")
+GENERATION_BACKEND = env_str("GENERATION_BACKEND", "torch")
+ONNX_EXPORT_DIR = env_str("ONNX_EXPORT_DIR", ".cache/onnx")
+# small model sharing the tokenizer for assisted (speculative) generation, e.g. google/flan-t5-small
+GENERATION_DRAFT_MODEL = env_str("GENERATION_DRAFT_MODEL")
+# "lazy" loads on the first content request, "background" right after start-up,
+# "eager" before the server starts (use it when forking workers so they share the weights)
+MODEL_LOAD_MODE = env_str("MODEL_LOAD_MODE", "background")
+MODEL_LOAD_RETRY_SECONDS = env_float("MODEL_LOAD_RETRY_SECONDS", 60.0)
+
+# Generation cache
+GENERATION_CACHE_ENABLED = env_bool("GENERATION_CACHE_ENABLED", True)
+GENERATION_CACHE_SIZE = env_int("GENERATION_CACHE_SIZE", 1024)          # in-memory entries
+GENERATION_CACHE_TTL = env_float("GENERATION_CACHE_TTL", 3600.0)        # seconds
+GENERATION_CACHE_PATH = env_str("GENERATION_CACHE_PATH", ".cache/generation_cache.sqlite3")
+GENERATION_CACHE_DISK_TTL = env_float("GENERATION_CACHE_DISK_TTL", 7 * 24 * 3600.0)
+GENERATION_CACHE_LOG_EVERY = env_int("GENERATION_CACHE_LOG_EVERY", 100)  # lookups between stats logs
+
+# Semantic cache: reuse answers for differently worded topics. Off by default:
+# it downloads and runs a sentence-embedding model next to the generator.
+SEMANTIC_CACHE_ENABLED = env_bool("SEMANTIC_CACHE_ENABLED", False)
+SEMANTIC_CACHE_MODEL = env_str("SEMANTIC_CACHE_MODEL", "sentence-transformers/all-MiniLM-L6-v2")
+SEMANTIC_CACHE_THRESHOLD = env_float("SEMANTIC_CACHE_THRESHOLD", 0.85)  # cosine similarity to reuse an answer
+SEMANTIC_CACHE_SIZE = env_int("SEMANTIC_CACHE_SIZE", 2048)              # topics kept in the index
+SEMANTIC_CACHE_TTL = env_float("SEMANTIC_CACHE_TTL", 7 * 24 * 3600.0)   # seconds
+
+# Precomputed answers, built with `python -m scripts.build_knowledge_base`
+KNOWLEDGE_BASE_PATH = env_str("KNOWLEDGE_BASE_PATH", ".cache/knowledge_base.edkb")
+
+# Topics we decline to explain (blocklist/allowlist, reloaded when the file changes)
+TOPIC_POLICY_PATH = env_str("TOPIC_POLICY_PATH", os.path.join(os.path.dirname(os.path.abspath(__file__)), "topic_policy.yml"))
+TOPIC_POLICY_RELOAD_SECONDS = env_float("TOPIC_POLICY_RELOAD_SECONDS", 5.0)  # how often the file is checked
+
+# Decoding profile ("fast", "balanced" or "quality") when the learner context is unknown
+GENERATION_DEFAULT_PROFILE = env_str("GENERATION_DEFAULT_PROFILE", "balanced")
+
+# Micro-batching of generate() calls
+GENERATION_BATCH_MAX_SIZE = env_int("GENERATION_BATCH_MAX_SIZE", 8)
+GENERATION_BATCH_MAX_WAIT_MS = env_float("GENERATION_BATCH_MAX_WAIT_MS", 30.0)  # collection window
+
+# Inference worker pool
+GENERATION_WORKERS = env_int("GENERATION_WORKERS", 1)                # threads running generate()
+GENERATION_MAX_QUEUE_DEPTH = env_int("GENERATION_MAX_QUEUE_DEPTH", 32)  # beyond this, answer "busy"
+GENERATION_TIMEOUT = env_float("GENERATION_TIMEOUT", 120.0)           # seconds a request may wait
+
+# Token streaming to the Streamlit app (REST channel only). Streamed requests
+# are generated one at a time and bypass micro-batching, so streaming trades
+# throughput under load for time to first token.
+STREAMING_ENABLED = env_bool("STREAMING_ENABLED", False)
+STREAM_SERVER_HOST = env_str("STREAM_SERVER_HOST", "0.0.0.0")
+STREAM_SERVER_PORT = env_int("STREAM_SERVER_PORT", 5056)
+STREAM_PUBLIC_URL = env_str("STREAM_PUBLIC_URL", f"http://localhost:{STREAM_SERVER_PORT}")
+STREAM_TTL = env_float("STREAM_TTL", 600.0)                  # seconds a finished stream can be replayed
+STREAM_IDLE_TIMEOUT = env_float("STREAM_IDLE_TIMEOUT", 120.0)  # seconds without tokens before giving up
+
+# Instrumentation: Prometheus metrics on the side server's /metrics route
+METRICS_ENABLED = env_bool("METRICS_ENABLED", True)
+METRICS_LOG_REQUESTS = env_bool("METRICS_LOG_REQUESTS", False)  # one JSON log line per action run
+
+# YouTube Data API
+YOUTUBE_API_KEY = env_str("YOUTUBE_API_KEY", "YOUR_API_KEY")
+YOUTUBE_API_ROOT = env_str("YOUTUBE_API_ROOT")                   # e.g. http://localhost:8089/youtube/v3/
+YOUTUBE_CACHE_SIZE = env_int("YOUTUBE_CACHE_SIZE", 512)          # topics kept in memory
+YOUTUBE_CACHE_TTL = env_float("YOUTUBE_CACHE_TTL", 6 * 3600.0)   # seconds
+YOUTUBE_TIMEOUT = env_float("YOUTUBE_TIMEOUT", 5.0)                # deadline per API call, seconds
+YOUTUBE_MAX_CONCURRENCY = env_int("YOUTUBE_MAX_CONCURRENCY", 8)     # API calls in flight
+YOUTUBE_RETRIES = env_int("YOUTUBE_RETRIES", 2)
+YOUTUBE_BACKOFF_BASE = env_float("YOUTUBE_BACKOFF_BASE", 0.25)      # seconds, doubled per retry
+YOUTUBE_BREAKER_THRESHOLD = env_int("YOUTUBE_BREAKER_THRESHOLD", 5)  # consecutive failures that open it
+YOUTUBE_BREAKER_RESET = env_float("YOUTUBE_BREAKER_RESET", 30.0)     # seconds before a trial call
@@ -0,0 +1,119 @@
+# Token streams shared between the generation workers and HTTP readers.
+#
+# A worker thread appends decoded text to a TokenStream as the model
+# produces it; the streaming endpoint replays everything appended so far
+# and then follows new text until the stream is closed. Readers may connect
+# late (after the action has already returned) without losing text.
+
+import logging
+import threading
+import time
+import uuid
+from typing import Dict, Iterator, List, Optional, Text
+
+logger = logging.getLogger(__name__)
+
+
+class TokenStream:
+    def __init__(self, stream_id: Text):
+        self.id = stream_id
+        self.created_at = time.monotonic()
+        self.first_token_at: Optional[float] = None
+        self.error: Optional[Text] = None
+        self._chunks: List[Text] = []
+        self._closed = False
+        self._condition = threading.Condition()
+
+    @property
+    def closed(self) -> bool:
+        return self._closed
+
+    def put(self, text: Text) -> None:
+        if not text:
+            return
+        with self._condition:
+            if self.first_token_at is None:
+                self.first_token_at = time.monotonic()
+            self._chunks.append(text)
+            self._condition.notify_all()
+
+    def close(self, error: Optional[Text] = None) -> None:
+        with self._condition:
+            self.error = error
+            self._closed = True
+            self._condition.notify_all()
+
+    def text(self) -> Text:
+        with self._condition:
+            return "".join(self._chunks)
+
+    def iter_chunks(self, timeout: Optional[float] = None) -> Iterator[Text]:
+        """Yield chunks from the start of the stream until it is closed or `timeout` passes without new text."""
+        position = 0
+        while True:
+            with self._condition:
+                self._condition.wait_for(lambda: position < len(self._chunks) or self._closed, timeout)
+                chunks = self._chunks[position:]
+            if not chunks:
+                # closed, or nothing arrived within the timeout
+                return
+            position += len(chunks)
+            for chunk in chunks:
+                yield chunk
+
+    def time_to_first_token(self) -> Optional[float]:
+        if self.first_token_at is None:
+            return None
+        return self.first_token_at - self.created_at
+
+
+class StreamRegistry:
+    """Keeps recent streams addressable by id and forgets them after `ttl` seconds."""
+
+    def __init__(self, ttl: float = 600.0):
+        self.ttl = ttl
+        self._streams: Dict[Text, TokenStream] = {}
+        self._lock = threading.Lock()
+
+    def create(self) -> TokenStream:
+        stream = TokenStream(uuid.uuid4().hex)
+        with self._lock:
+            self._expire()
+            self._streams[stream.id] = stream
+        return stream
+
+    def discard(self, stream_id: Text) -> None:
+        with self._lock:
+            self._streams.pop(stream_id, None)
+
+    def get(self, stream_id: Text) -> Optional[TokenStream]:
+        with self._lock:
+            return self._streams.get(stream_id)
+
+    def _expire(self) -> None:
+        cutoff = time.monotonic() - self.ttl
+        expired = [key for key, stream in self._streams.items() if stream.created_at < cutoff]
+        for key in expired:
+            del self._streams[key]
+
+
+def stream_route(registry: StreamRegistry, idle_timeout: float):
+    """HTTP handler streaming `/stream/<id>` as plain text until generation finishes."""
+
+    def handle(request, stream_id: Text) -> None:
+        stream = registry.get(stream_id)
+        if stream is None:
+            request.send_error(404, "Unknown or expired stream")
+            return
+        request.send_response(200)
+        request.send_header("Content-Type", "text/plain; charset=utf-8")
+        request.send_header("Cache-Control", "no-cache")
+        request.send_header("X-Accel-Buffering", "no")
+        request.end_headers()
+        # HTTP/1.0 without Content-Length: closing the connection ends the body
+        for chunk in stream.iter_chunks(timeout=idle_timeout):
+            request.wfile.write(chunk.encode("utf-8"))
+            request.wfile.flush()
+        request.close_connection = True
+
+    return handle
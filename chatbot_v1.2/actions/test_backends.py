@@ -0,0 +1,58 @@
+from types import SimpleNamespace
+
+import pytest
+
+from actions.backends import InferenceBackend, OnnxBackend, TorchBackend, TorchInt8Backend, create_backend
+
+
+def test_create_backend_picks_the_class_and_its_arguments():
+    torch_backend = create_backend("torch", "flan-t5", export_dir=".cache/onnx", draft_model_name="flan-t5-small")
+    assert type(torch_backend) is TorchBackend
+    assert torch_backend.draft_model_name == "flan-t5-small"
+    assert type(create_backend("torch-int8", "flan-t5", export_dir=".cache/onnx")) is TorchInt8Backend
+
+    onnx_backend = create_backend("onnx", "flan-t5", export_dir=".cache/onnx", draft_model_name="flan-t5-small")
+    assert type(onnx_backend) is OnnxBackend
+    assert onnx_backend.export_dir == ".cache/onnx"
+
+
+def test_unknown_backend():
+    with pytest.raises(ValueError):
+        create_backend("tensorrt", "flan-t5")
+
+
+def test_draft_model_assists_single_sequence_decoding_only():
+    backend = TorchBackend("flan-t5", draft_model_name="flan-t5-small")
+    backend.draft_model = draft = object()
+    assert backend.assisted(1, {"num_beams": 1})["assistant_model"] is draft
+    assert backend.assisted(1, {"do_sample": True})["assistant_model"] is draft
+    assert "assistant_model" not in backend.assisted(2, {"num_beams": 1})
+    assert "assistant_model" not in backend.assisted(1, {"num_beams": 5})
+    assert "assistant_model" not in TorchBackend("flan-t5").assisted(1, {"num_beams": 1})
+
+
+class FakeTokenizer:
+    def __call__(self, prompts, **kwargs):
+        return SimpleNamespace(input_ids=[prompt.split() for prompt in prompts], attention_mask=None)
+
+    def batch_decode(self, outputs, skip_special_tokens):
+        return [" ".join(reversed(ids)) for ids in outputs]
+
+
+class FakeModel:
+    def __init__(self):
+        self.params = None
+
+    def generate(self, input_ids, attention_mask, **params):
+        self.params = params
+        return input_ids
+
+
+def test_generate_decodes_one_text_per_prompt():
+    backend = InferenceBackend("fake")
+    backend.tokenizer = FakeTokenizer()
+    backend.model = FakeModel()
+    assert backend.generate(["explain machine learning", "hello"], {"max_length": 8}) == [
+        "learning machine explain", "hello",
+    ]
+    assert backend.model.params == {"max_length": 8}
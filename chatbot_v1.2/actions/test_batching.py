@@ -0,0 +1,87 @@
+import threading
+
+import pytest
+
+from actions.batching import BatchGenerator, GenerationQueueFull
+
+
+class FakeBackend:
+    """Echoes prompts and records every batch; can hold the worker until released."""
+
+    def __init__(self, hold: bool = False):
+        self.calls = []
+        self.started = threading.Event()
+        self.release = threading.Event()
+        if not hold:
+            self.release.set()
+
+    def generate(self, prompts, params):
+        self.calls.append((list(prompts), params))
+        self.started.set()
+        self.release.wait(5)
+        return [f"{prompt}:{params['num_beams']}" for prompt in prompts]
+
+
+@pytest.fixture
+def make_batcher():
+    batchers = []
+
+    def make(backend, **kwargs):
+        batcher = BatchGenerator(lambda: backend, **kwargs)
+        batchers.append((batcher, backend))
+        return batcher
+
+    yield make
+    for batcher, backend in batchers:
+        backend.release.set()
+        batcher.close()
+
+
+def test_full_queue_rejects_at_once(make_batcher):
+    backend = FakeBackend(hold=True)
+    batcher = make_batcher(backend, max_batch_size=1, max_wait_ms=0, max_queue_depth=1)
+    running = batcher.submit("a", {"num_beams": 1})
+    assert backend.started.wait(5)
+    queued = batcher.submit("b", {"num_beams": 1})
+    with pytest.raises(GenerationQueueFull):
+        batcher.submit("c", {"num_beams": 1})
+
+    backend.release.set()
+    assert running.result(5) == "a:1"
+    assert queued.result(5) == "b:1"
+
+
+def test_requests_are_grouped_by_generation_params(make_batcher):
+    backend = FakeBackend()
+    batcher = make_batcher(backend, max_batch_size=4, max_wait_ms=1000)
+    futures = [
+        batcher.submit("a", {"num_beams": 1}),
+        batcher.submit("b", {"num_beams": 4}),
+        batcher.submit("c", {"num_beams": 1}),
+        batcher.submit("d", {"num_beams": 4}),
+    ]
+    assert [future.result(5) for future in futures] == ["a:1", "b:4", "c:1", "d:4"]
+    assert sorted(backend.calls, key=lambda call: call[1]["num_beams"]) == [
+        (["a", "c"], {"num_beams": 1}),
+        (["b", "d"], {"num_beams": 4}),
+    ]
+
+
+def test_identical_prompts_are_generated_once(make_batcher):
+    backend = FakeBackend()
+    batcher = make_batcher(backend, max_batch_size=3, max_wait_ms=1000)
+    futures = [batcher.submit(prompt, {"num_beams": 2}) for prompt in ("a", "a", "b")]
+    assert [future.result(5) for future in futures] == ["a:2", "a:2", "b:2"]
+    assert backend.calls == [(["a", "b"], {"num_beams": 2})]
+
+
+def test_backend_errors_reach_every_caller(make_batcher):
+    class FailingBackend(FakeBackend):
+        def generate(self, prompts, params):
+            raise RuntimeError("out of memory")
+
+    batcher = make_batcher(FailingBackend(), max_batch_size=2, max_wait_ms=1000)
+    futures = [batcher.submit(prompt, {"num_beams": 1}) for prompt in ("a", "b")]
+    for future in futures:
+        with pytest.raises(RuntimeError):
+            future.result(5)
@@ -0,0 +1,89 @@
+import time
+
+from actions.cache import GenerationCache, SQLiteCache, TTLCache, make_cache_key, normalize_topic
+
+
+class Clock:
+    def __init__(self, now: float = 1000.0):
+        self.now = now
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def test_normalize_topic_ignores_case_spacing_and_punctuation():
+    assert normalize_topic("  Machine   Learning? ") == "machine learning"
+
+
+def test_cache_key_shared_by_equivalent_topics():
+    params = {"max_length": 256, "num_beams": 4}
+    assert make_cache_key("Machine Learning", "Explain {topic}", params) == make_cache_key(
+        "machine  learning!", "Explain {topic}", dict(reversed(params.items()))
+    )
+
+
+def test_cache_key_changes_with_prompt_and_params():
+    key = make_cache_key("ml", "Explain {topic}", {"num_beams": 4})
+    assert key != make_cache_key("ml", "Describe {topic}", {"num_beams": 4})
+    assert key != make_cache_key("ml", "Explain {topic}", {"num_beams": 1})
+
+
+def test_ttl_cache_expires_but_serves_stale(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(time, "monotonic", clock)
+    cache = TTLCache(ttl=10)
+    cache.set("a", 1)
+    clock.now += 5
+    assert cache.get("a") == 1
+    clock.now += 10
+    assert cache.get("a") is None
+    assert cache.get("a", allow_stale=True) == 1
+
+
+def test_ttl_cache_evicts_least_recently_used():
+    cache = TTLCache(max_entries=2)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")
+    cache.set("c", 3)
+    assert cache.get("b") is None
+    assert cache.get("a") == 1 and cache.get("c") == 3
+    assert len(cache) == 2
+
+
+def test_sqlite_cache_round_trip_and_purge(tmp_path, monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(time, "time", clock)
+    cache = SQLiteCache(str(tmp_path / "cache" / "generation.sqlite3"), ttl=60)
+    cache.set("a", "explanation", cost=1.5)
+    assert cache.get("a") == ("explanation", 1.5)
+    assert cache.get("missing") is None
+
+    clock.now += 61
+    assert cache.get("a") is None
+    assert cache.purge_expired() == 1
+    cache.close()
+
+
+def test_sqlite_cache_survives_reopening(tmp_path):
+    path = str(tmp_path / "generation.sqlite3")
+    cache = SQLiteCache(path)
+    cache.set("a", "explanation")
+    cache.close()
+    reopened = SQLiteCache(path)
+    assert reopened.get("a") == ("explanation", 0.0)
+    reopened.close()
+
+
+def test_generation_cache_promotes_disk_hits_and_counts_saved_time(tmp_path):
+    path = str(tmp_path / "generation.sqlite3")
+    GenerationCache(disk_path=path).set("a", "explanation", cost=2.0)
+
+    cache = GenerationCache(disk_path=path, log_every=0)
+    assert cache.get("a") == "explanation"
+    assert cache.get("a") == "explanation"
+    assert cache.get("b") is None
+    stats = cache.stats()
+    assert (stats["disk_hits"], stats["memory_hits"], stats["misses"]) == (1, 1, 1)
+    assert stats["saved_seconds"] == 4.0
+    assert stats["memory_entries"] == 1
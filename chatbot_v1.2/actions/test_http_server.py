@@ -0,0 +1,64 @@
+import threading
+import time
+import urllib.error
+import urllib.request
+
+import pytest
+
+from actions.http_server import register_route, start_http_server
+from actions.streaming import StreamRegistry, stream_route
+
+
+@pytest.fixture(scope="module")
+def base_url():
+    server = start_http_server("127.0.0.1", 0)
+    assert start_http_server("127.0.0.1", 0) is server
+    return f"http://127.0.0.1:{server.server_address[1]}"
+
+
+def get(url):
+    with urllib.request.urlopen(url, timeout=5) as response:
+        return response.status, response.read().decode("utf-8")
+
+
+def text_route(body):
+    def handle(request, remainder):
+        payload = f"{body}:{remainder}".encode("utf-8")
+        request.send_response(200)
+        request.send_header("Content-Length", str(len(payload)))
+        request.end_headers()
+        request.wfile.write(payload)
+
+    return handle
+
+
+def test_longest_prefix_wins(base_url):
+    register_route("/test/", text_route("short"))
+    register_route("/test/long/", text_route("long"))
+    assert get(f"{base_url}/test/long/x?query=1") == (200, "long:x")
+    assert get(f"{base_url}/test/other") == (200, "short:other")
+
+
+def test_unknown_path_is_404(base_url):
+    with pytest.raises(urllib.error.HTTPError) as error:
+        get(f"{base_url}/nothing-here")
+    assert error.value.code == 404
+
+
+def test_stream_route_follows_a_stream_to_its_end(base_url):
+    streams = StreamRegistry()
+    register_route("/test-stream/", stream_route(streams, idle_timeout=5))
+    stream = streams.create()
+    stream.put("Machine ")
+
+    def finish():
+        time.sleep(0.1)
+        stream.put("learning")
+        stream.close()
+
+    threading.Thread(target=finish).start()
+    assert get(f"{base_url}/test-stream/{stream.id}") == (200, "Machine learning")
+
+    with pytest.raises(urllib.error.HTTPError) as error:
+        get(f"{base_url}/test-stream/unknown")
+    assert error.value.code == 404
@@ -0,0 +1,118 @@
+import asyncio
+import json
+import logging
+from types import SimpleNamespace
+
+import pytest
+
+from actions import settings
+from actions.batching import BatchGenerator
+from actions.instrumentation import MetricsRegistry, count, in_context, instrumented, span
+
+
+@pytest.fixture(autouse=True)
+def logged_requests(monkeypatch, caplog):
+    monkeypatch.setattr(settings, "METRICS_ENABLED", True)
+    monkeypatch.setattr(settings, "METRICS_LOG_REQUESTS", True)
+    caplog.set_level(logging.INFO, logger="actions.instrumentation")
+
+    def requests():
+        return [
+            json.loads(record.getMessage()) for record in caplog.records
+            if record.name == "actions.instrumentation"
+        ]
+
+    return requests
+
+
+def run_action(run):
+    wrapped = instrumented("test_action")(run)
+    tracker = SimpleNamespace(sender_id="learner-1")
+    return asyncio.run(wrapped(None, None, tracker, None))
+
+
+def test_render_counters_gauges_and_histograms():
+    registry = MetricsRegistry()
+    registry.describe("events_total", "Events")
+    registry.inc("events_total", event="cache", result="hit")
+    registry.inc("events_total", event="cache", result="hit")
+    registry.set("model_loaded", 1, model='flan "t5"')
+    registry.observe("span_seconds", 0.02, buckets=(0.01, 0.1), span="filter")
+    lines = registry.render().splitlines()
+    assert "# HELP learning_sarthi_events_total Events" in lines
+    assert 'learning_sarthi_events_total{event="cache",result="hit"} 2' in lines
+    assert "# TYPE learning_sarthi_model_loaded gauge" in lines
+    assert 'learning_sarthi_model_loaded{model="flan \\"t5\\""} 1' in lines
+    assert 'learning_sarthi_span_seconds_bucket{span="filter",le="0.01"} 0' in lines
+    assert 'learning_sarthi_span_seconds_bucket{span="filter",le="0.1"} 1' in lines
+    assert 'learning_sarthi_span_seconds_bucket{span="filter",le="+Inf"} 1' in lines
+    assert 'learning_sarthi_span_seconds_count{span="filter"} 1' in lines
+
+
+def test_request_log_has_its_spans_and_events(logged_requests):
+    async def run(self, dispatcher, tracker, domain):
+        with span("filter"):
+            count("cache", cache="exact", result="miss")
+        return []
+
+    assert run_action(run) == []
+    [request] = logged_requests()
+    assert request["action"] == "test_action" and request["sender_id"] == "learner-1"
+    assert [record["span"] for record in request["spans"]] == ["filter"]
+    assert request["events"] == [{"cache": "exact", "result": "miss", "event": "cache"}]
+
+
+def test_executor_jobs_record_into_the_request(logged_requests):
+    def lookup():
+        with span("cache_lookup_inner"):
+            count("cache", cache="disk", result="hit")
+
+    async def run(self, dispatcher, tracker, domain):
+        await asyncio.get_running_loop().run_in_executor(None, in_context(lookup))
+        return []
+
+    run_action(run)
+    [request] = logged_requests()
+    assert [record["span"] for record in request["spans"]] == ["cache_lookup_inner"]
+    assert request["events"][0]["cache"] == "disk"
+
+
+def test_batched_generation_spans_reach_every_request(logged_requests):
+    class Backend:
+        def generate(self, prompts, params):
+            with span("generate", backend="fake"):
+                return [prompt.upper() for prompt in prompts]
+
+    batcher = BatchGenerator(lambda: Backend(), max_batch_size=2, max_wait_ms=1000)
+
+    async def run(self, dispatcher, tracker, domain):
+        return await asyncio.wrap_future(batcher.submit(tracker.prompt, {}))
+
+    async def two_requests():
+        wrapped = instrumented("test_action")(run)
+        return await asyncio.gather(*(
+            wrapped(None, None, SimpleNamespace(sender_id=name, prompt=name), None) for name in ("a", "b")
+        ))
+
+    try:
+        assert asyncio.run(two_requests()) == ["A", "B"]
+    finally:
+        batcher.close()
+    requests = logged_requests()
+    assert sorted(request["sender_id"] for request in requests) == ["a", "b"]
+    for request in requests:
+        assert request["spans"] == [
+            {"backend": "fake", "span": "generate", "seconds": request["spans"][0]["seconds"], "batch_size": 2}
+        ]
+
+
+def test_disabled_metrics_record_nothing(monkeypatch, logged_requests):
+    monkeypatch.setattr(settings, "METRICS_ENABLED", False)
+
+    async def run(self, dispatcher, tracker, domain):
+        with span("filter"):
+            count("topic_rejected")
+        return []
+
+    run_action(run)
+    assert logged_requests() == []
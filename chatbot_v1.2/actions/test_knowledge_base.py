@@ -0,0 +1,83 @@
+import struct
+
+import pytest
+
+from actions.knowledge_base import (
+    MAGIC,
+    VERSION,
+    KnowledgeBase,
+    _ENTRY,
+    _HEADER,
+    knowledge_base_context,
+    topic_hash,
+    write_knowledge_base,
+)
+
+CONTEXT = knowledge_base_context("Explain {topic}", "google/flan-t5-large")
+
+ENTRIES = {
+    "Machine Learning": "Machine learning lets computers learn from data.",
+    "devops": "DevOps joins development and operations.",
+    "Photosynthesis": "Plants turn light into chemical energy.",
+    "Quantum computing": "Qubits can hold superpositions — ünïcödé too.",
+}
+
+
+@pytest.fixture
+def store(tmp_path):
+    path = str(tmp_path / "kb" / "knowledge_base.bin")
+    assert write_knowledge_base(path, ENTRIES, CONTEXT) == len(ENTRIES)
+    knowledge_base = KnowledgeBase.open(path, CONTEXT)
+    yield path, knowledge_base
+    knowledge_base.close()
+
+
+def test_layout_header_and_sorted_index(store):
+    path, _ = store
+    with open(path, "rb") as f:
+        data = f.read()
+    magic, version, count, context = _HEADER.unpack_from(data, 0)
+    assert (magic, version, count, context.decode("ascii")) == (MAGIC, VERSION, len(ENTRIES), CONTEXT)
+
+    index = [_ENTRY.unpack_from(data, _HEADER.size + i * _ENTRY.size) for i in range(count)]
+    assert [entry[0] for entry in index] == sorted(topic_hash(topic) for topic in ENTRIES)
+    key, offset, topic_length, content_length = index[0]
+    assert offset == _HEADER.size + count * _ENTRY.size
+    topic = data[offset:offset + topic_length].decode("utf-8")
+    assert topic_hash(topic) == key
+    assert data[offset + topic_length:offset + topic_length + content_length].decode("utf-8") in ENTRIES.values()
+
+
+def test_lookup_normalizes_topics(store):
+    _, knowledge_base = store
+    assert knowledge_base.get("  machine learning? ") == ENTRIES["Machine Learning"]
+    assert knowledge_base.get("DevOps") == ENTRIES["devops"]
+    assert knowledge_base.get("quantum computing") == ENTRIES["Quantum computing"]
+    assert knowledge_base.get("thermodynamics") is None
+    assert "photosynthesis" in knowledge_base and len(knowledge_base) == len(ENTRIES)
+
+
+def test_items_returns_normalized_topics(store):
+    _, knowledge_base = store
+    assert dict(knowledge_base.items())["machine learning"] == ENTRIES["Machine Learning"]
+
+
+def test_store_built_for_another_context_is_ignored(store):
+    path, _ = store
+    assert KnowledgeBase.open(path, knowledge_base_context("Explain {topic}", "google/flan-t5-small")) is None
+
+
+def test_missing_or_foreign_files_are_ignored(tmp_path):
+    assert KnowledgeBase.open(None, CONTEXT) is None
+    assert KnowledgeBase.open(str(tmp_path / "missing.bin"), CONTEXT) is None
+    foreign = tmp_path / "foreign.bin"
+    foreign.write_bytes(struct.pack("<4sII64s", b"ZZZZ", VERSION, 0, CONTEXT.encode("ascii")))
+    assert KnowledgeBase.open(str(foreign), CONTEXT) is None
+
+
+def test_empty_store(tmp_path):
+    path = str(tmp_path / "empty.bin")
+    assert write_knowledge_base(path, {}, CONTEXT) == 0
+    knowledge_base = KnowledgeBase.open(path, CONTEXT)
+    assert knowledge_base.get("anything") is None
+    knowledge_base.close()
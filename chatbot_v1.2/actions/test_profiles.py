@@ -0,0 +1,37 @@
+import pytest
+
+from actions import settings
+from actions.profiles import GENERATION_PROFILES, PROFILE_ORDER, select_profile, streaming_params
+
+
+@pytest.mark.parametrize("education_level, learning_style, profile", [
+    ("High School", None, "fast"),
+    ("Undergraduate", "Auditory", "balanced"),
+    ("Postgraduate", None, "quality"),
+    ("Professional", "Reading/Writing", "quality"),
+    ("Undergraduate", "Reading/Writing", "quality"),
+    ("Undergraduate", "Visual", "fast"),
+    ("High School", "Kinesthetic", "fast"),
+    ("High School", "Reading/Writing", "balanced"),
+    ("Postgraduate", "Visual", "balanced"),
+    ("Postgraduate", "Unknown style", "quality"),
+])
+def test_select_profile(education_level, learning_style, profile):
+    assert select_profile(education_level, learning_style) == profile
+
+
+def test_unknown_learners_get_the_default_profile(monkeypatch):
+    monkeypatch.setattr(settings, "GENERATION_DEFAULT_PROFILE", "fast")
+    assert select_profile() == "fast"
+    assert select_profile("Kindergarten", "Reading/Writing") == "fast"
+
+
+def test_profiles_grow_in_budget():
+    budgets = [GENERATION_PROFILES[name]["max_length"] for name in PROFILE_ORDER]
+    assert budgets == sorted(budgets)
+
+
+def test_streaming_drops_beam_search_settings():
+    params = streaming_params(GENERATION_PROFILES["quality"])
+    assert not {"num_beams", "length_penalty", "early_stopping"} & set(params)
+    assert params["max_length"] == GENERATION_PROFILES["quality"]["max_length"]
@@ -0,0 +1,89 @@
+import threading
+import time
+
+import pytest
+
+from actions import registry
+from actions.instrumentation import metrics
+from actions.registry import ModelRegistry, ModelUnavailable
+
+
+class FakeBackend:
+    def __init__(self, model_name, **kwargs):
+        self.model_name = model_name
+        self.kwargs = kwargs
+
+    def load(self):
+        return self
+
+
+@pytest.fixture
+def loads(monkeypatch):
+    loads = []
+
+    def create_backend(name, model_name, **kwargs):
+        loads.append((name, model_name, kwargs))
+        time.sleep(0.05)
+        if model_name == "broken":
+            raise OSError("no such model")
+        return FakeBackend(model_name, **kwargs)
+
+    monkeypatch.setattr(registry, "create_backend", create_backend)
+    return loads
+
+
+def test_model_is_loaded_once_across_threads(loads):
+    models = ModelRegistry()
+    results = []
+    threads = [
+        threading.Thread(target=lambda: results.append(models.get("torch", "flan-t5")))
+        for _ in range(8)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(loads) == 1
+    assert all(result is results[0] for result in results)
+    assert models.is_loaded("torch", "flan-t5")
+
+
+def test_backend_model_and_draft_model_have_their_own_entries(loads):
+    models = ModelRegistry()
+    plain = models.get("torch", "flan-t5")
+    assert models.get("torch-int8", "flan-t5") is not plain
+    drafted = models.get("torch", "flan-t5", draft_model_name="flan-t5-small")
+    assert drafted is not plain and drafted.kwargs["draft_model_name"] == "flan-t5-small"
+    assert models.get("torch", "flan-t5", draft_model_name=None) is plain
+    assert len(loads) == 3
+
+
+def test_failed_load_is_retried_only_after_the_interval(loads, monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(time, "monotonic", lambda: now[0])
+    models = ModelRegistry(retry_after=60)
+    for _ in range(2):
+        with pytest.raises(ModelUnavailable):
+            models.get("torch", "broken")
+    assert len(loads) == 1
+
+    now[0] += 60
+    with pytest.raises(ModelUnavailable):
+        models.get("torch", "broken")
+    assert len(loads) == 2
+    assert not models.is_loaded("torch", "broken")
+
+
+def test_warm_up_loads_in_the_background(loads):
+    models = ModelRegistry()
+    models.warm_up("torch", "flan-t5").join(5)
+    models.warm_up("torch", "broken").join(5)
+    assert models.is_loaded("torch", "flan-t5")
+    assert not models.is_loaded("torch", "broken")
+
+
+def test_load_stats_are_published_as_gauges(loads):
+    ModelRegistry().get("torch", "gauged-model")
+    rendered = metrics.render()
+    assert 'learning_sarthi_model_loaded{backend="torch",draft_model="",model="gauged-model"} 1' in rendered
+    assert 'learning_sarthi_model_load_seconds{backend="torch",draft_model="",model="gauged-model"}' in rendered
@@ -0,0 +1,119 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+from actions.resilience import CircuitBreaker, CircuitOpenError, ResilientFetcher
+
+
+class Clock:
+    def __init__(self, now: float = 1000.0):
+        self.now = now
+
+    def __call__(self) -> float:
+        return self.now
+
+
+class CallerError(Exception):
+    pass
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(time, "monotonic", clock)
+    return clock
+
+
+def test_breaker_opens_after_consecutive_failures(clock):
+    breaker = CircuitBreaker("test", failure_threshold=2, reset_timeout=30)
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.CLOSED and breaker.allow()
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN
+    assert not breaker.allow()
+
+
+def test_success_resets_the_failure_count(clock):
+    breaker = CircuitBreaker("test", failure_threshold=2)
+    breaker.record_failure()
+    breaker.record_success()
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.CLOSED
+
+
+def test_half_open_lets_one_trial_through(clock):
+    breaker = CircuitBreaker("test", failure_threshold=1, reset_timeout=30)
+    breaker.record_failure()
+    clock.now += 30
+    assert breaker.allow()
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    assert not breaker.allow()
+
+
+def test_half_open_trial_closes_or_reopens(clock):
+    breaker = CircuitBreaker("test", failure_threshold=1, reset_timeout=30)
+    breaker.record_failure()
+    clock.now += 30
+    breaker.allow()
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN and not breaker.allow()
+
+    clock.now += 30
+    breaker.allow()
+    breaker.record_success()
+    assert breaker.state == CircuitBreaker.CLOSED and breaker.allow()
+
+
+def fetcher(breaker: CircuitBreaker) -> ResilientFetcher:
+    return ResilientFetcher(
+        "test", retries=1, backoff_base=0, timeout=5, breaker=breaker,
+        is_retryable=lambda e: not isinstance(e, CallerError),
+    )
+
+
+def test_fetcher_rejects_calls_while_open():
+    breaker = CircuitBreaker("test", failure_threshold=1, reset_timeout=30)
+    breaker.record_failure()
+    with pytest.raises(CircuitOpenError):
+        asyncio.run(fetcher(breaker).call(lambda: "ok"))
+
+
+def test_fetcher_counts_upstream_errors_only():
+    breaker = CircuitBreaker("test", failure_threshold=1)
+    calls = []
+
+    def caller_error():
+        calls.append("caller")
+        raise CallerError()
+
+    def upstream_error():
+        calls.append("upstream")
+        raise OSError()
+
+    with pytest.raises(CallerError):
+        asyncio.run(fetcher(breaker).call(caller_error))
+    assert breaker.state == CircuitBreaker.CLOSED
+    with pytest.raises(OSError):
+        asyncio.run(fetcher(breaker).call(upstream_error))
+    assert breaker.state == CircuitBreaker.OPEN
+    assert calls == ["caller", "upstream", "upstream"]
+
+
+def test_cancelled_trial_releases_the_breaker():
+    breaker = CircuitBreaker("test", failure_threshold=1, reset_timeout=0)
+    breaker.record_failure()
+    release = threading.Event()
+
+    async def cancel_trial():
+        trial = asyncio.ensure_future(fetcher(breaker).call(release.wait, 5))
+        await asyncio.sleep(0.05)
+        trial.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await trial
+
+    asyncio.run(cancel_trial())
+    release.set()
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    assert breaker.allow()
@@ -0,0 +1,91 @@
+import time
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from actions.semantic_cache import SemanticCache  # noqa: E402
+
+
+def unit(*values):
+    vector = np.array(values, dtype=np.float32)
+    return vector / np.linalg.norm(vector)
+
+
+class FakeEmbedder:
+    """Fixed vectors per normalized topic; counts how often it is asked."""
+
+    VECTORS = {
+        "machine learning": unit(1.0, 0.0, 0.0),
+        "what is ml": unit(0.95, 0.3, 0.0),
+        "ml basics": unit(0.8, 0.6, 0.0),
+        "photosynthesis": unit(0.0, 0.0, 1.0),
+    }
+
+    def __init__(self):
+        self.calls = 0
+
+    def embed(self, texts):
+        self.calls += 1
+        return np.stack([self.VECTORS[text] for text in texts])
+
+
+@pytest.fixture
+def cache():
+    return SemanticCache(FakeEmbedder(), threshold=0.9, max_entries=2, log_every=0)
+
+
+def test_similar_topic_above_the_threshold_is_a_hit(cache):
+    cache.add("Machine Learning", "ctx", "ML explanation")
+    assert cache.lookup("what is ML", "ctx") == "ML explanation"
+    assert cache.stats()["hits"] == 1
+
+
+def test_topic_below_the_threshold_is_a_miss(cache):
+    cache.add("machine learning", "ctx", "ML explanation")
+    # cosine similarity 0.8
+    assert cache.lookup("ML basics", "ctx") is None
+    assert cache.lookup("photosynthesis", "ctx") is None
+    assert cache.stats()["misses"] == 2
+
+
+def test_answers_are_only_shared_within_a_context(cache):
+    cache.add("machine learning", "quality profile", "long explanation")
+    assert cache.lookup("machine learning", "fast profile") is None
+
+
+def test_expired_entries_are_not_served(cache, monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(time, "monotonic", lambda: now[0])
+    cache.ttl = 60
+    cache.add("machine learning", "ctx", "ML explanation")
+    now[0] += 61
+    assert cache.lookup("machine learning", "ctx") is None
+
+
+def test_full_cache_recycles_the_least_recently_used_slot(cache, monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(time, "monotonic", lambda: now[0])
+    cache.add("machine learning", "ctx", "ML explanation")
+    now[0] += 1
+    cache.add("photosynthesis", "ctx", "plants")
+    now[0] += 1
+    assert cache.lookup("machine learning", "ctx") == "ML explanation"
+    now[0] += 1
+    cache.add("ml basics", "ctx", "basics")
+    assert len(cache) == 2
+    assert cache.lookup("photosynthesis", "ctx") is None
+    assert cache.lookup("ml basics", "ctx") == "basics"
+
+
+def test_re_adding_a_topic_replaces_its_answer(cache):
+    cache.add("machine learning", "ctx", "old")
+    cache.add("Machine learning?", "ctx", "new")
+    assert len(cache) == 1
+    assert cache.lookup("machine learning", "ctx") == "new"
+
+
+def test_lookup_then_add_embeds_the_topic_once(cache):
+    cache.lookup("machine learning", "ctx")
+    cache.add("machine learning", "ctx", "ML explanation")
+    assert cache.embedder.calls == 1
@@ -0,0 +1,80 @@
+import threading
+import time
+
+from actions.streaming import StreamRegistry, TokenStream
+
+
+def produce(stream, chunks, delay=0.01):
+    def run():
+        for chunk in chunks:
+            time.sleep(delay)
+            stream.put(chunk)
+        stream.close()
+
+    thread = threading.Thread(target=run)
+    thread.start()
+    return thread
+
+
+def test_reader_gets_every_chunk_in_order_and_stops_at_close():
+    stream = TokenStream("s")
+    chunks = [f"token{i} " for i in range(20)]
+    producer = produce(stream, chunks)
+    assert list(stream.iter_chunks(timeout=5)) == chunks
+    producer.join()
+    assert stream.closed and stream.text() == "".join(chunks)
+
+
+def test_late_reader_replays_from_the_start():
+    stream = TokenStream("s")
+    stream.put("Hello ")
+    stream.put("")
+    stream.put("world")
+    stream.close()
+    assert list(stream.iter_chunks(timeout=1)) == ["Hello ", "world"]
+    assert list(stream.iter_chunks(timeout=1)) == ["Hello ", "world"]
+
+
+def test_several_readers_see_the_same_text():
+    stream = TokenStream("s")
+    results = [[], []]
+    readers = [
+        threading.Thread(target=lambda out=out: out.extend(stream.iter_chunks(timeout=5))) for out in results
+    ]
+    for reader in readers:
+        reader.start()
+    produce(stream, ["a", "b", "c"]).join()
+    for reader in readers:
+        reader.join()
+    assert results == [["a", "b", "c"], ["a", "b", "c"]]
+
+
+def test_idle_stream_ends_after_the_timeout():
+    stream = TokenStream("s")
+    stream.put("partial")
+    started = time.monotonic()
+    assert list(stream.iter_chunks(timeout=0.1)) == ["partial"]
+    assert time.monotonic() - started < 2
+    assert not stream.closed
+
+
+def test_close_with_error_and_time_to_first_token():
+    stream = TokenStream("s")
+    assert stream.time_to_first_token() is None
+    stream.put("x")
+    stream.close(error="out of memory")
+    assert stream.error == "out of memory"
+    assert stream.time_to_first_token() >= 0
+
+
+def test_registry_expires_and_discards_streams(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(time, "monotonic", lambda: now[0])
+    streams = StreamRegistry(ttl=60)
+    old = streams.create()
+    now[0] += 61
+    new = streams.create()
+    assert streams.get(old.id) is None
+    assert streams.get(new.id) is new
+    streams.discard(new.id)
+    assert streams.get(new.id) is None
@@ -0,0 +1,69 @@
+import os
+
+from actions.topic_policy import TopicPolicy, _trie_pattern, compile_phrases
+
+
+def test_trie_merges_shared_prefixes():
+    trie = {"m": {"u": {"s": {"i": {"c": {"": {}, "a": {"l": {"": {}}}}}}}}}
+    assert _trie_pattern(trie) == "music(?:al)?"
+
+
+def test_phrases_match_whole_words_and_plurals():
+    pattern = compile_phrases(["food", "music", "musical", "box"])
+    assert pattern.search("healthy foods")
+    assert pattern.search("Musicals of the 90s")
+    assert pattern.search("boxes")
+    assert not pattern.search("seafood")
+    assert not pattern.search("musicology")
+
+
+def test_multi_word_phrases_accept_any_whitespace():
+    pattern = compile_phrases(["machine  learning"])
+    assert pattern.search("what is Machine \t learning")
+    assert not pattern.search("machinelearning")
+
+
+def test_no_phrases_compile_to_none():
+    assert compile_phrases(["", "  "]) is None
+
+
+def write_policy(path, blocked, allowed=()):
+    path.write_text(f"blocked: {list(blocked)}\nallowed: {list(allowed)}\n", encoding="utf-8")
+
+
+def test_allowed_phrases_override_blocked_ones(tmp_path):
+    path = tmp_path / "topic_policy.yml"
+    write_policy(path, ["food"], ["food chain"])
+    policy = TopicPolicy(str(path))
+    assert policy.blocked_terms("the food chain") == []
+    assert policy.blocked_terms("food chain and junk food") == ["food"]
+
+
+def test_policy_reloads_when_the_file_changes(tmp_path):
+    path = tmp_path / "topic_policy.yml"
+    write_policy(path, ["pizza"])
+    policy = TopicPolicy(str(path), reload_interval=0)
+    assert policy.is_blocked("pizza")
+
+    write_policy(path, ["cars"])
+    stat = os.stat(path)
+    os.utime(path, (stat.st_atime, stat.st_mtime + 10))
+    assert not policy.is_blocked("pizza")
+    assert policy.is_blocked("sports cars")
+
+
+def test_broken_file_keeps_the_previous_lists(tmp_path):
+    path = tmp_path / "topic_policy.yml"
+    write_policy(path, ["pizza"])
+    policy = TopicPolicy(str(path), reload_interval=0)
+
+    path.write_text("blocked: [unclosed", encoding="utf-8")
+    stat = os.stat(path)
+    os.utime(path, (stat.st_atime, stat.st_mtime + 10))
+    assert policy.is_blocked("pizza")
+
+
+def test_missing_file_falls_back_to_the_built_in_list(tmp_path):
+    policy = TopicPolicy(str(tmp_path / "missing.yml"))
+    assert policy.is_blocked("celebrity gossip")
+    assert not policy.is_blocked("photosynthesis")
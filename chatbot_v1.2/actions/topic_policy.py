@@ -0,0 +1,121 @@
+# Topic policy: which requested topics we decline to explain.
+#
+# Blocked and allowed phrases are read from a YAML file and compiled into
+# one regular expression per list. The alternation is built from a trie of
+# the phrases ("music", "musical" -> "music(?:al)?"), so the regex engine
+# never backtracks across sibling phrases and a match costs time
+# proportional to the topic length rather than to the number of phrases.
+# Matches respect word boundaries and accept a plural "s"/"es", so "food"
+# blocks "foods" but not "seafood".
+#
+# The file is re-read when its modification time changes, so the lists can
+# be edited without restarting the action server.
+
+import logging
+import os
+import re
+import threading
+import time
+from typing import Dict, Iterable, List, Optional, Pattern, Text, Tuple
+
+import yaml
+
+logger = logging.getLogger(__name__)
+
+# used when the policy file is missing or unreadable at start-up
+DEFAULT_BLOCKED = [
+    "pizza", "food", "infosys", "company", "movie", "celebrity", "sports", "music", "recipe", "travel",
+    "fashion", "gossip", "weather", "news", "politics", "games", "shopping", "cars",
+]
+
+_END = ""
+
+
+def _trie_pattern(node: Dict[Text, Dict]) -> Text:
+    branches = []
+    optional = False
+    for char, child in sorted(node.items()):
+        if char == _END:
+            optional = True
+            continue
+        branches.append(re.escape(char) + _trie_pattern(child))
+    if not branches:
+        return ""
+    pattern = branches[0] if len(branches) == 1 else "(?:" + "|".join(branches) + ")"
+    if optional:
+        pattern = "(?:" + pattern + ")?"
+    return pattern
+
+
+def compile_phrases(phrases: Iterable[Text]) -> Optional[Pattern]:
+    """One case-insensitive, word-bounded regex matching any of `phrases` (or their plural)."""
+    trie: Dict[Text, Dict] = {}
+    for phrase in phrases:
+        words = phrase.lower().split()
+        if not words:
+            continue
+        node = trie
+        # any run of whitespace in the topic matches a single space in the phrase
+        for char in " ".join(words):
+            node = node.setdefault(char, {})
+        node[_END] = {}
+    if not trie:
+        return None
+    body = _trie_pattern(trie).replace(re.escape(" "), r"\s+")
+    return re.compile(r"(?<!\w)" + body + r"(?:e?s)?(?!\w)", re.IGNORECASE)
+
+
+class TopicPolicy:
+    def __init__(self, path: Optional[Text], reload_interval: float = 5.0):
+        self.path = path
+        self.reload_interval = reload_interval
+        self._compiled: Tuple[Optional[Pattern], Optional[Pattern]] = (compile_phrases(DEFAULT_BLOCKED), None)
+        self._mtime: Optional[float] = None
+        self._checked_at = 0.0
+        self._lock = threading.Lock()
+        self._maybe_reload(force=True)
+
+    def _maybe_reload(self, force: bool = False) -> None:
+        if not self.path:
+            return
+        now = time.monotonic()
+        if not force and now - self._checked_at < self.reload_interval:
+            return
+        with self._lock:
+            self._checked_at = now
+            try:
+                mtime = os.stat(self.path).st_mtime
+            except OSError as e:
+                if force:
+                    logger.warning(f"Topic policy {self.path} not readable, using the built-in blocklist: {e}")
+                return
+            if mtime == self._mtime:
+                return
+            try:
+                with open(self.path, encoding="utf-8") as f:
+                    data = yaml.safe_load(f) or {}
+                blocked = list(data.get("blocked", []))
+                allowed = list(data.get("allowed", []))
+                self._compiled = (compile_phrases(blocked), compile_phrases(allowed))
+            except (OSError, yaml.YAMLError, re.error, AttributeError, TypeError) as e:
+                # keep enforcing the previous lists rather than letting everything through
+                logger.error(f"Error loading topic policy {self.path}, keeping the previous one: {e}")
+                return
+            self._mtime = mtime
+            logger.info(f"Topic policy loaded from {self.path} ({len(blocked)} blocked, {len(allowed)} allowed)")
+
+    def blocked_terms(self, topic: Text) -> List[Text]:
+        """The blocked phrases found in `topic` that are not part of an allowed phrase."""
+        self._maybe_reload()
+        blocked, allowed = self._compiled
+        if blocked is None:
+            return []
+        allowed_spans = [match.span() for match in allowed.finditer(topic)] if allowed is not None else []
+        return [
+            match.group(0)
+            for match in blocked.finditer(topic)
+            if not any(start <= match.start() and match.end() <= end for start, end in allowed_spans)
+        ]
+
+    def is_blocked(self, topic: Text) -> bool:
+        return bool(self.blocked_terms(topic))
@@ -1,7 +1,20 @@
 import streamlit as st
 import requests
+import time
 import uuid
 import json
+from contextlib import nullcontext
+
+from frontend import settings
+from frontend.history import ChatHistoryStore, get_spill_store
+from frontend.prompt_catalog import suggested_prompts
+from frontend.rasa_client import get_rasa_client
+from frontend.telemetry import (
+    ResponseTiming,
+    RollingTelemetry,
+    get_telemetry_exporter,
+    render_performance_panel,
+)
 
 
 class PersonalizedLearningChatbot:
@@ -13,10 +26,12 @@ class PersonalizedLearningChatbot:
         - Session state management
         - Page configuration
         - Custom UI styling
+        - Pooled connection to the Rasa server
         """
         self.initialize_session_state()
         self.configure_page()
         self.apply_custom_styling()
+        self.rasa = get_rasa_client()
 
     def initialize_session_state(self):
         """
@@ -31,9 +46,24 @@ class PersonalizedLearningChatbot:
         if 'session_id' not in st.session_state:
             st.session_state.session_id = str(uuid.uuid4())
 
-        # Initialize chat history
+        # Response timings of this session for the performance panel
+        if 'telemetry' not in st.session_state:
+            st.session_state.telemetry = RollingTelemetry(settings.TELEMETRY_WINDOW)
+
+        # Initialize chat history: recent turns in memory, older ones spilled to disk
         if 'chat_history' not in st.session_state:
-            st.session_state.chat_history = []
+            st.session_state.chat_history = ChatHistoryStore(
+                st.session_state.session_id,
+                get_spill_store(),
+                max_messages=settings.CHAT_MEMORY_MAX_MESSAGES,
+                max_chars=settings.CHAT_MEMORY_MAX_CHARS
+            )
+
+        # Rendering state: how many recent messages to show, memoized HTML per message id
+        if 'history_visible' not in st.session_state:
+            st.session_state.history_visible = settings.CHAT_RENDER_WINDOW
+        if 'message_fragments' not in st.session_state:
+            st.session_state.message_fragments = {}
 
         # Initialize user learning preferences
         if 'user_preferences' not in st.session_state:
@@ -115,150 +145,13 @@ class PersonalizedLearningChatbot:
 
         Provides intelligent, tailored question suggestions that match:
         - Learning style
-        - Areas of interest
+        - Areas of interest (prompts of every selected interest are merged)
         - Educational background
-        """
-        example_prompts_map = {
-            'Visual': {
-                'Technology': [
-                    "Show me a diagram explaining blockchain",
-                    "Create a visual guide to machine learning algorithms",
-                    "Explain the structure of a computer network using a diagram",
-                    "Illustrate the components of a smartphone",
-                    "Visualize the difference between frontend and backend development"
-                ],
-                'Science': [
-                    "Visualize the process of photosynthesis",
-                    "Draw a diagram of DNA replication",
-                    "Show me a schematic of the solar system",
-                    "Illustrate the layers of the Earth's atmosphere",
-                    "Draw the lifecycle of a butterfly"
-                ],
-                'Arts': [
-                    "Show me a flowchart of art history movements",
-                    "Visualize the steps of drawing a human face",
-                    "Create a color wheel diagram",
-                    "Illustrate how to sketch perspective in art"
-                ],
-                'Mathematics': [
-                    "Visualize the Pythagorean theorem",
-                    "Draw a graph of a quadratic equation",
-                    "Illustrate the steps of solving an equation",
-                    "Create a diagram explaining fractions",
-                    "Show me a chart for basic geometry formulas"
-                ],
-                'Business': [
-                    "Create a flowchart explaining the sales process",
-                    "Visualize the structure of a startup organization",
-                    "Draw a pie chart of market share for industries",
-                    "Illustrate the customer journey in a business",
-                    "Create a bar graph showing profit vs expenses"
-                ],
-                'Humanities': [
-                    "Visualize a timeline of World War II events",
-                    "Illustrate the structure of a democracy",
-                    "Draw a chart of ancient civilizations",
-                    "Create a map showing major trade routes in history",
-                    "Visualize the family tree of a royal dynasty"
-                ]
-            },
-            'Auditory': {
-                'Technology': [
-                    "Recommend podcasts about AI trends",
-                    "Explain coding concepts through storytelling",
-                    "Describe machine learning algorithms narratively",
-                    "Talk about the history of programming languages",
-                    "Narrate the evolution of the internet"
-                ],
-                'Science': [
-                    "Explain quantum physics in a narrative way",
-                    "Describe biological processes as a story",
-                    "Tell a story about the discovery of gravity",
-                    "Explain the water cycle in simple words",
-                    "Describe the journey of a single raindrop"
-                ],
-                'Arts': [
-                    "Tell a story about the life of a famous artist",
-                    "Narrate how a painting can convey emotions",
-                    "Explain the evolution of modern art styles",
-                    "Describe the process of composing music",
-                    "Talk about the significance of colors in art"
-                ],
-                'Mathematics': [
-                    "Tell a story about the discovery of zero",
-                    "Explain how math is used in everyday life",
-                    "Describe a simple way to remember multiplication tables",
-                    "Narrate the concept of infinity in mathematics",
-                    "Explain how math was used in ancient architecture"
-                ],
-                'Business': [
-                    "Describe the basics of entrepreneurship narratively",
-                    "Talk about the story of a successful startup",
-                    "Explain marketing strategies through examples",
-                    "Tell a story about the evolution of the stock market",
-                    "Describe the life of a famous businessperson"
-                ],
-                'Humanities': [
-                    "Explain the French Revolution as a story",
-                    "Narrate the causes and effects of the Industrial Revolution",
-                    "Describe the daily life of ancient Romans",
-                    "Tell the story of a famous historical figure",
-                    "Explain the Silk Road trade as a journey"
-                ]
-            },
-            'Kinesthetic': {
-                'Technology': [
-                    "Suggest hands-on coding projects",
-                    "Describe interactive learning for programming",
-                    "Recommend project-based learning resources",
-                    "Create a small project to understand IoT concepts",
-                    "Try building a simple website step by step"
-                ],
-                'Science': [
-                    "Suggest science experiments for learning",
-                    "Describe interactive ways to understand complex concepts",
-                    "Recommend building a simple volcano model",
-                    "Do an experiment to measure the speed of a toy car",
-                    "Test the pH of common household liquids"
-                ],
-                'Arts': [
-                    "Try painting a landscape using watercolors",
-                    "Sculpt a small model using clay",
-                    "Create a collage using old magazines",
-                    "Design your own greeting card",
-                    "Sketch a still life scene from your surroundings"
-                ],
-                'Mathematics': [
-                    "Use paper to fold shapes and learn geometry",
-                    "Solve puzzles to understand number patterns",
-                    "Build a model of a 3D shape using toothpicks",
-                    "Measure items around you to practice units and scales",
-                    "Create your own math game using dice"
-                ],
-                'Business': [
-                    "Simulate a negotiation exercise with friends",
-                    "Create a simple business plan for a lemonade stand",
-                    "Role-play pitching a product idea to investors",
-                    "Track expenses and profits from a small activity",
-                    "Conduct a mock customer survey"
-                ],
-                'Humanities': [
-                    "Recreate a historical event as a small play",
-                    "Map the journey of an explorer using a globe",
-                    "Create a scrapbook of cultural festivals",
-                    "Draw a timeline of key historical events",
-                    "Write a letter as if you're living in a historical period"
-                ]
-            }
-        }
-
-        # Select prompts based on preferences
-        selected_prompts = example_prompts_map.get(learning_style, {}).get(
-            interests[0] if interests else 'Technology',
-            ["Ask about study strategies", "Get learning recommendations"]
-        )
 
-        return selected_prompts[:5]  # Return top 3 prompts
+        Prompts come from `frontend/example_prompts.yml`, indexed once per
+        process, so this is a cached lookup on every rerun.
+        """
+        return suggested_prompts(learning_style, tuple(interests), education_level)
 
     def display_sidebar(self):
         """
@@ -308,7 +201,12 @@ class PersonalizedLearningChatbot:
                 if st.sidebar.button(prompt):
                     st.session_state.chat_input = prompt
 
-    def get_bot_response(self, user_input):
+        # Optional latency panel, filled in at the end of the run so it includes this message
+        self.performance_panel = None
+        if st.sidebar.checkbox("Show performance panel", key="show_performance"):
+            self.performance_panel = st.sidebar.empty()
+
+    def get_bot_response(self, user_input, live_placeholder=None, timing=None):
         """
         Send user input to Rasa server with personalized context.
 
@@ -316,39 +214,109 @@ class PersonalizedLearningChatbot:
         - User message
         - Session tracking
         - Personalization context
+
+        Streamed explanations are rendered into `live_placeholder`
+        token by token while they are generated. Server, network, stream
+        and render time are recorded in `timing` when given.
         """
+        timing = timing or ResponseTiming(st.session_state.session_id)
         try:
-            rasa_url = "http://localhost:5005/webhooks/rest/webhook"
-            headers = {"Content-Type": "application/json"}
-
-            # Include personalization context
+            # Include personalization context; Rasa hands `metadata` on to the actions
             data = {
                 "sender": st.session_state.session_id,
                 "message": user_input,
-                "context": {
+                "metadata": {
                     "learning_style": st.session_state.user_preferences.get('learning_style'),
                     "interests": st.session_state.user_preferences.get('interests', []),
                     "education_level": st.session_state.user_preferences.get('education_level')
                 }
             }
 
-            response = requests.post(rasa_url, json=data, headers=headers)
+            started = time.perf_counter()
+            try:
+                response = self.rasa.send_message(data)
+                bot_responses = response.json() if response.status_code == 200 else None
+            finally:
+                request_seconds = time.perf_counter() - started
+            # `elapsed` runs from sending the request until Rasa's response headers arrived
+            server_seconds = min(response.elapsed.total_seconds(), request_seconds)
+            timing.add("server", server_seconds)
+            timing.add("network", request_seconds - server_seconds)
 
             if response.status_code == 200:
-                bot_responses = response.json()
                 if bot_responses:
-                    bot_reply = "<br>".join([resp.get("text", "") for resp in bot_responses])
+                    parts = []
+                    for resp in bot_responses:
+                        stream = (resp.get("custom") or {}).get("stream")
+                        if stream:
+                            parts.append(self.follow_stream(stream, parts, live_placeholder, timing))
+                        else:
+                            parts.append(resp.get("text", ""))
+                    bot_reply = "<br>".join(parts)
                     return bot_reply if bot_reply else "I'm thinking... Could you rephrase that?"
                 else:
                     return "I'm not sure how to respond. Can you try asking differently?"
             else:
+                timing.status = f"http_{response.status_code}"
                 return f"Oops! Something went wrong. Status code: {response.status_code}"
 
+        except requests.Timeout:
+            timing.status = "timeout"
+            return "The learning server is taking too long to respond. Please try again in a moment."
         except requests.RequestException as e:
+            timing.status = "network_error"
             return f"Network error: {str(e)}"
         except Exception as e:
+            timing.status = "error"
             return f"An unexpected error occurred: {str(e)}"
 
+    def follow_stream(self, stream, previous_parts, live_placeholder=None, timing=None):
+        """
+        Read a token stream from the action server and render it progressively.
+
+        The partial answer is re-rendered after every chunk, so the first
+        words show up as soon as the model produces them instead of after
+        the whole explanation has been generated.
+        """
+        text = ""
+        started = time.perf_counter()
+        render_seconds = 0.0
+        try:
+            with self.rasa.open_stream(stream["url"], settings.STREAM_READ_TIMEOUT) as response:
+                response.raise_for_status()
+                response.encoding = "utf-8"
+                for chunk in response.iter_content(chunk_size=None, decode_unicode=True):
+                    text += chunk
+                    if timing is not None:
+                        timing.mark_first_token()
+                    if live_placeholder is not None:
+                        render_started = time.perf_counter()
+                        partial = stream.get("prefix", "") + self.format_explanation(text)
+                        self.render_bot_message(live_placeholder, "<br>".join(previous_parts + [partial]))
+                        render_seconds += time.perf_counter() - render_started
+        except requests.RequestException as e:
+            text += f"\n\n(The response was interrupted: {str(e)})"
+            if timing is not None:
+                timing.status = "stream_interrupted"
+
+        if timing is not None:
+            timing.add("render", render_seconds)
+            timing.add("stream", time.perf_counter() - started - render_seconds)
+
+        return stream.get("prefix", "") + self.format_explanation(text)
+
+    @staticmethod
+    def format_explanation(text):
+        # Same readability formatting the action server applies to non-streamed answers
+        return text.replace(". ", ".\n\n")
+
+    @staticmethod
+    def bot_message_html(message):
+        return f"<div class='bot-message'>🤖 <b>Learning Companion:</b> {message}</div>"
+
+    def render_bot_message(self, container, message):
+        container.markdown(self.bot_message_html(message), unsafe_allow_html=True)
+
     def run(self):
         """
         Main method to orchestrate chatbot interaction.
@@ -371,23 +339,41 @@ class PersonalizedLearningChatbot:
         )
 
         # Send button with interaction logic
+        timing = None
         if st.button("🚀 Send Message", key="send_button"):
             if user_input.strip():
+                timing = ResponseTiming(st.session_state.session_id)
+                live_response = st.empty()
                 with st.spinner('🤖 Generating personalized response...'):
-                    bot_response = self.get_bot_response(user_input)
-
-                    st.session_state.chat_history.append({
-                        'type': 'user',
-                        'message': user_input
-                    })
-                    st.session_state.chat_history.append({
-                        'type': 'bot',
-                        'message': bot_response
-                    })
+                    bot_response = self.get_bot_response(user_input, live_response, timing)
+
+                    self.add_message('user', user_input)
+                    self.add_message('bot', bot_response)
+                # the full answer is part of the chat history from now on
+                live_response.empty()
             else:
                 st.warning("Please enter a message before sending.")
 
-        self.display_chat_history()
+        with timing.phase("render") if timing else nullcontext():
+            self.display_chat_history()
+
+        if timing:
+            self.record_timing(timing.finish())
+        if self.performance_panel is not None:
+            render_performance_panel(self.performance_panel, st.session_state.telemetry)
+
+    def record_timing(self, timing):
+        """Add a response timing to the session's rolling window and the local metrics file."""
+        st.session_state.telemetry.add(timing)
+        exporter = get_telemetry_exporter()
+        if exporter is not None:
+            try:
+                exporter.write(timing.to_dict())
+            except OSError:
+                pass  # telemetry must never break the chat
+
+    def add_message(self, message_type, text):
+        st.session_state.chat_history.append(message_type, text)
 
     def display_chat_history(self):
         """
@@ -397,23 +383,48 @@ class PersonalizedLearningChatbot:
         - Styled message containers
         - Emoji-based message identification
         - Responsive design
+        - Only the newest messages are rendered; older turns stay
+          collapsed until the learner asks for them, a page at a time
+        - HTML fragments are memoized per message id
         """
-        if st.session_state.chat_history:
-            st.markdown("<div class='chat-container'>", unsafe_allow_html=True)
-
-            for message in st.session_state.chat_history:
-                if message['type'] == 'user':
-                    st.markdown(
-                        f"<div class='user-message'>🧑 <b>You:</b> {message['message']}</div>",
-                        unsafe_allow_html=True
-                    )
-                else:
-                    st.markdown(
-                        f"<div class='bot-message'>🤖 <b>Learning Companion:</b> {message['message']}</div>",
-                        unsafe_allow_html=True
-                    )
+        history = st.session_state.chat_history
+        if not history:
+            return
+
+        hidden = max(0, len(history) - st.session_state.history_visible)
+        if hidden:
+            if st.button(f"⬆️ Show earlier messages ({hidden} hidden)", key="show_earlier_messages"):
+                st.session_state.history_visible += settings.CHAT_HISTORY_PAGE_SIZE
+                hidden = max(0, len(history) - st.session_state.history_visible)
+
+        st.markdown("<div class='chat-container'>", unsafe_allow_html=True)
+
+        # older turns are only read back from the spill store when revealed
+        window = history.last(len(history) - hidden)
+        for message in window:
+            st.markdown(self.message_fragment(message), unsafe_allow_html=True)
+
+        st.markdown("</div>", unsafe_allow_html=True)
+
+        # forget fragments of messages that scrolled out of the rendered window
+        fragments = st.session_state.message_fragments
+        if len(fragments) > 2 * len(window):
+            visible_ids = {message.id for message in window}
+            st.session_state.message_fragments = {
+                message_id: html for message_id, html in fragments.items() if message_id in visible_ids
+            }
 
-            st.markdown("</div>", unsafe_allow_html=True)
+    def message_fragment(self, message):
+        """Formatted HTML for one message, built once per message id."""
+        fragments = st.session_state.message_fragments
+        html = fragments.get(message.id)
+        if html is None:
+            if message.type == 'user':
+                html = f"<div class='user-message'>🧑 <b>You:</b> {message.message}</div>"
+            else:
+                html = self.bot_message_html(message.message)
+            fragments[message.id] = html
+        return html
 
 
 def main():
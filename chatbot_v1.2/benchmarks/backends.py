@@ -0,0 +1,164 @@
+"""
+Compare the inference backends on the same prompts.
+
+Each backend is measured in its own process so resident memory numbers are
+not polluted by the previous backend. Run from the `chatbot_v1.2` folder:
+
+    python -m benchmarks.backends --backends torch torch-int8 onnx --runs 3
+    python -m benchmarks.backends --model google/flan-t5-small --json backends.json
+"""
+
+import argparse
+import json
+import multiprocessing
+import os
+import queue
+import statistics
+import time
+from typing import Any, Dict, List, Text
+
+DEFAULT_TOPICS = [
+    "machine learning",
+    "DevOps",
+    "artificial intelligence",
+    "blockchain",
+    "cloud computing",
+    "data structures and algorithms",
+]
+
+
+def benchmark_backend(
+    backend_name: Text,
+    model_name: Text,
+    topics: List[Text],
+    runs: int,
+    batch_size: int,
+    onnx_export_dir: Text,
+) -> Dict[Text, Any]:
+    from actions.actions import GENERATION_PARAMS, PROMPT_TEMPLATE
+    from actions.backends import create_backend
+    from actions.memory import peak_rss_mb, rss_mb
+
+    rss_before = rss_mb()
+    started = time.perf_counter()
+    backend = create_backend(
+        backend_name,
+        model_name,
+        export_dir=os.path.join(onnx_export_dir, model_name.replace("/", "--")),
+    ).load()
+    load_seconds = time.perf_counter() - started
+    rss_loaded = rss_mb()
+
+    prompts = [PROMPT_TEMPLATE.format(topic=topic) for topic in topics]
+    # one untimed pass so lazy initialisation does not count against the first backend call
+    backend.generate(prompts[:1], GENERATION_PARAMS)
+
+    latencies = []
+    generated_tokens = 0
+    total_seconds = 0.0
+    for _ in range(runs):
+        for i in range(0, len(prompts), batch_size):
+            batch = prompts[i:i + batch_size]
+            started = time.perf_counter()
+            texts = backend.generate(batch, GENERATION_PARAMS)
+            elapsed = time.perf_counter() - started
+            total_seconds += elapsed
+            latencies.append(elapsed)
+            generated_tokens += sum(len(ids) for ids in backend.tokenizer(texts).input_ids)
+
+    return {
+        "backend": backend_name,
+        "model": model_name,
+        "load_seconds": round(load_seconds, 2),
+        "model_memory_mb": round(rss_loaded - rss_before, 1),
+        "peak_rss_mb": round(peak_rss_mb(), 1),
+        "batches": len(latencies),
+        "generated_tokens": generated_tokens,
+        "tokens_per_second": round(generated_tokens / total_seconds, 2) if total_seconds else 0.0,
+        "latency_p50_seconds": round(statistics.median(latencies), 3),
+        "latency_max_seconds": round(max(latencies), 3),
+    }
+
+
+def _run_isolated(result_queue: "multiprocessing.Queue", kwargs: Dict[Text, Any]) -> None:
+    try:
+        result_queue.put(benchmark_backend(**kwargs))
+    except Exception as e:
+        result_queue.put({"backend": kwargs["backend_name"], "error": str(e)})
+
+
+def _wait_for_result(
+    process: multiprocessing.Process,
+    result_queue: "multiprocessing.Queue",
+    backend_name: Text,
+    timeout: float,
+) -> Dict[Text, Any]:
+    """The child's result, or an error when it dies without one (OOM, crash) or runs out of time."""
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            return result_queue.get(timeout=1.0)
+        except queue.Empty:
+            pass
+        if not process.is_alive():
+            # the result may have been queued just before the child exited
+            try:
+                return result_queue.get(timeout=1.0)
+            except queue.Empty:
+                return {"backend": backend_name, "error": f"benchmark process exited with code {process.exitcode}"}
+        if time.monotonic() > deadline:
+            process.terminate()
+            return {"backend": backend_name, "error": f"no result after {timeout:.0f}s"}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark generation backends.")
+    parser.add_argument("--backends", nargs="+", default=["torch", "torch-int8", "onnx"])
+    parser.add_argument("--model", default="google/flan-t5-large")
+    parser.add_argument("--topics", nargs="+", default=DEFAULT_TOPICS)
+    parser.add_argument("--runs", type=int, default=1, help="passes over the topic list")
+    parser.add_argument("--batch-size", type=int, default=1)
+    parser.add_argument("--onnx-export-dir", default=".cache/onnx")
+    parser.add_argument("--timeout", type=float, default=3600.0, help="seconds each backend may take")
+    parser.add_argument("--json", help="write the results to this file")
+    args = parser.parse_args()
+
+    context = multiprocessing.get_context("spawn")
+    results = []
+    for backend_name in args.backends:
+        result_queue = context.Queue()
+        process = context.Process(
+            target=_run_isolated,
+            args=(result_queue, {
+                "backend_name": backend_name,
+                "model_name": args.model,
+                "topics": args.topics,
+                "runs": args.runs,
+                "batch_size": args.batch_size,
+                "onnx_export_dir": args.onnx_export_dir,
+            }),
+        )
+        process.start()
+        result = _wait_for_result(process, result_queue, backend_name, args.timeout)
+        process.join()
+        results.append(result)
+        print(json.dumps(result))
+
+    print()
+    print(f"{'backend':<12}{'tokens/s':>10}{'p50 s':>9}{'model MB':>10}{'peak MB':>10}{'load s':>8}")
+    for result in results:
+        if "error" in result:
+            print(f"{result['backend']:<12}  failed: {result['error']}")
+            continue
+        print(
+            f"{result['backend']:<12}{result['tokens_per_second']:>10}{result['latency_p50_seconds']:>9}"
+            f"{result['model_memory_mb']:>10}{result['peak_rss_mb']:>10}{result['load_seconds']:>8}"
+        )
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
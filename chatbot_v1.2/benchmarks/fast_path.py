@@ -0,0 +1,139 @@
+"""
+Accuracy and latency of the fast-path intent tier on the test stories.
+
+Every user turn of `tests/test_stories.yml` is looked up in a fast-path
+index built from `data/nlu.yml` with the same settings as the pipeline
+component. The report gives the share of turns the fast path answers, how
+many of those answers match the intent the story expects, and the lookup
+latency. With `--models`, each trained model also parses every turn
+in-process, and its accuracy and parse latency are reported for the turns
+the fast path answers and for those that fall through to DIET. Compare a
+model trained with the fast path against one trained with the stock
+pipeline. Run from the `chatbot_v1.2` folder:
+
+    python -m benchmarks.fast_path
+    python -m benchmarks.fast_path --models models/fast-path.tar.gz models/stock.tar.gz --json fast_path.json
+"""
+
+import argparse
+import asyncio
+import json
+import time
+from typing import Any, Dict, List, Optional, Text, Tuple
+
+from benchmarks.roundtrip import load_conversations, percentile
+
+Turn = Tuple[Text, Text]
+
+
+def lookup_report(index, turns: List[Turn], repeat: int) -> Tuple[Dict[Text, Any], List[Optional[Text]]]:
+    answers = [index.lookup(text) for text, _ in turns]
+    timings = []
+    for text, _ in turns:
+        started = time.perf_counter()
+        for _ in range(repeat):
+            index.lookup(text)
+        timings.append((time.perf_counter() - started) / repeat)
+
+    hits = [(answer, expected) for answer, (_, expected) in zip(answers, turns) if answer is not None]
+    correct = sum(answer == expected for answer, expected in hits)
+    report = {
+        "turns": len(turns),
+        "fast_path_turns": len(hits),
+        "coverage": round(len(hits) / len(turns), 3) if turns else 0.0,
+        "precision": round(correct / len(hits), 3) if hits else None,
+        "lookup_p50_microseconds": round(percentile(timings, 50) * 1e6, 2),
+        "lookup_p95_microseconds": round(percentile(timings, 95) * 1e6, 2),
+    }
+    return report, answers
+
+
+def parse_report(model_path: Text, turns: List[Turn], answers: List[Optional[Text]]) -> Dict[Text, Any]:
+    from rasa.core.agent import Agent
+
+    agent = Agent.load(model_path)
+
+    async def parse_all() -> List[Tuple[Text, float]]:
+        # one untimed parse so lazy initialisation is not measured
+        await agent.parse_message(turns[0][0])
+        results = []
+        for text, _ in turns:
+            started = time.perf_counter()
+            parsed = await agent.parse_message(text)
+            results.append(((parsed.get("intent") or {}).get("name"), time.perf_counter() - started))
+        return results
+
+    results = asyncio.run(parse_all())
+    report = {"model": model_path}
+    groups = {
+        "all": range(len(turns)),
+        "fast_path": [i for i, answer in enumerate(answers) if answer is not None],
+        "fall_through": [i for i, answer in enumerate(answers) if answer is None],
+    }
+    for group, indices in groups.items():
+        latencies = [results[i][1] for i in indices]
+        correct = sum(results[i][0] == turns[i][1] for i in indices)
+        report[group] = {
+            "turns": len(latencies),
+            "accuracy": round(correct / len(latencies), 3) if latencies else None,
+            "parse_p50_ms": round(percentile(latencies, 50) * 1000, 2),
+            "parse_p95_ms": round(percentile(latencies, 95) * 1000, 2),
+        }
+    return report
+
+
+def main() -> None:
+    from rasa.shared.nlu.constants import INTENT, TEXT
+    from rasa.shared.nlu.training_data.loading import load_data
+
+    from components.fast_path import DEFAULT_INTENTS, FastPathIndex
+
+    parser = argparse.ArgumentParser(description="Report fast-path intent coverage, precision and latency.")
+    parser.add_argument("--nlu", default="data/nlu.yml")
+    parser.add_argument("--stories", nargs="+", default=["tests/test_stories.yml"])
+    parser.add_argument("--intents", nargs="+", default=DEFAULT_INTENTS)
+    parser.add_argument("--no-near-exact", dest="near_exact", action="store_false")
+    parser.add_argument("--repeat", type=int, default=1000, help="lookups per turn when timing")
+    parser.add_argument("--models", nargs="*", default=[], help="trained models to parse every turn with")
+    parser.add_argument("--json", help="write the results to this file")
+    args = parser.parse_args()
+
+    training_data = load_data(args.nlu)
+    index = FastPathIndex.build(
+        [(example.get(TEXT), example.get(INTENT)) for example in training_data.intent_examples],
+        args.intents,
+        near_exact=args.near_exact,
+    )
+    turns = [turn for _, story_turns in load_conversations(args.stories) for turn in story_turns]
+    if not turns:
+        raise SystemExit(f"No user turns in {args.stories}")
+
+    report, answers = lookup_report(index, turns, args.repeat)
+    print(json.dumps(report))
+    print()
+    print(f"{'turn':<32}{'expected':<18}{'fast path':<18}")
+    for (text, expected), answer in zip(turns, answers):
+        print(f"{text[:30]:<32}{expected:<18}{answer or '-> DIET':<18}")
+
+    report["models"] = []
+    for model_path in args.models:
+        model_report = parse_report(model_path, turns, answers)
+        report["models"].append(model_report)
+        print()
+        print(model_path)
+        print(f"{'turns':<14}{'count':>7}{'accuracy':>10}{'p50 ms':>9}{'p95 ms':>9}")
+        for group in ("all", "fast_path", "fall_through"):
+            values = model_report[group]
+            accuracy = values["accuracy"]
+            print(
+                f"{group:<14}{values['turns']:>7}{accuracy if accuracy is not None else '-':>10}"
+                f"{values['parse_p50_ms']:>9}{values['parse_p95_ms']:>9}"
+            )
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
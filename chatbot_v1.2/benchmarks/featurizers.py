@@ -0,0 +1,174 @@
+"""
+Compare the stock char_wb CountVectorsFeaturizer with the HashingFeaturizer.
+
+The NLU data is split into train and test examples (stratified by intent,
+fixed seed). Two NLU models are trained on the train split: one with the
+pipeline from `config.yml`, and one where the character n-gram
+CountVectorsFeaturizer is replaced by `components.hashing_featurizer.HashingFeaturizer`
+with the same analyzer and n-gram range. For each model the report gives
+the packed model size, the load time, the parse latency and the intent
+macro F1 on the test split. Run from the `chatbot_v1.2` folder:
+
+    python -m benchmarks.featurizers
+    python -m benchmarks.featurizers --n-features 65536 --min-df 2 --epochs 50 --json featurizers.json
+"""
+
+import argparse
+import asyncio
+import copy
+import json
+import os
+import subprocess
+import tempfile
+import time
+from collections import Counter
+from typing import Any, Dict, List, Text, Tuple
+
+import yaml
+
+from benchmarks.roundtrip import percentile
+
+HASHING_FEATURIZER = "components.hashing_featurizer.HashingFeaturizer"
+
+
+def hashing_config(config: Dict[Text, Any], n_features: int, min_df: int) -> Dict[Text, Any]:
+    """`config` with every character n-gram CountVectorsFeaturizer replaced by the hashing one."""
+    variant = copy.deepcopy(config)
+    replaced = 0
+    for i, component in enumerate(variant["pipeline"]):
+        if component["name"] == "CountVectorsFeaturizer" and component.get("analyzer", "word") != "word":
+            variant["pipeline"][i] = {
+                "name": HASHING_FEATURIZER,
+                "analyzer": component["analyzer"],
+                "min_ngram": component.get("min_ngram", 1),
+                "max_ngram": component.get("max_ngram", 1),
+                "n_features": n_features,
+                "min_df": min_df,
+            }
+            replaced += 1
+    if not replaced:
+        raise SystemExit("config has no character n-gram CountVectorsFeaturizer to replace")
+    return variant
+
+
+def with_epochs(config: Dict[Text, Any], epochs: int) -> Dict[Text, Any]:
+    config = copy.deepcopy(config)
+    for component in config["pipeline"]:
+        if "epochs" in component:
+            component["epochs"] = epochs
+    return config
+
+
+def macro_f1(expected: List[Text], predicted: List[Text]) -> float:
+    scores = []
+    for label in sorted(set(expected)):
+        true_positive = sum(e == p == label for e, p in zip(expected, predicted))
+        predicted_count = sum(p == label for p in predicted)
+        expected_count = sum(e == label for e in expected)
+        precision = true_positive / predicted_count if predicted_count else 0.0
+        recall = true_positive / expected_count
+        scores.append(2 * precision * recall / (precision + recall) if precision + recall else 0.0)
+    return sum(scores) / len(scores) if scores else 0.0
+
+
+def train_model(config: Dict[Text, Any], nlu_path: Text, workdir: Text, name: Text) -> Tuple[Text, float]:
+    config_path = os.path.join(workdir, f"{name}.yml")
+    with open(config_path, "w", encoding="utf-8") as f:
+        yaml.safe_dump(config, f, sort_keys=False)
+    started = time.perf_counter()
+    subprocess.run(
+        ["rasa", "train", "nlu", "--config", config_path, "--nlu", nlu_path,
+         "--out", workdir, "--fixed-model-name", name],
+        check=True,
+    )
+    return os.path.join(workdir, f"{name}.tar.gz"), time.perf_counter() - started
+
+
+def evaluate(model_path: Text, test_examples: List[Tuple[Text, Text]]) -> Dict[Text, Any]:
+    from rasa.core.agent import Agent
+
+    started = time.perf_counter()
+    agent = Agent.load(model_path)
+    load_seconds = time.perf_counter() - started
+
+    async def parse_all() -> List[Tuple[Text, float]]:
+        # one untimed parse so lazy initialisation is not measured
+        await agent.parse_message(test_examples[0][0])
+        results = []
+        for text, _ in test_examples:
+            started = time.perf_counter()
+            parsed = await agent.parse_message(text)
+            results.append(((parsed.get("intent") or {}).get("name"), time.perf_counter() - started))
+        return results
+
+    results = asyncio.run(parse_all())
+    latencies = [seconds for _, seconds in results]
+    return {
+        "model_bytes": os.path.getsize(model_path),
+        "load_seconds": round(load_seconds, 3),
+        "parse_p50_ms": round(percentile(latencies, 50) * 1000, 2),
+        "parse_p95_ms": round(percentile(latencies, 95) * 1000, 2),
+        "intent_macro_f1": round(macro_f1([intent for _, intent in test_examples], [p for p, _ in results]), 3),
+    }
+
+
+def main() -> None:
+    from rasa.shared.nlu.constants import INTENT, TEXT
+    from rasa.shared.nlu.training_data.loading import load_data
+
+    parser = argparse.ArgumentParser(description="Benchmark the hashing featurizer against CountVectorsFeaturizer.")
+    parser.add_argument("--config", default="config.yml")
+    parser.add_argument("--nlu", default="data/nlu.yml")
+    parser.add_argument("--train-fraction", type=float, default=0.8)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--n-features", type=int, default=2 ** 18)
+    parser.add_argument("--min-df", type=int, default=1)
+    parser.add_argument("--epochs", type=int, help="override the epochs of every component, for quick runs")
+    parser.add_argument("--json", help="write the results to this file")
+    args = parser.parse_args()
+
+    with open(args.config, encoding="utf-8") as f:
+        config = yaml.safe_load(f)
+    if args.epochs:
+        config = with_epochs(config, args.epochs)
+    variants = {
+        "count_vectors": config,
+        "hashing": hashing_config(config, args.n_features, args.min_df),
+    }
+
+    train_data, test_data = load_data(args.nlu).train_test_split(args.train_fraction, args.seed)
+    test_examples = [(example.get(TEXT), example.get(INTENT)) for example in test_data.intent_examples]
+    print(f"{len(train_data.intent_examples)} train and {len(test_examples)} test examples, "
+          f"{len(Counter(intent for _, intent in test_examples))} intents")
+
+    results: Dict[Text, Dict[Text, Any]] = {}
+    with tempfile.TemporaryDirectory(prefix="featurizers-") as workdir:
+        nlu_path = os.path.join(workdir, "train.yml")
+        train_data.persist_nlu(nlu_path)
+        for name, variant in variants.items():
+            model_path, train_seconds = train_model(variant, nlu_path, workdir, name)
+            results[name] = {"train_seconds": round(train_seconds, 1), **evaluate(model_path, test_examples)}
+            print(json.dumps({"variant": name, **results[name]}))
+
+    print()
+    print(f"{'variant':<15}{'size KB':>9}{'load s':>8}{'p50 ms':>8}{'p95 ms':>8}{'F1':>7}{'train s':>9}")
+    for name, result in results.items():
+        print(
+            f"{name:<15}{result['model_bytes'] / 1024:>9.0f}{result['load_seconds']:>8}"
+            f"{result['parse_p50_ms']:>8}{result['parse_p95_ms']:>8}{result['intent_macro_f1']:>7}"
+            f"{result['train_seconds']:>9}"
+        )
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({
+                "n_features": args.n_features,
+                "min_df": args.min_df,
+                "epochs": args.epochs,
+                "test_examples": len(test_examples),
+                "variants": results,
+            }, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,477 @@
+"""
+Benchmark the full message round trip: client -> Rasa REST webhook -> action server -> model.
+
+Conversations are replayed from Rasa test stories (`tests/test_stories.yml`
+by default) with the same client and payload as the Streamlit app, by
+`--concurrency` simulated learners at once. Every user turn is timed and
+labelled with the intent the story expects; with Rasa's HTTP API enabled,
+the tracker of each conversation also gives the time spent in every custom
+action.
+
+With `--start-stack` the benchmark runs everything locally against
+stand-ins, so numbers are reproducible and need no API key or large model:
+the fake YouTube API (`scripts/youtube_stub.py`), a tiny random-weight T5
+checkpoint, and the action and Rasa servers in child processes whose CPU and
+memory are measured. Run from the `chatbot_v1.2` folder after `rasa train`:
+
+    python -m benchmarks.roundtrip --start-stack --concurrency 8 --conversations 200 --json roundtrip.json
+    python -m benchmarks.roundtrip --start-stack --compare roundtrip.json
+
+Without `--start-stack` it drives whatever is listening at `--rasa-url`.
+"""
+
+import argparse
+import json
+import math
+import os
+import re
+import subprocess
+import sys
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional, Text, Tuple
+
+import requests
+import yaml
+
+ENTITY_ANNOTATION = re.compile(r"\[([^\]]+)\]\([^)]*\)")
+TINY_MODEL_DIR = ".cache/benchmarks/tiny-t5"
+
+# metrics compared by --compare, and whether a higher value is better
+COMPARED_METRICS = {
+    "throughput_turns_per_second": True,
+    "latency_p50_seconds": False,
+    "latency_p95_seconds": False,
+    "latency_p99_seconds": False,
+}
+
+
+def percentile(values: List[float], q: float) -> float:
+    """Nearest-rank percentile, `q` in [0, 100]."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(0, min(len(ordered) - 1, math.ceil(q / 100 * len(ordered)) - 1))
+    return ordered[rank]
+
+
+def summarize(latencies: List[float]) -> Dict[Text, Any]:
+    return {
+        "count": len(latencies),
+        "latency_p50_seconds": round(percentile(latencies, 50), 4),
+        "latency_p95_seconds": round(percentile(latencies, 95), 4),
+        "latency_p99_seconds": round(percentile(latencies, 99), 4),
+        "latency_max_seconds": round(max(latencies), 4) if latencies else 0.0,
+    }
+
+
+def load_conversations(paths: List[Text]) -> List[Tuple[Text, List[Tuple[Text, Text]]]]:
+    """(story name, [(user text, expected intent), ...]) for every story with user turns."""
+    conversations = []
+    for path in paths:
+        with open(path, encoding="utf-8") as f:
+            data = yaml.safe_load(f)
+        for story in data.get("stories", []):
+            turns = [
+                (ENTITY_ANNOTATION.sub(r"\1", step["user"]).strip(), step.get("intent", "unknown"))
+                for step in story.get("steps", [])
+                if "user" in step
+            ]
+            if turns:
+                conversations.append((story.get("story", path), turns))
+    return conversations
+
+
+# ---------------------------------------------------------------------------
+# Local stack
+
+
+def make_tiny_t5(path: Text, tokenizer_name: Text) -> Text:
+    """Save a randomly initialised, few-MB T5 with a real tokenizer; its output is nonsense but costs real decoding."""
+    if os.path.isdir(path) and os.listdir(path):
+        return path
+    import torch
+    from transformers import AutoTokenizer, T5Config, T5ForConditionalGeneration
+
+    torch.manual_seed(0)
+    tokenizer = AutoTokenizer.from_pretrained(tokenizer_name)
+    config = T5Config(
+        vocab_size=len(tokenizer),
+        d_model=64,
+        d_ff=128,
+        d_kv=16,
+        num_layers=2,
+        num_decoder_layers=2,
+        num_heads=4,
+        decoder_start_token_id=tokenizer.pad_token_id,
+        pad_token_id=tokenizer.pad_token_id,
+        eos_token_id=tokenizer.eos_token_id,
+    )
+    T5ForConditionalGeneration(config).save_pretrained(path)
+    tokenizer.save_pretrained(path)
+    return path
+
+
+def wait_until_up(url: Text, timeout: float, process: subprocess.Popen) -> None:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"{' '.join(process.args)} exited with code {process.returncode}")
+        try:
+            if requests.get(url, timeout=2).status_code < 500:
+                return
+        except requests.RequestException:
+            pass
+        time.sleep(0.5)
+    raise RuntimeError(f"{url} did not come up within {timeout:.0f}s")
+
+
+class LocalStack:
+    def __init__(self, args: argparse.Namespace):
+        self.args = args
+        self.processes: Dict[Text, subprocess.Popen] = {}
+        self.youtube = None
+
+    def __enter__(self) -> "LocalStack":
+        from scripts.youtube_stub import serve
+
+        args = self.args
+        self.youtube = serve(port=args.youtube_port, latency=args.youtube_latency)
+        model = args.model or make_tiny_t5(TINY_MODEL_DIR, args.tokenizer)
+
+        env = dict(
+            os.environ,
+            GENERATION_MODEL=model,
+            MODEL_LOAD_MODE="eager",
+            YOUTUBE_API_KEY="benchmark",
+            YOUTUBE_API_ROOT=f"http://127.0.0.1:{args.youtube_port}/youtube/v3/",
+            STREAMING_ENABLED="true" if args.stream else "false",
+            KNOWLEDGE_BASE_PATH="",
+        )
+        if args.no_cache:
+            env.update(GENERATION_CACHE_ENABLED="false", SEMANTIC_CACHE_ENABLED="false", YOUTUBE_CACHE_SIZE="0")
+
+        self.processes["actions"] = subprocess.Popen(
+            [sys.executable, "-m", "rasa_sdk", "--actions", "actions", "--port", "5055"],
+            env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+        )
+        wait_until_up("http://127.0.0.1:5055/health", args.startup_timeout, self.processes["actions"])
+
+        self.processes["rasa"] = subprocess.Popen(
+            ["rasa", "run", "--enable-api", "--port", "5005", "--model", args.rasa_model],
+            env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+        )
+        wait_until_up("http://127.0.0.1:5005/", args.startup_timeout, self.processes["rasa"])
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        for process in self.processes.values():
+            process.terminate()
+        for process in self.processes.values():
+            try:
+                process.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                process.kill()
+        if self.youtube is not None:
+            self.youtube.shutdown()
+
+    def youtube_calls(self) -> Dict[Text, int]:
+        return requests.get(f"http://127.0.0.1:{self.args.youtube_port}/_stats", timeout=2).json()
+
+
+class ResourceSampler:
+    """Peak resident memory and CPU time of a set of processes, read from /proc."""
+
+    def __init__(self, pids: Dict[Text, int], interval: float = 0.5):
+        self.pids = pids
+        self.interval = interval
+        self.peak_rss_mb = {name: 0.0 for name in pids}
+        self._cpu_start = {name: self._cpu_seconds(pid) for name, pid in pids.items()}
+        self._started = time.monotonic()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._sample, name="resource-sampler", daemon=True)
+
+    @staticmethod
+    def _cpu_seconds(pid: int) -> float:
+        try:
+            with open(f"/proc/{pid}/stat") as f:
+                fields = f.read().rsplit(")", 1)[1].split()
+            return (int(fields[11]) + int(fields[12])) / os.sysconf("SC_CLK_TCK")
+        except (OSError, IndexError, ValueError):
+            return 0.0
+
+    @staticmethod
+    def _rss_mb(pid: int) -> float:
+        try:
+            with open(f"/proc/{pid}/statm") as f:
+                return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / (1024 * 1024)
+        except (OSError, IndexError, ValueError):
+            return 0.0
+
+    def _sample_once(self) -> None:
+        for name, pid in self.pids.items():
+            self.peak_rss_mb[name] = max(self.peak_rss_mb[name], self._rss_mb(pid))
+
+    def _sample(self) -> None:
+        while not self._stop.wait(self.interval):
+            self._sample_once()
+
+    def __enter__(self) -> "ResourceSampler":
+        self._sample_once()
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self._stop.set()
+        self._thread.join()
+        self._sample_once()
+
+    def report(self) -> Dict[Text, Dict[Text, float]]:
+        elapsed = time.monotonic() - self._started
+        report = {}
+        for name, pid in self.pids.items():
+            cpu = self._cpu_seconds(pid) - self._cpu_start[name]
+            report[name] = {
+                "peak_rss_mb": round(self.peak_rss_mb[name], 1),
+                "cpu_seconds": round(cpu, 2),
+                # 100% is one core fully busy
+                "cpu_percent": round(100 * cpu / elapsed, 1) if elapsed else 0.0,
+            }
+        return report
+
+
+# ---------------------------------------------------------------------------
+# Load generation
+
+
+class Driver:
+    def __init__(self, client, tracker_url: Optional[Text], metadata: Dict[Text, Any], stream_timeout: float):
+        self.client = client
+        self.tracker_url = tracker_url
+        self.metadata = metadata
+        self.stream_timeout = stream_timeout
+        self.turns: List[Dict[Text, Any]] = []
+        self.actions: List[Tuple[Text, float]] = []
+        self.errors = 0
+        self._lock = threading.Lock()
+
+    def send(self, sender: Text, text: Text) -> bool:
+        response = self.client.send_message({"sender": sender, "message": text, "metadata": self.metadata})
+        if response.status_code != 200:
+            return False
+        # follow token streams to the end, like the app does
+        for message in response.json():
+            stream = (message.get("custom") or {}).get("stream")
+            if stream:
+                with self.client.open_stream(stream["url"], self.stream_timeout) as streamed:
+                    streamed.raise_for_status()
+                    for _ in streamed.iter_content(chunk_size=None):
+                        pass
+        return True
+
+    def action_durations(self, sender: Text) -> List[Tuple[Text, float]]:
+        """Seconds spent in each custom action, from the gap before its event in the tracker."""
+        response = self.client.session.get(self.tracker_url.format(sender=sender), timeout=10)
+        response.raise_for_status()
+        durations = []
+        previous = None
+        for event in response.json().get("events", []):
+            timestamp = event.get("timestamp")
+            name = event.get("name") or ""
+            if event.get("event") == "action" and name.startswith("action_") and previous is not None:
+                if name not in ("action_listen", "action_session_start"):
+                    durations.append((name, timestamp - previous))
+            if timestamp is not None:
+                previous = timestamp
+        return durations
+
+    def run_conversation(self, turns: List[Tuple[Text, Text]]) -> None:
+        sender = f"benchmark-{uuid.uuid4().hex}"
+        results = []
+        errors = 0
+        for text, intent in turns:
+            started = time.perf_counter()
+            try:
+                ok = self.send(sender, text)
+            except requests.RequestException:
+                ok = False
+            elapsed = time.perf_counter() - started
+            if ok:
+                results.append({"intent": intent, "seconds": elapsed})
+            else:
+                errors += 1
+
+        actions = []
+        if self.tracker_url:
+            try:
+                actions = self.action_durations(sender)
+            except (requests.RequestException, ValueError):
+                pass  # the HTTP API is not enabled on this Rasa server
+        with self._lock:
+            self.turns.extend(results)
+            self.actions.extend(actions)
+            self.errors += errors
+
+
+def run_benchmark(args: argparse.Namespace, stack: Optional[LocalStack]) -> Dict[Text, Any]:
+    from frontend.rasa_client import RasaClient
+
+    conversations = load_conversations(args.stories)
+    if not conversations:
+        raise SystemExit(f"No conversations with user turns in {args.stories}")
+    client = RasaClient(args.rasa_url, read_timeout=args.timeout, retries=0, pool_size=args.concurrency)
+    base_url = args.rasa_url.split("/webhooks/", 1)[0]
+    driver = Driver(
+        client,
+        tracker_url=f"{base_url}/conversations/{{sender}}/tracker",
+        metadata={"learning_style": args.learning_style, "education_level": args.education_level, "interests": []},
+        stream_timeout=args.timeout,
+    )
+
+    # warm-up: one pass over every story, not measured
+    for _, turns in conversations:
+        driver.run_conversation(turns)
+    driver.turns, driver.actions, driver.errors = [], [], 0
+
+    pids = {name: process.pid for name, process in stack.processes.items()} if stack else {}
+    pids["driver"] = os.getpid()
+    scheduled = [conversations[i % len(conversations)][1] for i in range(args.conversations)]
+    with ResourceSampler(pids) as sampler:
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+            list(pool.map(driver.run_conversation, scheduled))
+        wall = time.perf_counter() - started
+
+    by_intent: Dict[Text, List[float]] = {}
+    for turn in driver.turns:
+        by_intent.setdefault(turn["intent"], []).append(turn["seconds"])
+    by_action: Dict[Text, List[float]] = {}
+    for name, seconds in driver.actions:
+        by_action.setdefault(name, []).append(seconds)
+
+    result = {
+        "config": {
+            "stories": args.stories,
+            "concurrency": args.concurrency,
+            "conversations": args.conversations,
+            "local_stack": stack is not None,
+            "streaming": args.stream,
+            "cache": not args.no_cache,
+            "profile_context": {"learning_style": args.learning_style, "education_level": args.education_level},
+        },
+        "wall_seconds": round(wall, 2),
+        "turns": len(driver.turns),
+        "errors": driver.errors,
+        "throughput_turns_per_second": round(len(driver.turns) / wall, 2) if wall else 0.0,
+        **summarize([turn["seconds"] for turn in driver.turns]),
+        "intents": {intent: summarize(values) for intent, values in sorted(by_intent.items())},
+        "actions": {name: summarize(values) for name, values in sorted(by_action.items())},
+        "resources": sampler.report(),
+    }
+    if stack is not None:
+        result["youtube_calls"] = stack.youtube_calls()
+    return result
+
+
+# ---------------------------------------------------------------------------
+# Reporting
+
+
+def print_report(result: Dict[Text, Any]) -> None:
+    print(
+        f"{result['turns']} turns in {result['wall_seconds']}s "
+        f"({result['throughput_turns_per_second']} turns/s, {result['errors']} errors)"
+    )
+    header = f"{'':<34}{'count':>7}{'p50 s':>9}{'p95 s':>9}{'p99 s':>9}"
+    for title, rows in (("intent", result["intents"]), ("action", result["actions"])):
+        if not rows:
+            continue
+        print()
+        print(f"{title:<34}" + header[34:])
+        for name, row in rows.items():
+            print(
+                f"{name:<34}{row['count']:>7}{row['latency_p50_seconds']:>9}"
+                f"{row['latency_p95_seconds']:>9}{row['latency_p99_seconds']:>9}"
+            )
+    print()
+    print(f"{'process':<12}{'peak MB':>10}{'cpu s':>9}{'cpu %':>8}")
+    for name, usage in result["resources"].items():
+        print(f"{name:<12}{usage['peak_rss_mb']:>10}{usage['cpu_seconds']:>9}{usage['cpu_percent']:>8}")
+
+
+def compare(result: Dict[Text, Any], baseline: Dict[Text, Any], tolerance: float) -> List[Text]:
+    """Print metric changes against a previous run and return the regressions beyond `tolerance`."""
+    rows = [("overall", result, baseline)]
+    rows += [(f"intent {name}", row, baseline.get("intents", {}).get(name)) for name, row in result["intents"].items()]
+    rows += [(f"action {name}", row, baseline.get("actions", {}).get(name)) for name, row in result["actions"].items()]
+
+    regressions = []
+    print()
+    print(f"{'':<34}{'metric':<30}{'before':>10}{'after':>10}{'change':>9}")
+    for label, current, previous in rows:
+        if not previous:
+            continue
+        for metric, higher_is_better in COMPARED_METRICS.items():
+            if metric not in current or not previous.get(metric):
+                continue
+            change = (current[metric] - previous[metric]) / previous[metric]
+            worse = -change if higher_is_better else change
+            flag = " !" if worse > tolerance else ""
+            print(f"{label:<34}{metric:<30}{previous[metric]:>10}{current[metric]:>10}{change:>+8.0%}{flag}")
+            if flag:
+                regressions.append(f"{label} {metric}")
+    return regressions
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark the Rasa message round trip.")
+    parser.add_argument("--stories", nargs="+", default=["tests/test_stories.yml"])
+    parser.add_argument("--concurrency", type=int, default=4, help="simulated learners at once")
+    parser.add_argument("--conversations", type=int, default=50, help="conversations replayed in total")
+    parser.add_argument("--rasa-url", default="http://localhost:5005/webhooks/rest/webhook")
+    parser.add_argument("--timeout", type=float, default=120.0, help="seconds to wait for each reply")
+    parser.add_argument("--learning-style", default="Visual")
+    parser.add_argument("--education-level", default="Undergraduate")
+    parser.add_argument("--start-stack", action="store_true",
+                        help="start the action server, Rasa and the YouTube stub locally")
+    parser.add_argument("--rasa-model", default="models", help="trained Rasa model (file or folder)")
+    parser.add_argument("--model", help="generation model for the local stack (default: tiny random T5)")
+    parser.add_argument("--tokenizer", default="google/flan-t5-small", help="tokenizer of the tiny T5")
+    parser.add_argument("--youtube-port", type=int, default=8089)
+    parser.add_argument("--youtube-latency", type=float, default=0.05, help="seconds added to each fake API call")
+    parser.add_argument("--stream", action="store_true", help="enable token streaming on the local action server (off by default, like STREAMING_ENABLED)")
+    parser.add_argument("--no-cache", action="store_true", help="disable the answer and video caches")
+    parser.add_argument("--startup-timeout", type=float, default=300.0)
+    parser.add_argument("--json", help="write the results to this file")
+    parser.add_argument("--compare", help="previous --json result to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.10,
+                        help="relative change counted as a regression by --compare")
+    args = parser.parse_args()
+
+    baseline = None
+    if args.compare:
+        # read first, --json may point at the same file
+        with open(args.compare) as f:
+            baseline = json.load(f)
+
+    if args.start_stack:
+        with LocalStack(args) as stack:
+            result = run_benchmark(args, stack)
+    else:
+        result = run_benchmark(args, None)
+
+    print_report(result)
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(result, f, indent=2)
+    if baseline is not None:
+        regressions = compare(result, baseline, args.tolerance)
+        if regressions:
+            print(f"\n{len(regressions)} regression(s) beyond {args.tolerance:.0%}")
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
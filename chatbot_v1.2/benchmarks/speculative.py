@@ -0,0 +1,147 @@
+"""
+Measure assisted (speculative) generation against the large model alone.
+
+Both variants generate the same topics with the same single-sequence
+decoding profile. Forward passes of the large and the draft model are
+counted with hooks, which gives the acceptance rate: every large-model pass
+yields one token of its own, so the remaining generated tokens are draft
+proposals it accepted. Run from the `chatbot_v1.2` folder:
+
+    python -m benchmarks.speculative --draft google/flan-t5-small
+    python -m benchmarks.speculative --model google/flan-t5-base --profile balanced --json speculative.json
+
+With the greedy `fast` profile both variants must produce identical text;
+the `output_match_rate` column checks it.
+"""
+
+import argparse
+import json
+import statistics
+import time
+from typing import Any, Dict, List, Text
+
+from benchmarks.backends import DEFAULT_TOPICS
+
+
+class ForwardCounter:
+    def __init__(self, module):
+        self.calls = 0
+        self._handle = module.register_forward_hook(self._count)
+
+    def _count(self, module, inputs, output) -> None:
+        self.calls += 1
+
+    def reset(self) -> int:
+        calls, self.calls = self.calls, 0
+        return calls
+
+    def remove(self) -> None:
+        self._handle.remove()
+
+
+def run_variant(backend, prompts: List[Text], params: Dict[Text, Any], runs: int) -> Dict[Text, Any]:
+    target = ForwardCounter(backend.model)
+    draft = ForwardCounter(backend.draft_model) if backend.draft_model is not None else None
+
+    latencies = []
+    texts = []
+    generated_tokens = target_calls = draft_calls = 0
+    try:
+        for run in range(runs):
+            for prompt in prompts:
+                started = time.perf_counter()
+                text = backend.generate([prompt], params)[0]
+                latencies.append(time.perf_counter() - started)
+                if run == 0:
+                    texts.append(text)
+                generated_tokens += len(backend.tokenizer(text).input_ids)
+                target_calls += target.reset()
+                draft_calls += draft.reset() if draft else 0
+    finally:
+        target.remove()
+        if draft:
+            draft.remove()
+
+    accepted = max(0, generated_tokens - target_calls)
+    return {
+        "texts": texts,
+        "latency_mean_seconds": round(statistics.mean(latencies), 3),
+        "latency_p50_seconds": round(statistics.median(latencies), 3),
+        "latency_max_seconds": round(max(latencies), 3),
+        "generated_tokens": generated_tokens,
+        "target_forward_calls": target_calls,
+        "draft_forward_calls": draft_calls,
+        "tokens_per_target_call": round(generated_tokens / target_calls, 2) if target_calls else 0.0,
+        "acceptance_rate": round(accepted / draft_calls, 3) if draft_calls else None,
+    }
+
+
+def main() -> None:
+    from actions.actions import PROMPT_TEMPLATE
+    from actions.backends import create_backend
+    from actions.profiles import GENERATION_PROFILES
+
+    parser = argparse.ArgumentParser(description="Benchmark assisted generation with a draft model.")
+    parser.add_argument("--model", default="google/flan-t5-large")
+    parser.add_argument("--draft", default="google/flan-t5-small")
+    parser.add_argument("--backend", default="torch", choices=["torch", "torch-int8"])
+    parser.add_argument("--profile", default="fast", choices=["fast", "balanced"],
+                        help="single-sequence profiles only; beam search cannot be assisted")
+    parser.add_argument("--topics", nargs="+", default=DEFAULT_TOPICS)
+    parser.add_argument("--runs", type=int, default=1, help="passes over the topic list")
+    parser.add_argument("--json", help="write the results to this file")
+    args = parser.parse_args()
+
+    import torch
+
+    params = GENERATION_PROFILES[args.profile]
+    prompts = [PROMPT_TEMPLATE.format(topic=topic) for topic in args.topics]
+    backend = create_backend(args.backend, args.model, draft_model_name=args.draft).load()
+    draft_model = backend.draft_model
+    # one untimed pass of each variant so lazy initialisation is not measured
+    backend.generate(prompts[:1], params)
+
+    results = {}
+    for variant in ("baseline", "assisted"):
+        backend.draft_model = draft_model if variant == "assisted" else None
+        if variant == "assisted":
+            backend.generate(prompts[:1], params)
+        # sampling profiles need the same random stream in both variants to be comparable
+        torch.manual_seed(0)
+        results[variant] = run_variant(backend, prompts, params, args.runs)
+        print(json.dumps({"variant": variant, **{k: v for k, v in results[variant].items() if k != "texts"}}))
+
+    baseline, assisted = results["baseline"], results["assisted"]
+    matches = sum(a == b for a, b in zip(baseline.pop("texts"), assisted.pop("texts")))
+    summary = {
+        "model": args.model,
+        "draft": args.draft,
+        "backend": args.backend,
+        "profile": args.profile,
+        "topics": len(prompts),
+        "runs": args.runs,
+        "speedup": round(baseline["latency_mean_seconds"] / assisted["latency_mean_seconds"], 2),
+        "acceptance_rate": assisted["acceptance_rate"],
+        "output_match_rate": round(matches / len(prompts), 3),
+        "baseline": baseline,
+        "assisted": assisted,
+    }
+
+    print()
+    print(f"{'variant':<10}{'mean s':>9}{'p50 s':>9}{'max s':>9}{'tok/pass':>10}{'accept':>9}")
+    for variant, result in (("baseline", baseline), ("assisted", assisted)):
+        acceptance = result["acceptance_rate"]
+        print(
+            f"{variant:<10}{result['latency_mean_seconds']:>9}{result['latency_p50_seconds']:>9}"
+            f"{result['latency_max_seconds']:>9}{result['tokens_per_target_call']:>10}"
+            f"{acceptance if acceptance is not None else '-':>9}"
+        )
+    print(f"speedup {summary['speedup']}x, identical outputs {summary['output_match_rate']:.0%}")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(summary, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,226 @@
+# Fast path for short, high-volume intents.
+#
+# "hi", "bye", "yes" and "are you a bot?" make up a large share of the
+# traffic, and each of them used to go through the featurizers, DIET and
+# the ResponseSelector. `FastPathIntentClassifier` sits first in the
+# pipeline with an index of the training examples of a few configured
+# intents and answers messages that match one of them exactly, or within
+# one typo, after normalisation. `FastPathDIETClassifier` is DIET that
+# leaves those messages alone; everything else, including all `topic`
+# messages, is classified by DIET as before.
+#
+# The index holds the examples of every intent, so a message that matches
+# (or nearly matches) examples of two intents, or of an intent outside the
+# fast path, is ambiguous and falls through to DIET.
+
+import json
+import re
+from typing import Any, Dict, Iterable, List, Optional, Set, Text, Tuple
+
+from rasa.engine.graph import ExecutionContext, GraphComponent
+from rasa.engine.recipes.default_recipe import DefaultV1Recipe
+from rasa.engine.storage.resource import Resource
+from rasa.engine.storage.storage import ModelStorage
+from rasa.nlu.classifiers.classifier import IntentClassifier
+from rasa.nlu.classifiers.diet_classifier import DIETClassifier
+from rasa.shared.nlu.constants import (
+    INTENT,
+    INTENT_NAME_KEY,
+    INTENT_RANKING_KEY,
+    PREDICTED_CONFIDENCE_KEY,
+    TEXT,
+)
+from rasa.shared.nlu.training_data.message import Message
+from rasa.shared.nlu.training_data.training_data import TrainingData
+
+# message property marking messages answered by the fast path
+FAST_PATH_MATCH = "fast_path_match"
+
+DEFAULT_INTENTS = ["greet", "goodbye", "affirm", "deny", "bot_challenge", "who_created_you"]
+
+_PUNCTUATION = re.compile(r"[^\w\s']+")
+_WHITESPACE = re.compile(r"\s+")
+
+
+def normalize_text(text: Text) -> Text:
+    """Lower-cased words without punctuation: "Bye-bye!" -> "bye bye"."""
+    return _WHITESPACE.sub(" ", _PUNCTUATION.sub(" ", text.lower())).strip()
+
+
+def deletions(key: Text) -> Set[Text]:
+    return {key[:i] + key[i + 1:] for i in range(len(key))}
+
+
+class FastPathIndex:
+    """Exact and one-edit lookup of normalised examples.
+
+    One-edit matches use deletion neighbourhoods: a message is within one
+    insertion, deletion or substitution of an example when the two share
+    the message itself or one of its single-character deletions.
+    """
+
+    def __init__(
+        self,
+        exact: Dict[Text, List[Text]],
+        near: Dict[Text, List[Text]],
+        intents: Iterable[Text],
+        min_length_for_edits: int = 5,
+    ):
+        self.exact = exact
+        self.near = near
+        self.intents = set(intents)
+        self.min_length_for_edits = min_length_for_edits
+
+    @classmethod
+    def build(
+        cls,
+        examples: Iterable[Tuple[Text, Text]],
+        intents: Iterable[Text],
+        near_exact: bool = True,
+        min_length_for_edits: int = 5,
+    ) -> "FastPathIndex":
+        """Index `(text, intent)` examples; only `intents` are answered, the rest only disambiguate."""
+        exact: Dict[Text, Set[Text]] = {}
+        near: Dict[Text, Set[Text]] = {}
+        for text, intent in examples:
+            key = normalize_text(text)
+            if not key:
+                continue
+            exact.setdefault(key, set()).add(intent)
+            # short examples like "no" or "nope" are one typo away from too many words
+            if near_exact and len(key) >= min_length_for_edits:
+                for variant in deletions(key) | {key}:
+                    near.setdefault(variant, set()).add(intent)
+        return cls(
+            {key: sorted(labels) for key, labels in exact.items()},
+            {key: sorted(labels) for key, labels in near.items()},
+            intents,
+            min_length_for_edits,
+        )
+
+    def lookup(self, text: Text) -> Optional[Text]:
+        """The intent of `text`, or None when it is unknown or ambiguous."""
+        key = normalize_text(text)
+        labels = self.exact.get(key)
+        if labels is None and self.near and len(key) >= self.min_length_for_edits - 1:
+            found: Set[Text] = set()
+            for variant in deletions(key) | {key}:
+                found.update(self.near.get(variant, ()))
+            labels = sorted(found) or None
+        if labels is None or len(labels) != 1 or labels[0] not in self.intents:
+            return None
+        return labels[0]
+
+    def to_dict(self) -> Dict[Text, Any]:
+        return {
+            "exact": self.exact,
+            "near": self.near,
+            "intents": sorted(self.intents),
+            "min_length_for_edits": self.min_length_for_edits,
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[Text, Any]) -> "FastPathIndex":
+        return cls(data["exact"], data["near"], data["intents"], data["min_length_for_edits"])
+
+
+@DefaultV1Recipe.register([DefaultV1Recipe.ComponentType.INTENT_CLASSIFIER], is_trainable=True)
+class FastPathIntentClassifier(GraphComponent, IntentClassifier):
+    """Classifies exact and near-exact matches of a few simple intents before DIET runs."""
+
+    INDEX_FILE = "fast_path_index.json"
+
+    @staticmethod
+    def get_default_config() -> Dict[Text, Any]:
+        return {
+            # intents answered by the fast path
+            "intents": DEFAULT_INTENTS,
+            # also accept messages one typo away from an example
+            "near_exact": True,
+            # shortest example that is matched with a typo
+            "min_length_for_edits": 5,
+        }
+
+    def __init__(
+        self,
+        config: Dict[Text, Any],
+        model_storage: ModelStorage,
+        resource: Resource,
+        index: Optional[FastPathIndex] = None,
+    ):
+        self.component_config = config
+        self._model_storage = model_storage
+        self._resource = resource
+        self.index = index
+
+    @classmethod
+    def create(
+        cls,
+        config: Dict[Text, Any],
+        model_storage: ModelStorage,
+        resource: Resource,
+        execution_context: ExecutionContext,
+    ) -> "FastPathIntentClassifier":
+        return cls(config, model_storage, resource)
+
+    def train(self, training_data: TrainingData) -> Resource:
+        examples = [
+            (example.get(TEXT), example.get(INTENT))
+            for example in training_data.intent_examples
+            if example.get(TEXT) and example.get(INTENT)
+        ]
+        self.index = FastPathIndex.build(
+            examples,
+            self.component_config["intents"],
+            near_exact=self.component_config["near_exact"],
+            min_length_for_edits=self.component_config["min_length_for_edits"],
+        )
+        with self._model_storage.write_to(self._resource) as directory:
+            with open(directory / self.INDEX_FILE, "w", encoding="utf-8") as f:
+                json.dump(self.index.to_dict(), f)
+        return self._resource
+
+    @classmethod
+    def load(
+        cls,
+        config: Dict[Text, Any],
+        model_storage: ModelStorage,
+        resource: Resource,
+        execution_context: ExecutionContext,
+        **kwargs: Any,
+    ) -> "FastPathIntentClassifier":
+        try:
+            with model_storage.read_from(resource) as directory:
+                with open(directory / cls.INDEX_FILE, encoding="utf-8") as f:
+                    index = FastPathIndex.from_dict(json.load(f))
+        except (ValueError, OSError):
+            # not trained (e.g. no NLU data): every message falls through
+            index = None
+        return cls(config, model_storage, resource, index)
+
+    def process(self, messages: List[Message]) -> List[Message]:
+        if self.index is None:
+            return messages
+        for message in messages:
+            intent = self.index.lookup(message.get(TEXT) or "")
+            if intent is None:
+                continue
+            prediction = {INTENT_NAME_KEY: intent, PREDICTED_CONFIDENCE_KEY: 1.0}
+            message.set(INTENT, prediction, add_to_output=True)
+            message.set(INTENT_RANKING_KEY, [prediction], add_to_output=True)
+            message.set(FAST_PATH_MATCH, True)
+        return messages
+
+
+@DefaultV1Recipe.register(
+    [DefaultV1Recipe.ComponentType.INTENT_CLASSIFIER, DefaultV1Recipe.ComponentType.ENTITY_EXTRACTOR],
+    is_trainable=True,
+)
+class FastPathDIETClassifier(DIETClassifier):
+    """DIETClassifier that skips messages already classified by `FastPathIntentClassifier`."""
+
+    def process(self, messages: List[Message]) -> List[Message]:
+        pending = [message for message in messages if not message.get(FAST_PATH_MATCH)]
+        if pending:
+            super().process(pending)
+        return messages
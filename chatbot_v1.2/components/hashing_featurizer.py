@@ -0,0 +1,173 @@
+# Sparse n-gram features without a vocabulary.
+#
+# The char_wb 1-4-gram CountVectorsFeaturizer keeps every n-gram seen in
+# training as a string in its vocabulary, which grows with `nlu.yml` and is
+# pickled into the model. `HashingFeaturizer` hashes the n-grams of each
+# token into `n_features` buckets instead. With `min_df`, buckets that
+# occur in fewer training examples are dropped and the rest are renumbered,
+# so DIET's input layer only grows with the buckets actually used; the model
+# stores those bucket numbers as one int32 array.
+#
+# Features are built as CSR matrices straight from the hashed n-grams and
+# stay sparse: one row per token for the sequence features and the sum of
+# the rows for the sentence features.
+
+import logging
+from typing import Any, Dict, List, Optional, Text, Type
+
+import numpy as np
+import scipy.sparse
+from sklearn.feature_extraction.text import HashingVectorizer
+
+from rasa.engine.graph import ExecutionContext, GraphComponent
+from rasa.engine.recipes.default_recipe import DefaultV1Recipe
+from rasa.engine.storage.resource import Resource
+from rasa.engine.storage.storage import ModelStorage
+from rasa.nlu.constants import DENSE_FEATURIZABLE_ATTRIBUTES, TOKENS_NAMES
+from rasa.nlu.featurizers.sparse_featurizer.sparse_featurizer import SparseFeaturizer
+from rasa.nlu.tokenizers.tokenizer import Tokenizer
+from rasa.shared.nlu.training_data.message import Message
+from rasa.shared.nlu.training_data.training_data import TrainingData
+
+logger = logging.getLogger(__name__)
+
+
+@DefaultV1Recipe.register(DefaultV1Recipe.ComponentType.MESSAGE_FEATURIZER, is_trainable=True)
+class HashingFeaturizer(SparseFeaturizer, GraphComponent):
+    """Hashed word or character n-gram counts, with optional document-frequency pruning."""
+
+    BUCKETS_FILE = "buckets.npy"
+
+    @classmethod
+    def required_components(cls) -> List[Type]:
+        return [Tokenizer]
+
+    @staticmethod
+    def get_default_config() -> Dict[Text, Any]:
+        return {
+            **SparseFeaturizer.get_default_config(),
+            # "word", "char" or "char_wb" (character n-grams inside word boundaries)
+            "analyzer": "char_wb",
+            "min_ngram": 1,
+            "max_ngram": 4,
+            # hash buckets; collisions become rare well above the number of distinct n-grams
+            "n_features": 2 ** 18,
+            # keep buckets seen in at least this many training examples, 0 keeps all n_features
+            "min_df": 1,
+            "lowercase": True,
+        }
+
+    def __init__(
+        self,
+        config: Dict[Text, Any],
+        model_storage: ModelStorage,
+        resource: Resource,
+        execution_context: ExecutionContext,
+        buckets: Optional[np.ndarray] = None,
+    ):
+        super().__init__(execution_context.node_name, config)
+        self._model_storage = model_storage
+        self._resource = resource
+        self._is_finetuning = execution_context.is_finetuning
+        self.vectorizer = HashingVectorizer(
+            analyzer=config["analyzer"],
+            ngram_range=(config["min_ngram"], config["max_ngram"]),
+            n_features=config["n_features"],
+            lowercase=config["lowercase"],
+            alternate_sign=False,
+            norm=None,
+            dtype=np.float32,
+        )
+        self._set_buckets(buckets)
+
+    def _set_buckets(self, buckets: Optional[np.ndarray]) -> None:
+        self.buckets = buckets
+        if buckets is None:
+            self._remap = None
+            self.dimension = self._config["n_features"]
+        else:
+            # bucket -> column, -1 for pruned buckets
+            self._remap = np.full(self._config["n_features"], -1, dtype=np.int32)
+            self._remap[buckets] = np.arange(len(buckets), dtype=np.int32)
+            self.dimension = len(buckets)
+
+    @classmethod
+    def create(
+        cls,
+        config: Dict[Text, Any],
+        model_storage: ModelStorage,
+        resource: Resource,
+        execution_context: ExecutionContext,
+    ) -> "HashingFeaturizer":
+        return cls(config, model_storage, resource, execution_context)
+
+    def train(self, training_data: TrainingData) -> Resource:
+        # fine-tuning keeps the columns DIET was trained on; new n-grams only hit kept buckets
+        if self._config["min_df"] > 0 and not (self._is_finetuning and self.buckets is not None):
+            document_frequency = np.zeros(self._config["n_features"], dtype=np.int32)
+            for message in training_data.training_examples:
+                for attribute in DENSE_FEATURIZABLE_ATTRIBUTES:
+                    tokens = message.get(TOKENS_NAMES[attribute])
+                    if tokens:
+                        hashed = self.vectorizer.transform([token.text for token in tokens])
+                        document_frequency[np.unique(hashed.indices)] += 1
+            buckets = np.flatnonzero(document_frequency >= self._config["min_df"]).astype(np.int32)
+            self._set_buckets(buckets)
+            logger.debug(f"Kept {len(buckets)} of {self._config['n_features']} hash buckets.")
+
+        if self.buckets is not None:
+            with self._model_storage.write_to(self._resource) as directory:
+                np.save(directory / self.BUCKETS_FILE, self.buckets)
+        return self._resource
+
+    @classmethod
+    def load(
+        cls,
+        config: Dict[Text, Any],
+        model_storage: ModelStorage,
+        resource: Resource,
+        execution_context: ExecutionContext,
+        **kwargs: Any,
+    ) -> "HashingFeaturizer":
+        try:
+            with model_storage.read_from(resource) as directory:
+                buckets = np.load(directory / cls.BUCKETS_FILE)
+        except (ValueError, OSError):
+            # trained without pruning
+            buckets = None
+        return cls(config, model_storage, resource, execution_context, buckets)
+
+    def _sequence_features(self, tokens: List[Text]) -> scipy.sparse.csr_matrix:
+        hashed = self.vectorizer.transform(tokens)
+        if self._remap is None:
+            return hashed
+        columns = self._remap[hashed.indices]
+        kept = columns >= 0
+        rows = np.repeat(np.arange(hashed.shape[0]), np.diff(hashed.indptr))
+        indptr = np.zeros(hashed.shape[0] + 1, dtype=hashed.indptr.dtype)
+        np.cumsum(np.bincount(rows[kept], minlength=hashed.shape[0]), out=indptr[1:])
+        return scipy.sparse.csr_matrix(
+            (hashed.data[kept], columns[kept], indptr),
+            shape=(hashed.shape[0], self.dimension),
+        )
+
+    def _featurize(self, message: Message) -> None:
+        for attribute in DENSE_FEATURIZABLE_ATTRIBUTES:
+            tokens = message.get(TOKENS_NAMES[attribute])
+            if not tokens:
+                continue
+            sequence = self._sequence_features([token.text for token in tokens])
+            # summing through a sparse product; `sum(axis=0)` would build a dense row
+            ones = scipy.sparse.csr_matrix(np.ones((1, sequence.shape[0]), dtype=np.float32))
+            sentence = (ones @ sequence).tocsr()
+            self.add_features_to_message(sequence, sentence, attribute, message)
+
+    def process_training_data(self, training_data: TrainingData) -> TrainingData:
+        for message in training_data.training_examples:
+            self._featurize(message)
+        return training_data
+
+    def process(self, messages: List[Message]) -> List[Message]:
+        for message in messages:
+            self._featurize(message)
+        return messages
@@ -0,0 +1,76 @@
+import json
+
+import pytest
+
+pytest.importorskip("rasa")
+
+from components.fast_path import FastPathIndex, deletions, normalize_text  # noqa: E402
+
+EXAMPLES = [
+    ("Hello!", "greet"),
+    ("good morning", "greet"),
+    ("Bye-bye", "goodbye"),
+    ("see you later", "goodbye"),
+    ("yes", "affirm"),
+    ("no", "deny"),
+    ("are you a bot?", "bot_challenge"),
+    ("good evening", "greet"),
+    ("good evening", "mood_great"),
+    ("explain machine learning", "topic"),
+]
+
+
+@pytest.fixture
+def index():
+    return FastPathIndex.build(EXAMPLES, ["greet", "goodbye", "affirm", "deny", "bot_challenge"])
+
+
+def test_normalize_text():
+    assert normalize_text("  Bye-bye!  ") == "bye bye"
+    assert normalize_text("What's UP?") == "what's up"
+
+
+def test_deletions():
+    assert deletions("abc") == {"bc", "ac", "ab"}
+
+
+def test_exact_matches_after_normalisation(index):
+    assert index.lookup("hello") == "greet"
+    assert index.lookup("BYE BYE!!") == "goodbye"
+    assert index.lookup("Yes.") == "affirm"
+
+
+def test_one_typo_matches(index):
+    assert index.lookup("helo") == "greet"
+    assert index.lookup("good mornin") == "greet"
+    assert index.lookup("see you latter") == "goodbye"
+    assert index.lookup("are you a bat") == "bot_challenge"
+
+
+def test_two_typos_do_not_match(index):
+    assert index.lookup("gud mornin") is None
+
+
+def test_short_examples_need_an_exact_match(index):
+    assert index.lookup("yes") == "affirm"
+    assert index.lookup("yos") is None
+    assert index.lookup("nah") is None
+
+
+def test_ambiguous_and_other_intents_fall_through(index):
+    assert index.lookup("good evening") is None
+    assert index.lookup("explain machine learning") is None
+    assert index.lookup("explain machine learnin") is None
+    assert index.lookup("what is photosynthesis") is None
+
+
+def test_exact_only_index(index):
+    exact_only = FastPathIndex.build(EXAMPLES, ["greet"], near_exact=False)
+    assert exact_only.lookup("hello") == "greet"
+    assert exact_only.lookup("helo") is None
+
+
+def test_round_trip_through_json(index):
+    restored = FastPathIndex.from_dict(json.loads(json.dumps(index.to_dict())))
+    for text in ("hello", "helo", "good evening", "see you latter", "yos"):
+        assert restored.lookup(text) == index.lookup(text)
@@ -0,0 +1,82 @@
+import pytest
+
+pytest.importorskip("sklearn")
+pytest.importorskip("rasa")
+
+import numpy as np  # noqa: E402
+from rasa.engine.graph import ExecutionContext, GraphSchema  # noqa: E402
+from rasa.engine.storage.local_model_storage import LocalModelStorage  # noqa: E402
+from rasa.engine.storage.resource import Resource  # noqa: E402
+from rasa.nlu.tokenizers.whitespace_tokenizer import WhitespaceTokenizer  # noqa: E402
+from rasa.shared.nlu.constants import TEXT  # noqa: E402
+from rasa.shared.nlu.training_data.message import Message  # noqa: E402
+from rasa.shared.nlu.training_data.training_data import TrainingData  # noqa: E402
+
+from components.hashing_featurizer import HashingFeaturizer  # noqa: E402
+
+
+@pytest.fixture
+def model_storage(tmp_path):
+    return LocalModelStorage(tmp_path)
+
+
+@pytest.fixture
+def context():
+    return ExecutionContext(GraphSchema({}), node_name="hashing_featurizer")
+
+
+def tokenized(texts, model_storage, context):
+    tokenizer = WhitespaceTokenizer.create(
+        WhitespaceTokenizer.get_default_config(), model_storage, Resource("tokenizer"), context
+    )
+    messages = [Message(data={TEXT: text, "intent": "greet"}) for text in texts]
+    tokenizer.process_training_data(TrainingData(training_examples=messages))
+    return messages
+
+
+def featurizer(model_storage, context, **config):
+    config = {
+        **HashingFeaturizer.get_default_config(),
+        "analyzer": "word", "min_ngram": 1, "max_ngram": 1, "n_features": 2 ** 18, **config,
+    }
+    return HashingFeaturizer.create(config, model_storage, Resource("hashing_featurizer"), context)
+
+
+def features(message):
+    sequence, sentence = message.get_sparse_features(TEXT, [])
+    return sequence.features, sentence.features
+
+
+def test_without_pruning_every_token_gets_a_hashed_row(model_storage, context):
+    component = featurizer(model_storage, context, min_df=0)
+    component.train(TrainingData(training_examples=tokenized(["hello world"], model_storage, context)))
+    [message] = component.process(tokenized(["hello hello world"], model_storage, context))
+    sequence, sentence = features(message)
+    assert sequence.shape == (3, 2 ** 18)
+    assert list(np.diff(sequence.indptr)) == [1, 1, 1]
+    assert sentence.shape == (1, 2 ** 18)
+    assert sorted(sentence.data) == [1.0, 2.0]
+
+
+def test_min_df_keeps_only_frequent_buckets(model_storage, context):
+    component = featurizer(model_storage, context, min_df=2)
+    examples = tokenized(["hello world", "hello there", "bye world"], model_storage, context)
+    component.train(TrainingData(training_examples=examples))
+    assert component.dimension == len(component.buckets) == 2
+
+    [message] = component.process(tokenized(["hello there"], model_storage, context))
+    sequence, sentence = features(message)
+    assert sequence.shape == (2, 2)
+    # "there" occurs in a single example, so its bucket was pruned
+    assert list(np.diff(sequence.indptr)) == [1, 0]
+    assert sentence.nnz == 1
+
+
+def test_kept_buckets_survive_persistence(model_storage, context):
+    component = featurizer(model_storage, context, min_df=2)
+    resource = component.train(TrainingData(
+        training_examples=tokenized(["hello world", "hello there", "bye world"], model_storage, context)
+    ))
+    loaded = HashingFeaturizer.load(component._config, model_storage, resource, context)
+    assert np.array_equal(loaded.buckets, component.buckets)
+    assert loaded.dimension == 2
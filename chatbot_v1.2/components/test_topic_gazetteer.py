@@ -0,0 +1,53 @@
+import pytest
+
+pytest.importorskip("rasa")
+
+from components.topic_gazetteer import TopicTrie, topic_key, topic_words  # noqa: E402
+
+
+@pytest.fixture
+def trie():
+    return TopicTrie({
+        "machine learning": "machine learning",
+        "ml": "machine learning",
+        "neural networks": "neural networks",
+        "neural": "neural networks",
+        "object oriented programming": "object-oriented programming",
+        "learning": "learning",
+    })
+
+
+def test_topic_key_lowercases_words_and_drops_punctuation():
+    assert topic_words("Object-Oriented  Programming?") == ["object", "oriented", "programming"]
+    assert topic_key("  Machine\tLearning! ") == "machine learning"
+
+
+def test_find_returns_spans_and_canonical_names(trie):
+    text = "Explain ML and neural networks"
+    matches = trie.find(text)
+    assert matches == [(8, 10, "machine learning"), (15, 30, "neural networks")]
+    assert [text[start:end] for start, end, _ in matches] == ["ML", "neural networks"]
+
+
+def test_find_prefers_the_longest_match(trie):
+    assert trie.find("what is machine learning") == [(8, 24, "machine learning")]
+    assert trie.find("deep learning") == [(5, 13, "learning")]
+
+
+def test_find_falls_back_to_a_shorter_prefix(trie):
+    assert trie.find("neural nets") == [(0, 6, "neural networks")]
+
+
+def test_find_matches_whole_words_only(trie):
+    assert trie.find("html and mlops") == []
+    assert trie.find("object-oriented programming in Java") == [(0, 27, "object-oriented programming")]
+
+
+def test_canonical(trie):
+    assert trie.canonical("Object Oriented Programming") == "object-oriented programming"
+    assert trie.canonical("ML") == "machine learning"
+    assert trie.canonical("quantum computing") is None
+
+
+def test_empty_trie_finds_nothing():
+    assert TopicTrie({}).find("machine learning") == []
@@ -0,0 +1,244 @@
+# Gazetteer for the `topic` entity.
+#
+# When DIET misses the topic in "what is quantum computing?", the action can
+# only answer "I couldn't find a topic" and the learner has to ask again.
+# `TopicGazetteer` runs after DIET and the EntitySynonymMapper with every
+# known topic in a word trie: the `[...](topic)` annotations and the `topic`
+# lookup table of the NLU data (`data/topics.yml`), and their synonyms.
+#
+# - a known topic DIET did not tag is added as a `topic` entity, for
+#   messages classified as one of `intents`
+# - a DIET topic inside a longer known topic is widened to it
+# - every topic value is replaced by its canonical name ("ML" and
+#   "machine learning" both become "machine learning"), so the action's
+#   caches and knowledge base see one key per topic
+#
+# The message is scanned once: at each word the trie is walked as far as it
+# matches, so the cost grows with the message length times the longest
+# topic, not with the number of topics.
+
+import json
+import re
+from typing import Any, Dict, Iterable, List, Optional, Text, Tuple
+
+from rasa.engine.graph import ExecutionContext, GraphComponent
+from rasa.engine.recipes.default_recipe import DefaultV1Recipe
+from rasa.engine.storage.resource import Resource
+from rasa.engine.storage.storage import ModelStorage
+from rasa.nlu.extractors.extractor import EntityExtractorMixin
+from rasa.shared.nlu.constants import (
+    ENTITIES,
+    ENTITY_ATTRIBUTE_END,
+    ENTITY_ATTRIBUTE_START,
+    ENTITY_ATTRIBUTE_TYPE,
+    ENTITY_ATTRIBUTE_VALUE,
+    INTENT,
+    INTENT_NAME_KEY,
+    TEXT,
+)
+from rasa.shared.nlu.training_data.message import Message
+from rasa.shared.nlu.training_data.training_data import TrainingData
+
+_WORD = re.compile(r"\w+")
+_END = ""
+
+
+def topic_words(text: Text) -> List[Text]:
+    return [word.lower() for word in _WORD.findall(text)]
+
+
+def topic_key(text: Text) -> Text:
+    return " ".join(topic_words(text))
+
+
+class TopicTrie:
+    """Longest-match lookup of known topics in a text, by whole words."""
+
+    def __init__(self, aliases: Dict[Text, Text]):
+        # normalised alias -> canonical topic
+        self.aliases = aliases
+        self.root: Dict[Text, Any] = {}
+        for alias, canonical in aliases.items():
+            node = self.root
+            for word in alias.split():
+                node = node.setdefault(word, {})
+            node[_END] = canonical
+
+    def canonical(self, text: Text) -> Optional[Text]:
+        return self.aliases.get(topic_key(text))
+
+    def find(self, text: Text) -> List[Tuple[int, int, Text]]:
+        """(start, end, canonical topic) of every non-overlapping longest match, left to right."""
+        words = [(match.start(), match.end(), match.group().lower()) for match in _WORD.finditer(text)]
+        matches = []
+        i = 0
+        while i < len(words):
+            node = self.root
+            longest = None
+            j = i
+            while j < len(words) and words[j][2] in node:
+                node = node[words[j][2]]
+                j += 1
+                if _END in node:
+                    longest = (j, node[_END])
+            if longest is None:
+                i += 1
+                continue
+            end, canonical = longest
+            matches.append((words[i][0], words[end - 1][1], canonical))
+            i = end
+        return matches
+
+
+def collect_aliases(training_data: TrainingData, entity: Text) -> Dict[Text, Text]:
+    """Normalised alias -> canonical name of every `entity` value known to the training data."""
+    synonyms = {topic_key(alias): canonical for alias, canonical in training_data.entity_synonyms.items()}
+
+    def add(aliases: Dict[Text, Text], names: Iterable[Tuple[Text, Text]]) -> None:
+        for alias, canonical in names:
+            key = topic_key(alias)
+            if key:
+                aliases[key] = synonyms.get(topic_key(canonical), canonical)
+
+    aliases: Dict[Text, Text] = {}
+    for example in training_data.entity_examples:
+        text = example.get(TEXT)
+        add(aliases, (
+            (text[annotation[ENTITY_ATTRIBUTE_START]:annotation[ENTITY_ATTRIBUTE_END]],
+             annotation.get(ENTITY_ATTRIBUTE_VALUE) or text[annotation[ENTITY_ATTRIBUTE_START]:annotation[ENTITY_ATTRIBUTE_END]])
+            for annotation in example.get(ENTITIES) or []
+            if annotation[ENTITY_ATTRIBUTE_TYPE] == entity
+        ))
+    for table in training_data.lookup_tables:
+        if table["name"] != entity:
+            continue
+        elements = table["elements"]
+        if isinstance(elements, str):
+            with open(elements, encoding="utf-8") as f:
+                elements = [line.strip() for line in f if line.strip()]
+        add(aliases, ((element, element) for element in elements))
+    known = set(aliases) | {topic_key(canonical) for canonical in aliases.values()}
+    # synonyms of other entities are left to them
+    add(aliases, (
+        (alias, canonical) for alias, canonical in training_data.entity_synonyms.items()
+        if topic_key(alias) in known or topic_key(canonical) in known
+    ))
+    return aliases
+
+
+@DefaultV1Recipe.register(DefaultV1Recipe.ComponentType.ENTITY_EXTRACTOR, is_trainable=True)
+class TopicGazetteer(GraphComponent, EntityExtractorMixin):
+    """Finds and canonicalises known topics that DIET missed or tagged partially."""
+
+    ALIASES_FILE = "topic_aliases.json"
+
+    @staticmethod
+    def get_default_config() -> Dict[Text, Any]:
+        return {
+            # entity filled by the gazetteer
+            "entity": "topic",
+            # intents for which a missed topic is added; known topics are canonicalised for any intent
+            "intents": ["topic"],
+        }
+
+    def __init__(
+        self,
+        config: Dict[Text, Any],
+        model_storage: ModelStorage,
+        resource: Resource,
+        trie: Optional[TopicTrie] = None,
+    ):
+        self.component_config = config
+        self._model_storage = model_storage
+        self._resource = resource
+        self.trie = trie
+
+    @classmethod
+    def create(
+        cls,
+        config: Dict[Text, Any],
+        model_storage: ModelStorage,
+        resource: Resource,
+        execution_context: ExecutionContext,
+    ) -> "TopicGazetteer":
+        return cls(config, model_storage, resource)
+
+    def train(self, training_data: TrainingData) -> Resource:
+        aliases = collect_aliases(training_data, self.component_config["entity"])
+        self.trie = TopicTrie(aliases)
+        with self._model_storage.write_to(self._resource) as directory:
+            with open(directory / self.ALIASES_FILE, "w", encoding="utf-8") as f:
+                json.dump(aliases, f, ensure_ascii=False)
+        return self._resource
+
+    @classmethod
+    def load(
+        cls,
+        config: Dict[Text, Any],
+        model_storage: ModelStorage,
+        resource: Resource,
+        execution_context: ExecutionContext,
+        **kwargs: Any,
+    ) -> "TopicGazetteer":
+        try:
+            with model_storage.read_from(resource) as directory:
+                with open(directory / cls.ALIASES_FILE, encoding="utf-8") as f:
+                    trie = TopicTrie(json.load(f))
+        except (ValueError, OSError):
+            trie = None
+        return cls(config, model_storage, resource, trie)
+
+    def process(self, messages: List[Message]) -> List[Message]:
+        if not self.trie or not self.trie.aliases:
+            return messages
+        for message in messages:
+            self._process_message(message)
+        return messages
+
+    def _process_message(self, message: Message) -> None:
+        entity_type = self.component_config["entity"]
+        text = message.get(TEXT) or ""
+        entities = message.get(ENTITIES, [])[:]
+        topics = [entity for entity in entities if entity[ENTITY_ATTRIBUTE_TYPE] == entity_type]
+        intent = (message.get(INTENT) or {}).get(INTENT_NAME_KEY)
+
+        added = []
+        for start, end, canonical in self.trie.find(text):
+            overlapping = [
+                entity for entity in topics
+                if entity[ENTITY_ATTRIBUTE_START] < end and start < entity[ENTITY_ATTRIBUTE_END]
+            ]
+            if not overlapping:
+                if intent in self.component_config["intents"]:
+                    added.append({
+                        ENTITY_ATTRIBUTE_TYPE: entity_type,
+                        ENTITY_ATTRIBUTE_START: start,
+                        ENTITY_ATTRIBUTE_END: end,
+                        ENTITY_ATTRIBUTE_VALUE: canonical,
+                    })
+                continue
+            # widen partial tags ("neural" in "neural networks") into one; keep longer ones as DIET saw them
+            partial = [
+                entity for entity in overlapping
+                if start <= entity[ENTITY_ATTRIBUTE_START] and entity[ENTITY_ATTRIBUTE_END] <= end
+            ]
+            if partial:
+                widened = partial[0]
+                widened[ENTITY_ATTRIBUTE_START] = start
+                widened[ENTITY_ATTRIBUTE_END] = end
+                widened[ENTITY_ATTRIBUTE_VALUE] = canonical
+                self.add_processor_name(widened)
+                for entity in partial[1:]:
+                    entities.remove(entity)
+                    topics.remove(entity)
+
+        for entity in topics:
+            value = entity.get(ENTITY_ATTRIBUTE_VALUE)
+            canonical = self.trie.canonical(value) if isinstance(value, str) else None
+            if canonical is not None and canonical != value:
+                entity[ENTITY_ATTRIBUTE_VALUE] = canonical
+                self.add_processor_name(entity)
+
+        if added:
+            entities.extend(self.add_extractor_name(added))
+        message.set(ENTITIES, entities, add_to_output=True)
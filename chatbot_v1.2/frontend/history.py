@@ -0,0 +1,131 @@
+# Bounded chat-history storage for Streamlit sessions.
+#
+# Each browser session keeps only its most recent turns in memory, as
+# compact `__slots__` records in a ring buffer capped by message count and
+# text size. Turns pushed out of the ring are spilled to a SQLite file
+# shared by the whole Streamlit process (keyed by session id) and read
+# back page by page only when the learner scrolls back.
+
+import os
+import sqlite3
+import threading
+import time
+from collections import deque
+from typing import Deque, List, Optional, Text
+
+import streamlit as st
+
+from frontend import settings
+
+
+class ChatMessage:
+    __slots__ = ("id", "type", "message", "created_at")
+
+    def __init__(self, id: int, type: Text, message: Text, created_at: Optional[float] = None):
+        self.id = id
+        self.type = type
+        self.message = message
+        self.created_at = created_at if created_at is not None else time.time()
+
+    def size(self) -> int:
+        return len(self.message)
+
+
+class SpillStore:
+    """Append-only SQLite table of chat turns evicted from memory."""
+
+    def __init__(self, path: Text, retention: float = 24 * 3600.0):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        # Streamlit runs every session on its own thread; share one connection behind a lock
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS chat_messages ("
+            " session_id TEXT NOT NULL,"
+            " id INTEGER NOT NULL,"
+            " type TEXT NOT NULL,"
+            " message TEXT NOT NULL,"
+            " created_at REAL NOT NULL,"
+            " PRIMARY KEY (session_id, id))"
+        )
+        # sessions do not tell us when they end, so old turns are purged by age
+        self._conn.execute("DELETE FROM chat_messages WHERE created_at < ?", (time.time() - retention,))
+        self._conn.commit()
+        self._lock = threading.Lock()
+
+    def append(self, session_id: Text, messages: List[ChatMessage]) -> None:
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO chat_messages (session_id, id, type, message, created_at) VALUES (?, ?, ?, ?, ?)",
+                [(session_id, m.id, m.type, m.message, m.created_at) for m in messages],
+            )
+            self._conn.commit()
+
+    def load(self, session_id: Text, before_id: int, limit: int) -> List[ChatMessage]:
+        """The `limit` newest spilled messages with an id below `before_id`, oldest first."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT id, type, message, created_at FROM chat_messages"
+                " WHERE session_id = ? AND id < ? ORDER BY id DESC LIMIT ?",
+                (session_id, before_id, limit),
+            ).fetchall()
+        return [ChatMessage(*row) for row in reversed(rows)]
+
+
+class ChatHistoryStore:
+    """Chat history of one session: a bounded in-memory ring plus spilled older turns."""
+
+    def __init__(self, session_id: Text, spill: Optional[SpillStore], max_messages: int = 100, max_chars: int = 200_000):
+        self.session_id = session_id
+        self.spill = spill
+        self.max_messages = max(1, max_messages)
+        self.max_chars = max_chars
+        self._recent: Deque[ChatMessage] = deque()
+        self._chars = 0
+        self._next_id = 0
+        self._spilled = 0
+
+    def __len__(self) -> int:
+        return self._spilled + len(self._recent)
+
+    def append(self, message_type: Text, text: Text) -> ChatMessage:
+        message = ChatMessage(self._next_id, message_type, text)
+        self._next_id += 1
+        self._recent.append(message)
+        self._chars += message.size()
+
+        evicted = []
+        # always keep the newest message in memory, even if it alone exceeds the cap
+        while len(self._recent) > 1 and (
+            len(self._recent) > self.max_messages or self._chars > self.max_chars
+        ):
+            old = self._recent.popleft()
+            self._chars -= old.size()
+            evicted.append(old)
+        if evicted:
+            if self.spill is not None:
+                self.spill.append(self.session_id, evicted)
+                self._spilled += len(evicted)
+            # without a spill store the oldest turns are simply dropped
+        return message
+
+    def last(self, count: int) -> List[ChatMessage]:
+        """The newest `count` messages, oldest first; older ones are read back from the spill store."""
+        recent = list(self._recent)
+        if count <= len(recent):
+            return recent[len(recent) - count:]
+        if self.spill is None or not self._spilled:
+            return recent
+        first_in_memory = recent[0].id if recent else self._next_id
+        return self.spill.load(self.session_id, first_in_memory, count - len(recent)) + recent
+
+
+@st.cache_resource(show_spinner=False)
+def get_spill_store(path: Text = settings.CHAT_SPILL_PATH, retention: float = settings.CHAT_SPILL_RETENTION) -> Optional[SpillStore]:
+    """One spill store per Streamlit process, shared by all sessions."""
+    if not path:
+        return None
+    return SpillStore(path, retention)
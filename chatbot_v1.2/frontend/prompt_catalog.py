@@ -0,0 +1,92 @@
+# Example-prompt catalog for the sidebar suggestions.
+#
+# The catalog is read from `example_prompts.yml` once per process and
+# flattened into an immutable index keyed by
+# (learning_style, interest, education_level), so a sidebar interaction
+# costs a few dictionary lookups instead of rebuilding the nested map.
+
+import os
+from types import MappingProxyType
+from typing import Dict, Iterable, List, Mapping, Sequence, Text, Tuple
+
+import streamlit as st
+import yaml
+
+CATALOG_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "example_prompts.yml")
+
+IndexKey = Tuple[Text, Text, Text]
+
+
+class PromptCatalog:
+    def __init__(self, index: Mapping[IndexKey, Tuple[Text, ...]], default_prompts: Sequence[Text]):
+        self.index = MappingProxyType(dict(index))
+        self.default_prompts = tuple(default_prompts)
+
+    @classmethod
+    def from_file(cls, path: Text = CATALOG_PATH) -> "PromptCatalog":
+        with open(path, encoding="utf-8") as f:
+            data = yaml.safe_load(f)
+
+        levels = data.get("education_levels", [])
+        index: Dict[IndexKey, Tuple[Text, ...]] = {}
+        for style, interests in data.get("prompts", {}).items():
+            for interest, entry in interests.items():
+                if isinstance(entry, dict):
+                    general = entry.get("all", [])
+                    by_level = {level: prompts for level, prompts in entry.items() if level != "all"}
+                else:
+                    general, by_level = entry, {}
+                for level in levels:
+                    # level-specific prompts rank ahead of the general ones
+                    index[(style, interest, level)] = tuple(by_level.get(level, [])) + tuple(general)
+
+        return cls(index, data.get("default_prompts", []))
+
+    def suggest(
+        self,
+        learning_style: Text,
+        interests: Iterable[Text],
+        education_level: Text,
+        limit: int = 5,
+    ) -> List[Text]:
+        """
+        Merge the prompts of every selected interest.
+
+        Lists are interleaved round-robin, so the best prompt of each
+        interest comes before the second-best of any, and duplicates are
+        dropped.
+        """
+        ranked = [
+            self.index[key]
+            for key in ((learning_style, interest, education_level) for interest in interests)
+            if key in self.index
+        ]
+        if not ranked:
+            return list(self.default_prompts[:limit])
+
+        suggestions: List[Text] = []
+        seen = set()
+        for rank in range(max(len(prompts) for prompts in ranked)):
+            for prompts in ranked:
+                if rank < len(prompts) and prompts[rank] not in seen:
+                    seen.add(prompts[rank])
+                    suggestions.append(prompts[rank])
+                    if len(suggestions) == limit:
+                        return suggestions
+        return suggestions
+
+
+@st.cache_resource(show_spinner=False)
+def load_prompt_catalog(path: Text = CATALOG_PATH) -> PromptCatalog:
+    """Read and index the catalog once per process; the index is shared read-only."""
+    return PromptCatalog.from_file(path)
+
+
+@st.cache_data(show_spinner=False)
+def suggested_prompts(
+    learning_style: Text,
+    interests: Tuple[Text, ...],
+    education_level: Text,
+    limit: int = 5,
+) -> List[Text]:
+    return load_prompt_catalog().suggest(learning_style, interests, education_level, limit)
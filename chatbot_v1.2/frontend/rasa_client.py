@@ -0,0 +1,71 @@
+# Pooled HTTP client for the Rasa REST channel.
+#
+# One keep-alive Session is shared by every rerun of the Streamlit script
+# (and every browser session of the process), so messages reuse open TCP
+# connections instead of paying a new handshake each time. Every call has
+# connect/read timeouts so a stuck Rasa server cannot freeze the UI.
+#
+# The module does not import Streamlit, so headless tools such as the
+# round-trip benchmark can use the same client.
+
+import functools
+from typing import Any, Dict, Text
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from frontend import settings
+
+
+class RasaClient:
+    def __init__(
+        self,
+        webhook_url: Text,
+        connect_timeout: float = 3.05,
+        read_timeout: float = 60.0,
+        retries: int = 2,
+        backoff_factor: float = 0.3,
+        pool_size: int = 10,
+    ):
+        self.webhook_url = webhook_url
+        self.timeout = (connect_timeout, read_timeout)
+        self.connect_timeout = connect_timeout
+
+        # Posting a message is not idempotent: a 502/504 from a proxy may come
+        # after Rasa handled the message, so only requests that never
+        # connected are retried.
+        retry = Retry(
+            total=retries,
+            connect=retries,
+            read=0,
+            status=0,
+            allowed_methods=frozenset({"GET", "POST"}),
+            backoff_factor=backoff_factor,
+            raise_on_status=False,
+        )
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retry)
+        self.session = requests.Session()
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self.session.headers.update({"Content-Type": "application/json"})
+
+    def send_message(self, payload: Dict[Text, Any]) -> requests.Response:
+        return self.session.post(self.webhook_url, json=payload, timeout=self.timeout)
+
+    def open_stream(self, url: Text, read_timeout: float) -> requests.Response:
+        """Open a streaming GET; use it as a context manager so the connection goes back to the pool."""
+        return self.session.get(url, stream=True, timeout=(self.connect_timeout, read_timeout))
+
+
+@functools.lru_cache(maxsize=None)
+def get_rasa_client(
+    webhook_url: Text = settings.RASA_WEBHOOK_URL,
+    connect_timeout: float = settings.RASA_CONNECT_TIMEOUT,
+    read_timeout: float = settings.RASA_READ_TIMEOUT,
+    retries: int = settings.RASA_RETRIES,
+    backoff_factor: float = settings.RASA_RETRY_BACKOFF,
+    pool_size: int = settings.RASA_POOL_SIZE,
+) -> RasaClient:
+    """Process-wide client, created once per settings and reused across Streamlit reruns."""
+    return RasaClient(webhook_url, connect_timeout, read_timeout, retries, backoff_factor, pool_size)
@@ -0,0 +1,46 @@
+# Runtime settings for the Streamlit front end, overridable through the
+# environment like the action server settings. The front end is deployed
+# on its own, so it reads the environment itself instead of importing the
+# action server package.
+
+import os
+from typing import Optional, Text
+
+
+def env_str(name: Text, default: Optional[Text] = None) -> Optional[Text]:
+    value = os.environ.get(name)
+    return value if value not in (None, "") else default
+
+
+def env_int(name: Text, default: int) -> int:
+    value = os.environ.get(name)
+    return int(value) if value not in (None, "") else default
+
+
+def env_float(name: Text, default: float) -> float:
+    value = os.environ.get(name)
+    return float(value) if value not in (None, "") else default
+
+
+# Rasa REST channel
+RASA_WEBHOOK_URL = env_str("RASA_WEBHOOK_URL", "http://localhost:5005/webhooks/rest/webhook")
+RASA_CONNECT_TIMEOUT = env_float("RASA_CONNECT_TIMEOUT", 3.05)  # seconds to establish a connection
+RASA_READ_TIMEOUT = env_float("RASA_READ_TIMEOUT", 60.0)        # seconds to wait for Rasa's reply
+RASA_RETRIES = env_int("RASA_RETRIES", 2)                        # connection failures only
+RASA_RETRY_BACKOFF = env_float("RASA_RETRY_BACKOFF", 0.3)
+RASA_POOL_SIZE = env_int("RASA_POOL_SIZE", 10)                   # keep-alive connections per host
+STREAM_READ_TIMEOUT = env_float("STREAM_READ_TIMEOUT", 120.0)    # seconds without streamed tokens
+
+# Chat history rendering
+CHAT_RENDER_WINDOW = env_int("CHAT_RENDER_WINDOW", 20)        # newest messages rendered on every rerun
+CHAT_HISTORY_PAGE_SIZE = env_int("CHAT_HISTORY_PAGE_SIZE", 20)  # older messages revealed per click
+
+# Chat history storage
+CHAT_MEMORY_MAX_MESSAGES = env_int("CHAT_MEMORY_MAX_MESSAGES", 100)  # turns kept in memory per session
+CHAT_MEMORY_MAX_CHARS = env_int("CHAT_MEMORY_MAX_CHARS", 200_000)   # text kept in memory per session
+CHAT_SPILL_PATH = env_str("CHAT_SPILL_PATH", ".cache/chat_history.sqlite3")  # empty to drop old turns
+CHAT_SPILL_RETENTION = env_float("CHAT_SPILL_RETENTION", 24 * 3600.0)  # seconds spilled turns are kept
+
+# Client-side latency telemetry
+TELEMETRY_WINDOW = env_int("TELEMETRY_WINDOW", 200)                 # responses kept per session for the panel
+TELEMETRY_PATH = env_str("TELEMETRY_PATH", ".cache/ui_metrics.jsonl")  # empty to disable the export
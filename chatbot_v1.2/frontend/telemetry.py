@@ -0,0 +1,161 @@
+# Client-side latency telemetry for the Streamlit app.
+#
+# Every message gets a `ResponseTiming` that splits its latency into:
+#
+#   server   request sent -> Rasa's response headers (NLU, policies and actions)
+#   network  the rest of the POST: connection set-up, body transfer, JSON decoding
+#   stream   reading a token stream from the action server, if the answer was streamed
+#   render   Streamlit rendering of the live answer and the chat history
+#
+# Timings are aggregated per browser session in a rolling window for the
+# sidebar performance panel, and appended as JSON lines to a local file with
+# the session id (the Rasa sender_id) and a wall-clock timestamp, so they can
+# be joined with the action server's per-request logs.
+
+import json
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Any, Deque, Dict, Iterator, List, Optional, Text
+
+import streamlit as st
+
+from frontend import settings
+
+PHASES = ("server", "network", "stream", "render")
+HISTOGRAM_BUCKETS = (0.25, 0.5, 1.0, 2.0, 5.0, 10.0, 30.0, 60.0)
+
+
+class ResponseTiming:
+    __slots__ = ("session_id", "started_at", "_started", "phases", "first_token_seconds", "total_seconds", "status")
+
+    def __init__(self, session_id: Text):
+        self.session_id = session_id
+        self.started_at = time.time()
+        self._started = time.perf_counter()
+        self.phases: Dict[Text, float] = dict.fromkeys(PHASES, 0.0)
+        self.first_token_seconds: Optional[float] = None
+        self.total_seconds: Optional[float] = None
+        self.status = "ok"
+
+    def add(self, phase: Text, seconds: float) -> None:
+        self.phases[phase] += seconds
+
+    @contextmanager
+    def phase(self, name: Text) -> Iterator[None]:
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(name, time.perf_counter() - started)
+
+    def mark_first_token(self) -> None:
+        if self.first_token_seconds is None:
+            self.first_token_seconds = time.perf_counter() - self._started
+
+    def finish(self) -> "ResponseTiming":
+        self.total_seconds = time.perf_counter() - self._started
+        return self
+
+    def to_dict(self) -> Dict[Text, Any]:
+        return {
+            "session_id": self.session_id,
+            "timestamp": round(self.started_at, 3),
+            "status": self.status,
+            "total_seconds": round(self.total_seconds or 0.0, 4),
+            "first_token_seconds": round(self.first_token_seconds, 4) if self.first_token_seconds is not None else None,
+            **{f"{name}_seconds": round(seconds, 4) for name, seconds in self.phases.items()},
+        }
+
+
+def percentile(values: List[float], q: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(q / 100 * len(ordered)))]
+
+
+class RollingTelemetry:
+    """The last `window` response timings of one browser session."""
+
+    def __init__(self, window: int = 200):
+        self.records: Deque[Dict[Text, Any]] = deque(maxlen=window)
+        self.errors = 0
+
+    def add(self, timing: ResponseTiming) -> None:
+        self.records.append(timing.to_dict())
+        if timing.status != "ok":
+            self.errors += 1
+
+    def __len__(self) -> int:
+        return len(self.records)
+
+    def summary(self) -> Dict[Text, Dict[Text, float]]:
+        """p50/p95 per phase, plus first token and total."""
+        summary = {}
+        for field in ("total",) + PHASES + ("first_token",):
+            values = [r[f"{field}_seconds"] for r in self.records if r.get(f"{field}_seconds") is not None]
+            summary[field] = {"p50": percentile(values, 50), "p95": percentile(values, 95)}
+        return summary
+
+    def histogram(self) -> Dict[Text, int]:
+        """Number of responses per total-latency bucket."""
+        labels = [f"≤{bound:g}s" for bound in HISTOGRAM_BUCKETS] + [f">{HISTOGRAM_BUCKETS[-1]:g}s"]
+        counts = dict.fromkeys(labels, 0)
+        for record in self.records:
+            for bound, label in zip(HISTOGRAM_BUCKETS, labels):
+                if record["total_seconds"] <= bound:
+                    counts[label] += 1
+                    break
+            else:
+                counts[labels[-1]] += 1
+        return counts
+
+
+class TelemetryExporter:
+    """Appends timings as JSON lines; shared by every session of the Streamlit process."""
+
+    def __init__(self, path: Text):
+        self.path = path
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._lock = threading.Lock()
+
+    def write(self, record: Dict[Text, Any]) -> None:
+        line = json.dumps(record) + "\n"
+        with self._lock:
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(line)
+
+
+@st.cache_resource(show_spinner=False)
+def get_telemetry_exporter(path: Text = settings.TELEMETRY_PATH) -> Optional[TelemetryExporter]:
+    if not path:
+        return None
+    return TelemetryExporter(path)
+
+
+def render_performance_panel(container, telemetry: RollingTelemetry) -> None:
+    """Latency summary of this session's recent responses."""
+    with container.container():
+        st.markdown("### ⏱️ Performance")
+        if not len(telemetry):
+            st.caption("No responses yet.")
+            return
+
+        last = telemetry.records[-1]
+        st.caption(
+            f"Last response: {last['total_seconds']:.2f}s "
+            f"(server {last['server_seconds']:.2f}s, network {last['network_seconds']:.2f}s, "
+            f"stream {last['stream_seconds']:.2f}s, render {last['render_seconds']:.2f}s)"
+        )
+        summary = telemetry.summary()
+        st.table({
+            "p50 (s)": {name: round(values["p50"], 3) for name, values in summary.items()},
+            "p95 (s)": {name: round(values["p95"], 3) for name, values in summary.items()},
+        })
+        st.bar_chart({"responses": telemetry.histogram()})
+        st.caption(f"{len(telemetry)} recent responses, {telemetry.errors} failed this session")
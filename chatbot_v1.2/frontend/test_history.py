@@ -0,0 +1,70 @@
+import pytest
+
+pytest.importorskip("streamlit")
+
+from frontend.history import ChatHistoryStore, SpillStore  # noqa: E402
+
+
+@pytest.fixture
+def spill(tmp_path):
+    return SpillStore(str(tmp_path / "history" / "chat.sqlite3"))
+
+
+def texts(messages):
+    return [message.message for message in messages]
+
+
+def test_ring_keeps_the_newest_messages_and_spills_the_rest(spill):
+    history = ChatHistoryStore("session", spill, max_messages=3)
+    for i in range(5):
+        history.append("user", f"message {i}")
+    assert len(history) == 5
+    assert texts(history.last(3)) == ["message 2", "message 3", "message 4"]
+    assert texts(spill.load("session", before_id=5, limit=10)) == ["message 0", "message 1"]
+
+
+def test_last_reads_older_turns_back_from_the_spill(spill):
+    history = ChatHistoryStore("session", spill, max_messages=2)
+    for i in range(6):
+        history.append("user" if i % 2 == 0 else "bot", f"message {i}")
+    older = history.last(4)
+    assert texts(older) == ["message 2", "message 3", "message 4", "message 5"]
+    assert [message.type for message in older] == ["user", "bot", "user", "bot"]
+    assert texts(history.last(100)) == [f"message {i}" for i in range(6)]
+
+
+def test_character_cap_spills_but_keeps_the_newest_message(spill):
+    history = ChatHistoryStore("session", spill, max_messages=100, max_chars=10)
+    history.append("user", "12345")
+    history.append("bot", "123456")
+    assert texts(history.last(1)) == ["123456"]
+    history.append("bot", "a much longer answer than the cap")
+    assert texts(history.last(1)) == ["a much longer answer than the cap"]
+    assert len(history) == 3
+    assert texts(history.last(3)) == ["12345", "123456", "a much longer answer than the cap"]
+
+
+def test_sessions_do_not_see_each_other(spill):
+    first = ChatHistoryStore("first", spill, max_messages=1)
+    second = ChatHistoryStore("second", spill, max_messages=1)
+    for i in range(3):
+        first.append("user", f"first {i}")
+        second.append("user", f"second {i}")
+    assert texts(first.last(3)) == ["first 0", "first 1", "first 2"]
+    assert texts(second.last(3)) == ["second 0", "second 1", "second 2"]
+
+
+def test_without_a_spill_store_old_turns_are_dropped():
+    history = ChatHistoryStore("session", None, max_messages=2)
+    for i in range(4):
+        history.append("user", f"message {i}")
+    assert len(history) == 2
+    assert texts(history.last(4)) == ["message 2", "message 3"]
+
+
+def test_spill_store_purges_old_turns(tmp_path):
+    path = str(tmp_path / "chat.sqlite3")
+    history = ChatHistoryStore("session", SpillStore(path), max_messages=1)
+    history.append("user", "old")
+    history.append("user", "new")
+    assert SpillStore(path, retention=-1).load("session", before_id=10, limit=10) == []
@@ -0,0 +1,57 @@
+import pytest
+
+pytest.importorskip("streamlit")
+
+from frontend.prompt_catalog import CATALOG_PATH, PromptCatalog  # noqa: E402
+
+CATALOG = """
+education_levels: [High School, Undergraduate]
+default_prompts: [Ask about study strategies, Get learning recommendations, Plan a week]
+prompts:
+  Visual:
+    Technology:
+      all: [t1, t2, shared]
+      High School: [t-hs]
+    Science: [s1, shared, s2]
+"""
+
+
+@pytest.fixture
+def catalog(tmp_path):
+    path = tmp_path / "example_prompts.yml"
+    path.write_text(CATALOG, encoding="utf-8")
+    return PromptCatalog.from_file(str(path))
+
+
+def test_level_specific_prompts_rank_first(catalog):
+    assert catalog.index[("Visual", "Technology", "High School")] == ("t-hs", "t1", "t2", "shared")
+    assert catalog.index[("Visual", "Technology", "Undergraduate")] == ("t1", "t2", "shared")
+    assert catalog.index[("Visual", "Science", "High School")] == ("s1", "shared", "s2")
+
+
+def test_interests_are_interleaved_without_duplicates(catalog):
+    assert catalog.suggest("Visual", ["Technology", "Science"], "Undergraduate", limit=10) == [
+        "t1", "s1", "t2", "shared", "s2",
+    ]
+
+
+def test_limit(catalog):
+    assert catalog.suggest("Visual", ["Technology", "Science"], "High School", limit=3) == ["t-hs", "s1", "t1"]
+
+
+def test_unknown_selections_fall_back_to_defaults(catalog):
+    assert catalog.suggest("Auditory", ["Technology"], "Undergraduate", limit=2) == [
+        "Ask about study strategies", "Get learning recommendations",
+    ]
+    assert catalog.suggest("Visual", [], "Undergraduate") == list(catalog.default_prompts)
+
+
+def test_index_is_read_only(catalog):
+    with pytest.raises(TypeError):
+        catalog.index[("Visual", "Technology", "Postgraduate")] = ("p",)
+
+
+def test_shipped_catalog_covers_every_level():
+    catalog = PromptCatalog.from_file(CATALOG_PATH)
+    assert catalog.default_prompts
+    assert catalog.suggest("Visual", ["Technology"], "Professional")
@@ -0,0 +1,70 @@
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+pytest.importorskip("requests")
+
+from frontend.rasa_client import RasaClient, get_rasa_client  # noqa: E402
+
+
+class EchoHandler(BaseHTTPRequestHandler):
+    status = 200
+
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers["Content-Length"]))
+        self.server.requests.append(json.loads(body))
+        reply = json.dumps([{"recipient_id": "learner", "text": "hi"}]).encode("utf-8")
+        self.send_response(self.server.status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(reply)))
+        self.end_headers()
+        self.wfile.write(reply)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def server():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), EchoHandler)
+    server.requests = []
+    server.status = 200
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def webhook(server):
+    return f"http://127.0.0.1:{server.server_address[1]}/webhooks/rest/webhook"
+
+
+def test_send_message_posts_json(server):
+    client = RasaClient(webhook(server), read_timeout=5)
+    response = client.send_message({"sender": "learner", "message": "hello"})
+    assert response.status_code == 200
+    assert response.json()[0]["text"] == "hi"
+    assert server.requests == [{"sender": "learner", "message": "hello"}]
+
+
+def test_gateway_errors_are_not_retried(server):
+    server.status = 502
+    client = RasaClient(webhook(server), read_timeout=5, retries=3, backoff_factor=0)
+    assert client.send_message({"sender": "learner", "message": "hello"}).status_code == 502
+    # the message may already have been handled, so it is posted once
+    assert len(server.requests) == 1
+
+
+def test_only_connection_failures_are_retried():
+    retry = RasaClient("http://localhost:1/webhook", retries=2).session.get_adapter("http://localhost").max_retries
+    assert (retry.total, retry.connect, retry.read, retry.status) == (2, 2, 0, 0)
+    assert not retry.is_retry("POST", 503)
+
+
+def test_client_is_shared_per_settings():
+    first = get_rasa_client("http://localhost:1/webhook")
+    assert get_rasa_client("http://localhost:1/webhook") is first
+    assert get_rasa_client("http://localhost:2/webhook") is not first
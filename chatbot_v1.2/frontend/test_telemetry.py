@@ -0,0 +1,78 @@
+import json
+
+import pytest
+
+pytest.importorskip("streamlit")
+
+from frontend.telemetry import ResponseTiming, RollingTelemetry, TelemetryExporter, percentile  # noqa: E402
+
+
+def timing(total, status="ok", first_token=None, **phases):
+    result = ResponseTiming("session")
+    for name, seconds in phases.items():
+        result.add(name, seconds)
+    result.first_token_seconds = first_token
+    result.total_seconds = total
+    result.status = status
+    return result
+
+
+def test_phases_accumulate_and_serialize():
+    result = ResponseTiming("learner-1")
+    with result.phase("render"):
+        pass
+    result.add("server", 0.5)
+    result.add("server", 0.25)
+    result.mark_first_token()
+    first_token = result.first_token_seconds
+    result.mark_first_token()
+    record = result.finish().to_dict()
+    assert record["session_id"] == "learner-1" and record["status"] == "ok"
+    assert record["server_seconds"] == 0.75
+    assert record["render_seconds"] >= 0
+    assert result.first_token_seconds == first_token
+    assert record["total_seconds"] >= 0
+    assert set(record) >= {"network_seconds", "stream_seconds", "first_token_seconds", "timestamp"}
+
+
+def test_percentile():
+    assert percentile([], 50) == 0.0
+    values = [float(i) for i in range(1, 101)]
+    assert percentile(values, 50) == 51.0
+    assert percentile(values, 95) == 96.0
+    assert percentile([3.0], 95) == 3.0
+
+
+def test_rolling_window_summary_and_errors():
+    telemetry = RollingTelemetry(window=3)
+    telemetry.add(timing(9.0, server=9.0))
+    telemetry.add(timing(1.0, server=0.5, network=0.5, first_token=0.2))
+    telemetry.add(timing(2.0, status="error", server=2.0))
+    telemetry.add(timing(3.0, server=1.0, stream=2.0, first_token=0.4))
+    assert len(telemetry) == 3
+    assert telemetry.errors == 1
+    summary = telemetry.summary()
+    assert summary["total"] == {"p50": 2.0, "p95": 3.0}
+    assert summary["server"]["p95"] == 2.0
+    assert summary["first_token"] == {"p50": 0.4, "p95": 0.4}
+
+
+def test_histogram_buckets_by_total_latency():
+    telemetry = RollingTelemetry()
+    for total in (0.1, 0.25, 0.3, 45.0, 120.0):
+        telemetry.add(timing(total))
+    histogram = telemetry.histogram()
+    assert histogram["≤0.25s"] == 2
+    assert histogram["≤0.5s"] == 1
+    assert histogram["≤60s"] == 1
+    assert histogram[">60s"] == 1
+    assert sum(histogram.values()) == 5
+
+
+def test_exporter_appends_json_lines(tmp_path):
+    path = tmp_path / "metrics" / "ui_metrics.jsonl"
+    exporter = TelemetryExporter(str(path))
+    exporter.write(timing(1.0).to_dict())
+    exporter.write(timing(2.0, status="error").to_dict())
+    records = [json.loads(line) for line in path.read_text(encoding="utf-8").splitlines()]
+    assert [(record["total_seconds"], record["status"]) for record in records] == [(1.0, "ok"), (2.0, "error")]
@@ -0,0 +1,159 @@
+"""
+Precompute explanations for known topics into the knowledge base.
+
+Topics come from the `[...](topic)` annotations in `data/nlu.yml` and the
+`topic` lookup table in `data/topics.yml`, from a text file (one topic per
+line) and/or the command line. They are generated with the same prompt
+template and parameters as the live action, in batches, by one model
+process per group of CPU cores. Run from the `chatbot_v1.2` folder:
+
+    python -m scripts.build_knowledge_base --from-nlu data/nlu.yml data/topics.yml
+    python -m scripts.build_knowledge_base --topics-file topics.txt --workers 4 --batch-size 8
+
+Unless `--no-merge` is given, topics already in the existing store are
+kept and not generated again, so the build can be re-run as the list grows.
+"""
+
+import argparse
+import multiprocessing
+import os
+import re
+import time
+from typing import Dict, Iterable, List, Optional, Text, Tuple
+
+import yaml
+
+from actions import settings
+from actions.cache import normalize_topic
+from actions.knowledge_base import KnowledgeBase, knowledge_base_context, write_knowledge_base
+
+TOPIC_ANNOTATION = re.compile(r"\[([^\]]+)\]\(topic\)")
+
+_backend = None
+
+
+def nlu_topics(path: Text) -> List[Text]:
+    with open(path, encoding="utf-8") as f:
+        data = yaml.safe_load(f)
+    topics = []
+    for block in data.get("nlu", []):
+        if block.get("lookup") == "topic":
+            topics.extend(line.strip()[2:].strip() for line in block.get("examples", "").splitlines() if line.strip())
+        else:
+            topics.extend(TOPIC_ANNOTATION.findall(block.get("examples", "")))
+    return topics
+
+
+def file_topics(path: Text) -> List[Text]:
+    with open(path, encoding="utf-8") as f:
+        return [line.strip() for line in f if line.strip() and not line.startswith("#")]
+
+
+def unique_topics(topics: Iterable[Text]) -> List[Text]:
+    seen = set()
+    unique = []
+    for topic in topics:
+        normalized = normalize_topic(topic)
+        if normalized and normalized not in seen:
+            seen.add(normalized)
+            unique.append(topic)
+    return unique
+
+
+def _init_worker(backend_name: Text, model_name: Text, export_dir: Text, threads: int) -> None:
+    global _backend
+    import torch
+
+    from actions.backends import create_backend
+
+    # the cores are split between the worker processes instead of oversubscribed
+    torch.set_num_threads(threads)
+    _backend = create_backend(backend_name, model_name, export_dir=export_dir).load()
+
+
+def _generate(batch: List[Text]) -> List[Tuple[Text, Text]]:
+    from actions.actions import GENERATION_PARAMS, PROMPT_TEMPLATE
+
+    prompts = [PROMPT_TEMPLATE.format(topic=topic) for topic in batch]
+    return list(zip(batch, _backend.generate(prompts, GENERATION_PARAMS)))
+
+
+def generate_all(
+    topics: List[Text],
+    backend_name: Text,
+    model_name: Text,
+    export_dir: Text,
+    workers: int,
+    batch_size: int,
+) -> Dict[Text, Text]:
+    batches = [topics[i:i + batch_size] for i in range(0, len(topics), batch_size)]
+    threads = max(1, (os.cpu_count() or 1) // workers)
+    context = multiprocessing.get_context("spawn")
+    results: Dict[Text, Text] = {}
+    started = time.perf_counter()
+    with context.Pool(
+        processes=workers,
+        initializer=_init_worker,
+        initargs=(backend_name, model_name, export_dir, threads),
+    ) as pool:
+        for generated in pool.imap_unordered(_generate, batches):
+            results.update(generated)
+            print(f"{len(results)}/{len(topics)} topics generated ({time.perf_counter() - started:.0f}s)")
+    return results
+
+
+def main(argv: Optional[List[Text]] = None) -> None:
+    from actions.actions import PROMPT_TEMPLATE
+
+    parser = argparse.ArgumentParser(description="Precompute explanations into the knowledge base.")
+    parser.add_argument("--from-nlu", nargs="+", default=[],
+                        help="read the annotated topics and the `topic` lookup table from these NLU files")
+    parser.add_argument("--topics-file", help="file with one topic per line")
+    parser.add_argument("--topics", nargs="*", default=[])
+    parser.add_argument("--output", default=settings.KNOWLEDGE_BASE_PATH)
+    parser.add_argument("--model", default=settings.GENERATION_MODEL)
+    parser.add_argument("--backend", default=settings.GENERATION_BACKEND)
+    parser.add_argument("--onnx-export-dir", default=settings.ONNX_EXPORT_DIR)
+    parser.add_argument("--workers", type=int, default=max(1, (os.cpu_count() or 1) // 4),
+                        help="model processes, each using an equal share of the cores")
+    parser.add_argument("--batch-size", type=int, default=8)
+    parser.add_argument("--no-merge", dest="merge", action="store_false",
+                        help="regenerate every topic instead of keeping existing entries")
+    args = parser.parse_args(argv)
+
+    topics = list(args.topics)
+    for path in args.from_nlu:
+        topics.extend(nlu_topics(path))
+    if args.topics_file:
+        topics.extend(file_topics(args.topics_file))
+    topics = unique_topics(topics)
+    if not topics:
+        parser.error("no topics given, use --from-nlu, --topics-file or --topics")
+
+    context = knowledge_base_context(PROMPT_TEMPLATE, args.model)
+    entries: Dict[Text, Text] = {}
+    if args.merge:
+        existing = KnowledgeBase.open(args.output, context)
+        if existing is not None:
+            entries.update(existing.items())
+            existing.close()
+    # stored topics are normalized
+    pending = [topic for topic in topics if normalize_topic(topic) not in entries]
+    print(f"{len(topics)} topics, {len(topics) - len(pending)} already in the knowledge base")
+
+    if pending:
+        entries.update(generate_all(
+            pending,
+            backend_name=args.backend,
+            model_name=args.model,
+            export_dir=os.path.join(args.onnx_export_dir, args.model.replace("/", "--")),
+            workers=max(1, min(args.workers, len(pending))),
+            batch_size=args.batch_size,
+        ))
+
+    count = write_knowledge_base(args.output, entries, context)
+    print(f"Wrote {count} topics to {args.output} ({os.path.getsize(args.output) / 1024:.0f} KB)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,440 @@
+"""
+Serve the Rasa model from several worker processes behind one port.
+
+`rasa run` serves from a single process. This supervisor opens the server
+socket once, imports Rasa, TensorFlow and the custom components, loads the
+newest model, and then forks `--workers` Rasa servers that accept on the
+shared socket. The forked workers share the imported libraries and the
+loaded model weights copy-on-write, so adding a worker costs its own
+request state rather than another copy of the model. The supervisor only
+loads the model; the first predictions run in the workers. It needs
+`fork()`, so it does not run on Windows. `--load-in-workers` falls back to
+loading the model in every worker, the way multi-worker `rasa run` does,
+for a pipeline whose libraries cannot be used after a fork.
+
+Each worker connects to the tracker store, lock store and action server of
+`endpoints.yml`, runs a few messages through NLU and the policies, and only
+then starts accepting connections. The readiness endpoint (`/ready` on
+`--ready-port`) returns 200 once a whole generation of workers has warmed
+up, and 503 before that.
+
+The supervisor watches `--model` for new models. When a newer
+`models/*.tar.gz` has finished writing, the supervisor loads it and forks a
+new generation of workers next to the running one. The old workers are
+stopped gracefully, finishing the requests they are handling, only once
+every new worker is warm. A model that fails to load is skipped and the
+old generation keeps serving. Run from the `chatbot_v1.2` folder:
+
+    python -m scripts.serve --workers 4
+    python -m scripts.serve --workers 4 --port 5005 --ready-port 5006 --enable-api --cors "*"
+
+Several workers need conversations and locks shared between processes: a
+tracker store (Redis, SQL, Mongo) and a Redis lock store in
+`endpoints.yml`. With the in-memory defaults, `--workers` above 1 is
+refused.
+"""
+
+import argparse
+import asyncio
+import copy
+import gc
+import glob
+import importlib
+import json
+import logging
+import multiprocessing
+import os
+import signal
+import socket
+import time
+from typing import Any, Dict, List, Optional, Text, Tuple
+
+import yaml
+
+from actions.http_server import register_route, start_http_server
+
+logger = logging.getLogger(__name__)
+
+WARMUP_TEXTS = ["hello", "explain machine learning", "yes"]
+WARMUP_SENDER_ID = "__warmup__"
+
+
+def latest_model(path: Text) -> Optional[Text]:
+    if os.path.isfile(path):
+        return path
+    models = glob.glob(os.path.join(path, "*.tar.gz"))
+    return max(models, key=os.path.getmtime) if models else None
+
+
+def model_state(path: Optional[Text]) -> Optional[Tuple[Text, int, float]]:
+    if path is None:
+        return None
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return path, stat.st_size, stat.st_mtime
+
+
+def freeze_heap() -> None:
+    """Keep the objects alive now out of later collections, which would touch and copy their pages."""
+    gc.unfreeze()
+    gc.collect()
+    gc.freeze()
+
+
+def preload(config_path: Text) -> None:
+    """Import everything the workers need once, before forking, so they share it."""
+    import tensorflow  # noqa: F401
+    import rasa.core.agent  # noqa: F401
+    import rasa.core.run  # noqa: F401
+
+    with open(config_path, encoding="utf-8") as f:
+        config = yaml.safe_load(f)
+    for component in (config.get("pipeline") or []) + (config.get("policies") or []):
+        module, _, _ = component["name"].rpartition(".")
+        if module:
+            importlib.import_module(module)
+    freeze_heap()
+
+
+def load_model(model_path: Text):
+    """Load a model in the supervisor, without endpoints, for the workers forked from it to share."""
+    from rasa.core.agent import Agent
+
+    started = time.perf_counter()
+    agent = Agent.load(model_path)
+    logger.info(f"Loaded {os.path.basename(model_path)} in {time.perf_counter() - started:.1f}s")
+    freeze_heap()
+    return agent
+
+
+async def attach_endpoints(model_agent, endpoints):
+    """An agent with this worker's stores and endpoints around the model the supervisor loaded.
+
+    Mirrors `Agent.load_model`, with the processor copied instead of loaded.
+    """
+    from rasa.core.agent import load_agent
+    from rasa.core.nlg import TemplatedNaturalLanguageGenerator
+
+    agent = await load_agent(endpoints=endpoints)
+    processor = copy.copy(model_agent.processor)
+    processor.tracker_store = agent.tracker_store
+    processor.lock_store = agent.lock_store
+    processor.action_endpoint = agent.action_endpoint
+    processor.nlg = agent.nlg
+    processor.http_interpreter = agent.http_interpreter
+    agent.processor = processor
+    agent.domain = processor.domain
+    agent.fingerprint = model_agent.fingerprint
+    agent.tracker_store.domain = agent.domain
+    if isinstance(agent.nlg, TemplatedNaturalLanguageGenerator):
+        agent.nlg.responses = agent.domain.responses if agent.domain else {}
+    return agent
+
+
+def open_socket(host: Text, port: int, backlog: int) -> socket.socket:
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((host, port))
+    sock.listen(backlog)
+    sock.set_inheritable(True)
+    return sock
+
+
+def uses_shared_stores(endpoints) -> bool:
+    """Whether conversations and their locks are visible to every worker."""
+    tracker_store, lock_store = endpoints.tracker_store, endpoints.lock_store
+    return (
+        tracker_store is not None and tracker_store.type not in (None, "in_memory")
+        and lock_store is not None and lock_store.type not in (None, "in_memory")
+    )
+
+
+async def warm_up(agent, texts: List[Text]) -> None:
+    """Run NLU and the policies once per text, without touching the tracker store or actions."""
+    from rasa.shared.core.constants import ACTION_LISTEN_NAME
+    from rasa.shared.core.events import ActionExecuted, UserUttered
+    from rasa.shared.core.trackers import DialogueStateTracker
+
+    for text in texts:
+        parse_data = await agent.parse_message(text)
+        tracker = DialogueStateTracker.from_events(
+            WARMUP_SENDER_ID,
+            [
+                ActionExecuted(ACTION_LISTEN_NAME),
+                UserUttered(text, parse_data.get("intent"), parse_data.get("entities"), parse_data),
+            ],
+            slots=agent.domain.slots,
+        )
+        prediction = agent.processor.predict_next_with_tracker(tracker)
+        if asyncio.iscoroutine(prediction):
+            await prediction
+
+
+def worker_main(
+    model_path: Text,
+    model_agent: Any,
+    sock: socket.socket,
+    args: argparse.Namespace,
+    ready: Any,
+    generation: int,
+) -> None:
+    """Runs in a forked worker: warm up the model, then serve on the shared socket.
+
+    `model_agent` is the agent the supervisor loaded before forking, or None
+    with `--load-in-workers`, when the worker loads the model itself.
+    """
+    # Sanic installs its own handlers for a graceful stop once it runs
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+    signal.signal(signal.SIGINT, signal.SIG_DFL)
+
+    from rasa.core import run as rasa_run
+    from rasa.core.agent import load_agent
+    from rasa.core.utils import AvailableEndpoints
+
+    endpoints = AvailableEndpoints.read_endpoints(args.endpoints)
+    app = rasa_run.configure_app(
+        input_channels=rasa_run.create_http_input_channels(None, args.credentials),
+        cors=args.cors,
+        auth_token=args.auth_token,
+        enable_api=args.enable_api,
+        response_timeout=args.response_timeout,
+        port=args.port,
+        endpoints=endpoints,
+    )
+
+    async def load_and_warm_up(app, loop) -> None:
+        started = time.perf_counter()
+        if model_agent is None:
+            app.ctx.agent = await load_agent(model_path=model_path, endpoints=endpoints)
+        else:
+            app.ctx.agent = await attach_endpoints(model_agent, endpoints)
+        await warm_up(app.ctx.agent, args.warmup_text)
+        logger.info(
+            f"Worker {os.getpid()} (generation {generation}) warmed up {os.path.basename(model_path)} "
+            f"in {time.perf_counter() - started:.1f}s"
+        )
+        ready.set()
+
+    # before_server_start runs before the worker accepts its first connection
+    app.register_listener(load_and_warm_up, "before_server_start")
+    app.register_listener(rasa_run.close_resources, "after_server_stop")
+    app.run(sock=sock, workers=1, access_log=False)
+
+
+class Generation:
+    """Worker processes serving one model."""
+
+    def __init__(self, number: int, model_path: Text, agent: Any = None):
+        self.number = number
+        self.model_path = model_path
+        self.agent = agent
+        self.workers: List[Tuple[multiprocessing.Process, Any]] = []
+        self.started_at = time.monotonic()
+
+    def _start_worker(self, context, sock: socket.socket, args: argparse.Namespace, name: Text):
+        ready = context.Event()
+        process = context.Process(
+            target=worker_main,
+            args=(self.model_path, self.agent, sock, args, ready, self.number),
+            name=name,
+        )
+        process.start()
+        return process, ready
+
+    def spawn(self, context, sock: socket.socket, args: argparse.Namespace) -> None:
+        name = f"rasa-worker-{self.number}-{len(self.workers)}"
+        self.workers.append(self._start_worker(context, sock, args, name))
+
+    def ready_count(self) -> int:
+        return sum(process.is_alive() and ready.is_set() for process, ready in self.workers)
+
+    def is_ready(self) -> bool:
+        return self.ready_count() == len(self.workers)
+
+    def has_failed(self) -> bool:
+        return any(not process.is_alive() for process, _ in self.workers)
+
+    def replace_dead(self, context, sock: socket.socket, args: argparse.Namespace) -> None:
+        for i, (process, _) in enumerate(self.workers):
+            if not process.is_alive():
+                logger.warning(f"Worker {process.pid} exited with {process.exitcode}, starting a new one")
+                self.workers[i] = self._start_worker(context, sock, args, process.name)
+
+    def stop(self, timeout: float) -> None:
+        # SIGTERM lets Sanic finish the requests in flight
+        for process, _ in self.workers:
+            if process.is_alive():
+                process.terminate()
+        deadline = time.monotonic() + timeout
+        for process, _ in self.workers:
+            process.join(max(0.0, deadline - time.monotonic()))
+            if process.is_alive():
+                process.kill()
+                process.join()
+        # the supervisor's copy of the model was only kept to fork workers from
+        if self.agent is not None:
+            self.agent = None
+            freeze_heap()
+
+
+class Supervisor:
+    def __init__(self, args: argparse.Namespace, sock: socket.socket, workers: int):
+        self.args = args
+        self.sock = sock
+        self.workers = workers
+        self.context = multiprocessing.get_context("fork")
+        self.active: Optional[Generation] = None
+        self.pending: Optional[Generation] = None
+        self.generations = 0
+        self.rejected: Optional[Tuple[Text, int, float]] = None
+        self._last_seen: Optional[Tuple[Text, int, float]] = None
+        self._stopping = False
+
+    def start_generation(self, model_path: Text) -> None:
+        self._last_seen = model_state(model_path)
+        agent = None
+        if not self.args.load_in_workers:
+            try:
+                agent = load_model(model_path)
+            except Exception:
+                logger.exception(f"Could not load {model_path}")
+                if self.active is None:
+                    raise SystemExit(f"Could not load {model_path}")
+                logger.error("Keeping the current model")
+                self.rejected = self._last_seen
+                return
+        self.generations += 1
+        generation = Generation(self.generations, model_path, agent)
+        for _ in range(self.workers):
+            generation.spawn(self.context, self.sock, self.args)
+        logger.info(f"Starting generation {generation.number}: {self.workers} workers with {model_path}")
+        self.pending = generation
+
+    def check_pending(self) -> None:
+        pending = self.pending
+        if pending.is_ready():
+            previous, self.active, self.pending = self.active, pending, None
+            logger.info(f"Generation {pending.number} is serving {pending.model_path}")
+            if previous is not None:
+                previous.stop(self.args.graceful_timeout)
+        elif pending.has_failed() or time.monotonic() - pending.started_at > self.args.warmup_timeout:
+            pending.stop(self.args.graceful_timeout)
+            self.pending = None
+            if self.active is None:
+                raise SystemExit(f"Could not load {pending.model_path}")
+            logger.error(f"Generation {pending.number} could not load {pending.model_path}, keeping the current model")
+            self.rejected = model_state(pending.model_path)
+
+    def check_models(self) -> None:
+        state = model_state(latest_model(self.args.model))
+        seen, self._last_seen = self._last_seen, state
+        # a model still being written changes size or mtime between two polls
+        if state is None or state != seen or state == self.rejected:
+            return
+        current = self.pending or self.active
+        if current is None or model_state(current.model_path) != state:
+            if self.pending is not None:
+                self.pending.stop(self.args.graceful_timeout)
+                self.pending = None
+            self.start_generation(state[0])
+
+    def status(self) -> Dict[Text, Any]:
+        active = self.active
+        return {
+            "ready": active is not None,
+            "model": os.path.basename(active.model_path) if active else None,
+            "generation": active.number if active else None,
+            "workers": len(active.workers) if active else 0,
+            "workers_ready": active.ready_count() if active else 0,
+            "swapping_to": os.path.basename(self.pending.model_path) if self.pending else None,
+        }
+
+    def stop(self, *_) -> None:
+        self._stopping = True
+
+    def run(self) -> None:
+        signal.signal(signal.SIGTERM, self.stop)
+        signal.signal(signal.SIGINT, self.stop)
+        next_model_check = 0.0
+        while not self._stopping:
+            if self.pending is not None:
+                self.check_pending()
+            elif self.active is not None:
+                self.active.replace_dead(self.context, self.sock, self.args)
+            if time.monotonic() >= next_model_check:
+                self.check_models()
+                next_model_check = time.monotonic() + self.args.watch_interval
+            time.sleep(0.5)
+
+        logger.info("Stopping the workers")
+        for generation in (self.pending, self.active):
+            if generation is not None:
+                generation.stop(self.args.graceful_timeout)
+
+
+def status_route(supervisor: Supervisor, readiness: bool):
+    def handle(request, remainder: Text) -> None:
+        status = supervisor.status()
+        body = json.dumps(status).encode("utf-8")
+        request.send_response(200 if status["ready"] or not readiness else 503)
+        request.send_header("Content-Type", "application/json")
+        request.send_header("Content-Length", str(len(body)))
+        request.end_headers()
+        request.wfile.write(body)
+
+    return handle
+
+
+def main(argv: Optional[List[Text]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Serve Rasa from preloaded, hot-swappable worker processes.")
+    parser.add_argument("--model", default="models", help="model file, or folder watched for new models")
+    parser.add_argument("--config", default="config.yml", help="to preload the custom components it names")
+    parser.add_argument("--endpoints", default="endpoints.yml")
+    parser.add_argument("--credentials", default="credentials.yml")
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=5005)
+    parser.add_argument("--workers", type=int, default=1,
+                        help="worker processes; above 1 needs shared stores in --endpoints")
+    parser.add_argument("--ready-port", type=int, default=5006, help="port of the /ready and /health endpoints")
+    parser.add_argument("--enable-api", action="store_true")
+    parser.add_argument("--cors", nargs="*")
+    parser.add_argument("--auth-token")
+    parser.add_argument("--response-timeout", type=int, default=3600)
+    parser.add_argument("--backlog", type=int, default=1024)
+    parser.add_argument("--load-in-workers", action="store_true",
+                        help="load the model in every worker instead of once in the supervisor")
+    parser.add_argument("--warmup-text", nargs="+", default=WARMUP_TEXTS)
+    parser.add_argument("--warmup-timeout", type=float, default=600.0, help="seconds a new generation may take to warm up")
+    parser.add_argument("--watch-interval", type=float, default=5.0, help="seconds between checks for a new model")
+    parser.add_argument("--graceful-timeout", type=float, default=30.0, help="seconds old workers get to finish requests")
+    args = parser.parse_args(argv)
+    if "fork" not in multiprocessing.get_all_start_methods():
+        # the workers inherit the listening socket and the preloaded modules by forking
+        raise SystemExit("scripts.serve needs fork(), which this platform lacks (Windows); use `rasa run` instead")
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(processName)s %(levelname)s %(message)s")
+
+    from rasa.core.utils import AvailableEndpoints
+
+    if args.workers > 1 and not uses_shared_stores(AvailableEndpoints.read_endpoints(args.endpoints)):
+        raise SystemExit(
+            f"--workers {args.workers} needs a shared tracker store and a Redis lock store in "
+            f"{args.endpoints}; configure them or use --workers 1"
+        )
+    if latest_model(args.model) is None:
+        raise SystemExit(f"No trained model in {args.model}, run `rasa train` first")
+
+    preload(args.config)
+    sock = open_socket(args.host, args.port, args.backlog)
+    supervisor = Supervisor(args, sock, args.workers)
+    supervisor.start_generation(latest_model(args.model))
+
+    register_route("/ready", status_route(supervisor, readiness=True))
+    register_route("/health", status_route(supervisor, readiness=False))
+    start_http_server(args.host, args.ready_port)
+    supervisor.run()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+import os
+
+import pytest
+import yaml
+
+from scripts.train import current_fingerprints, data_slices, plan_training
+
+CONFIG = {
+    "language": "en",
+    "pipeline": [{"name": "WhitespaceTokenizer"}, {"name": "DIETClassifier", "epochs": 100}],
+    "policies": [{"name": "RulePolicy"}],
+}
+NLU = {"nlu": [
+    {"intent": "greet", "examples": "- hi\n- hello\n"},
+    {"intent": "ask_topic", "examples": "- explain [recursion](topic)\n"},
+]}
+STORIES = {"stories": [{"story": "greet", "steps": [{"intent": "greet"}, {"action": "utter_greet"}]}]}
+DOMAIN = {"intents": ["greet", "ask_topic"], "responses": {"utter_greet": [{"text": "Hi!"}]}}
+
+
+def write(path, data):
+    with open(path, "w", encoding="utf-8") as f:
+        yaml.safe_dump(data, f)
+
+
+@pytest.fixture
+def project(tmp_path):
+    os.makedirs(tmp_path / "data")
+    os.makedirs(tmp_path / "models")
+    write(tmp_path / "config.yml", CONFIG)
+    write(tmp_path / "domain.yml", DOMAIN)
+    write(tmp_path / "data" / "nlu.yml", NLU)
+    write(tmp_path / "data" / "stories.yml", STORIES)
+    model = tmp_path / "models" / "20240101-000000.tar.gz"
+    model.write_bytes(b"")
+    return tmp_path
+
+
+def fingerprints(project):
+    return current_fingerprints(
+        str(project / "config.yml"), str(project / "domain.yml"), str(project / "data")
+    )
+
+
+def trained(project):
+    return dict(fingerprints(project), model=str(project / "models" / "20240101-000000.tar.gz"))
+
+
+def plan(project, manifest):
+    return plan_training(manifest, fingerprints(project), str(project / "models"))
+
+
+def test_slices_ignore_formatting_and_name_the_changed_intent(project):
+    slices, labels = data_slices(str(project / "data"), str(project / "domain.yml"))
+    assert set(slices) == {"nlu/greet", "nlu/ask_topic", "nlu/_lookups", "stories", "rules", "domain"}
+
+    with open(project / "data" / "nlu.yml", "a", encoding="utf-8") as f:
+        f.write("# a comment\n")
+    assert data_slices(str(project / "data"), str(project / "domain.yml")) == (slices, labels)
+
+    write(project / "data" / "nlu.yml", {"nlu": [
+        {"intent": "greet", "examples": "- hi\n- hello\n- hey\n"}, NLU["nlu"][1],
+    ]})
+    changed, changed_labels = data_slices(str(project / "data"), str(project / "domain.yml"))
+    assert [name for name in slices if slices[name] != changed[name]] == ["nlu/greet"]
+    assert changed_labels == labels
+
+
+def test_unchanged_inputs_skip_training(project):
+    assert plan(project, trained(project)) == ("skip", [f"up to date with {trained(project)['model']}"])
+
+
+def test_missing_manifest_or_model_trains_in_full(project):
+    assert plan(project, None)[0] == "full"
+    manifest = trained(project)
+    os.remove(manifest["model"])
+    assert plan(project, manifest)[0] == "full"
+
+
+def test_changed_examples_fine_tune(project):
+    manifest = trained(project)
+    write(project / "data" / "nlu.yml", {"nlu": [
+        {"intent": "greet", "examples": "- hi\n- hello\n- good morning\n"}, NLU["nlu"][1],
+    ]})
+    assert plan(project, manifest) == ("finetune", ["data changed: nlu/greet"])
+
+
+def test_changed_epochs_fine_tune_but_changed_parameters_do_not(project):
+    manifest = trained(project)
+    write(project / "config.yml", dict(CONFIG, pipeline=[
+        {"name": "WhitespaceTokenizer"}, {"name": "DIETClassifier", "epochs": 50},
+    ]))
+    assert plan(project, manifest) == ("finetune", ["epochs changed: pipeline/1:DIETClassifier"])
+
+    write(project / "config.yml", dict(CONFIG, pipeline=[
+        {"name": "WhitespaceTokenizer"}, {"name": "DIETClassifier", "epochs": 100, "embedding_dimension": 40},
+    ]))
+    assert plan(project, manifest) == ("full", ["component config changed: pipeline/1:DIETClassifier"])
+
+
+def test_new_labels_or_domain_train_in_full(project):
+    manifest = trained(project)
+    write(project / "data" / "nlu.yml", {"nlu": NLU["nlu"] + [{"intent": "goodbye", "examples": "- bye\n"}]})
+    mode, reasons = plan(project, manifest)
+    assert mode == "full" and reasons == ["labels changed: intents"]
+
+    write(project / "data" / "nlu.yml", NLU)
+    write(project / "domain.yml", dict(DOMAIN, responses={"utter_greet": [{"text": "Hello!"}]}))
+    assert plan(project, manifest) == ("full", ["domain changed"])
@@ -0,0 +1,355 @@
+"""
+Train the Rasa model incrementally, driven by fingerprints of the inputs.
+
+Every pipeline component and policy in `config.yml` is fingerprinted with
+its position and parameters, and the training data is split into slices
+(NLU examples per intent, stories, rules, domain) that are fingerprinted
+on their parsed content, so comments and formatting do not count. The
+fingerprints of the last successful training are kept in a manifest, and
+the next run picks the cheapest way to bring the model up to date:
+
+    skip        nothing changed and the last model is still in `models/`
+    finetune    only examples changed: `rasa train --finetune <last model>`
+                with a fraction of the configured epochs
+    full        components, domain or the intent/entity/action labels
+                changed: a regular `rasa train`
+
+Rasa keeps component outputs in `.rasa/cache` keyed by their own
+fingerprints, so in a full training the components whose inputs did not
+change are still restored from the cache instead of trained. Which
+components are restored is left to Rasa; this script only decides between
+skip, finetune and full. After each run, cache directories no longer
+referenced by `.rasa/cache/cache.db`, and entries unused for
+`--cache-max-age-days`, are deleted. Run from the
+`chatbot_v1.2` folder:
+
+    python -m scripts.train
+    python -m scripts.train --dry-run
+    python -m scripts.train --epoch-fraction 0.3 --cache-max-age-days 14
+    python -m scripts.train --gc-only
+"""
+
+import argparse
+import datetime
+import glob
+import hashlib
+import json
+import os
+import re
+import shutil
+import sqlite3
+import subprocess
+import sys
+import time
+from typing import Any, Dict, List, Optional, Text, Tuple
+
+import yaml
+
+MANIFEST_PATH = ".cache/train_manifest.json"
+MANIFEST_VERSION = 1
+
+# a changed "epochs" alone does not change what a component learns from
+TRAINING_ONLY_KEYS = ("epochs",)
+
+
+def fingerprint(value: Any) -> Text:
+    encoded = json.dumps(value, sort_keys=True, ensure_ascii=False, default=str).encode("utf-8")
+    return hashlib.sha256(encoded).hexdigest()[:16]
+
+
+def load_yaml(path: Text) -> Dict[Text, Any]:
+    with open(path, encoding="utf-8") as f:
+        return yaml.safe_load(f) or {}
+
+
+def rasa_version() -> Optional[Text]:
+    try:
+        from importlib.metadata import version
+
+        return version("rasa")
+    except Exception:
+        return None
+
+
+def component_fingerprints(config: Dict[Text, Any]) -> Dict[Text, Dict[Text, Text]]:
+    """Fingerprint per component, e.g. `pipeline/4:CountVectorsFeaturizer`.
+
+    `model` covers what the component learns; `training` also covers the
+    training-only keys, which fine-tuning is allowed to change.
+    """
+    components = {}
+    for section in ("pipeline", "policies"):
+        for index, component in enumerate(config.get(section) or []):
+            params = {key: value for key, value in component.items() if key not in TRAINING_ONLY_KEYS}
+            components[f"{section}/{index}:{component['name']}"] = {
+                "model": fingerprint([config.get("language"), params]),
+                "training": fingerprint(component),
+            }
+    return components
+
+
+def data_files(data_path: Text) -> List[Text]:
+    if os.path.isfile(data_path):
+        return [data_path]
+    files = glob.glob(os.path.join(data_path, "**", "*.yml"), recursive=True)
+    files += glob.glob(os.path.join(data_path, "**", "*.yaml"), recursive=True)
+    return sorted(files)
+
+
+def data_slices(data_path: Text, domain_path: Text) -> Tuple[Dict[Text, Text], Dict[Text, Text]]:
+    """Fingerprints of the training data slices, and of the label sets they define.
+
+    NLU examples are fingerprinted per intent so a report can name what
+    changed; synonyms, regexes and lookup tables form one more slice.
+    """
+    intents: Dict[Text, List[Any]] = {}
+    nlu_extras: List[Any] = []
+    stories: List[Any] = []
+    rules: List[Any] = []
+    for path in data_files(data_path):
+        data = load_yaml(path)
+        for block in data.get("nlu") or []:
+            if "intent" in block:
+                intents.setdefault(block["intent"], []).append(block.get("examples"))
+            else:
+                nlu_extras.append(block)
+        stories.extend(data.get("stories") or [])
+        rules.extend(data.get("rules") or [])
+
+    domain = load_yaml(domain_path)
+    slices = {f"nlu/{intent}": fingerprint(examples) for intent, examples in intents.items()}
+    slices["nlu/_lookups"] = fingerprint(nlu_extras)
+    slices["stories"] = fingerprint(stories)
+    slices["rules"] = fingerprint(rules)
+    slices["domain"] = fingerprint(domain)
+
+    entities = set()
+    for examples in intents.values():
+        for text in examples:
+            entities.update(re.findall(r"\]\(([^)]+)\)", text or ""))
+            entities.update(re.findall(r'\]\{"entity":\s*"([^"]+)"', text or ""))
+    actions = set()
+    for step in (step for story in stories + rules for step in story.get("steps") or []):
+        if "action" in step:
+            actions.add(step["action"])
+    labels = {
+        "intents": fingerprint(sorted(intents)),
+        "entities": fingerprint(sorted(entities)),
+        "actions": fingerprint(sorted(actions)),
+    }
+    return slices, labels
+
+
+def current_fingerprints(config_path: Text, domain_path: Text, data_path: Text) -> Dict[Text, Any]:
+    slices, labels = data_slices(data_path, domain_path)
+    return {
+        "version": MANIFEST_VERSION,
+        "rasa_version": rasa_version(),
+        "components": component_fingerprints(load_yaml(config_path)),
+        "slices": slices,
+        "labels": labels,
+    }
+
+
+def changed_keys(old: Dict[Text, Any], new: Dict[Text, Any]) -> List[Text]:
+    return sorted(key for key in set(old) | set(new) if old.get(key) != new.get(key))
+
+
+def plan_training(
+    manifest: Optional[Dict[Text, Any]],
+    current: Dict[Text, Any],
+    model_dir: Text,
+    force: bool = False,
+) -> Tuple[Text, List[Text]]:
+    """("skip" | "finetune" | "full", reasons)."""
+    if force:
+        return "full", ["--force"]
+    if not manifest or manifest.get("version") != MANIFEST_VERSION:
+        return "full", ["no previous training recorded"]
+    model = manifest.get("model")
+    if not model or not os.path.exists(model):
+        return "full", [f"last model {model or '?'} is not in {model_dir}"]
+    if manifest.get("rasa_version") != current["rasa_version"]:
+        return "full", [f"Rasa {manifest.get('rasa_version')} -> {current['rasa_version']}"]
+
+    old_components, new_components = manifest["components"], current["components"]
+    added_or_removed = sorted(set(old_components) ^ set(new_components))
+    if added_or_removed:
+        return "full", [f"component added or removed: {name}" for name in added_or_removed]
+    changed_models = [
+        name for name in new_components
+        if old_components[name]["model"] != new_components[name]["model"]
+    ]
+    if changed_models:
+        return "full", [f"component config changed: {name}" for name in changed_models]
+
+    changed_slices = changed_keys(manifest["slices"], current["slices"])
+    changed_labels = changed_keys(manifest["labels"], current["labels"])
+    changed_training = [
+        name for name in new_components
+        if old_components[name]["training"] != new_components[name]["training"]
+    ]
+    if "domain" in changed_slices or changed_labels:
+        reasons = [f"labels changed: {', '.join(changed_labels)}"] if changed_labels else []
+        if "domain" in changed_slices:
+            reasons.append("domain changed")
+        return "full", reasons
+    if not changed_slices and not changed_training:
+        return "skip", [f"up to date with {model}"]
+    # fine-tuning keeps the architecture, so only examples and epochs may differ
+    return "finetune", [f"data changed: {name}" for name in changed_slices] + [
+        f"epochs changed: {name}" for name in changed_training
+    ]
+
+
+def latest_model(model_dir: Text) -> Optional[Text]:
+    models = glob.glob(os.path.join(model_dir, "*.tar.gz"))
+    return max(models, key=os.path.getmtime) if models else None
+
+
+def read_manifest(path: Text) -> Optional[Dict[Text, Any]]:
+    try:
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def write_manifest(path: Text, manifest: Dict[Text, Any]) -> None:
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+    os.replace(tmp_path, path)
+
+
+def train_command(
+    mode: Text,
+    args: argparse.Namespace,
+    previous_model: Optional[Text],
+) -> List[Text]:
+    command = [
+        args.rasa, "train",
+        "--config", args.config,
+        "--domain", args.domain,
+        "--data", args.data,
+        "--out", args.out,
+    ]
+    if mode == "finetune":
+        command += ["--finetune", previous_model, "--epoch-fraction", str(args.epoch_fraction)]
+    return command + list(args.rasa_args)
+
+
+def collect_cache_garbage(cache_dir: Text, max_age_days: Optional[float], dry_run: bool = False) -> Dict[Text, int]:
+    """Delete cache directories that `cache.db` no longer points to.
+
+    With `max_age_days`, entries not used for that long are dropped from
+    `cache.db` first, so their directories are collected too.
+    """
+    database = os.path.join(cache_dir, "cache.db")
+    if not os.path.exists(database):
+        return {"expired_entries": 0, "directories": 0, "bytes": 0}
+
+    connection = sqlite3.connect(database)
+    try:
+        expired = 0
+        if max_age_days is not None:
+            cutoff = datetime.datetime.now() - datetime.timedelta(days=max_age_days)
+            cutoff_text = cutoff.strftime("%Y-%m-%d %H:%M:%S.%f")
+            if dry_run:
+                expired = connection.execute(
+                    "SELECT COUNT(*) FROM cache_entry WHERE last_used < ?", (cutoff_text,)
+                ).fetchone()[0]
+            else:
+                expired = connection.execute(
+                    "DELETE FROM cache_entry WHERE last_used < ?", (cutoff_text,)
+                ).rowcount
+                connection.commit()
+            query = "SELECT result_location FROM cache_entry WHERE result_location IS NOT NULL AND last_used >= ?"
+            rows = connection.execute(query, (cutoff_text,)).fetchall()
+        else:
+            rows = connection.execute(
+                "SELECT result_location FROM cache_entry WHERE result_location IS NOT NULL"
+            ).fetchall()
+    finally:
+        connection.close()
+
+    # locations are stored with the separator of the OS that trained, e.g. ".rasa\cache\tmp3djriz7m"
+    referenced = {re.split(r"[\\/]", location)[-1] for (location,) in rows}
+    removed = freed = 0
+    for name in os.listdir(cache_dir):
+        path = os.path.join(cache_dir, name)
+        if name in referenced or not name.startswith("tmp") or not os.path.isdir(path):
+            continue
+        size = sum(
+            os.path.getsize(os.path.join(folder, file))
+            for folder, _, files in os.walk(path) for file in files
+        )
+        if not dry_run:
+            shutil.rmtree(path, ignore_errors=True)
+        removed += 1
+        freed += size
+    return {"expired_entries": expired, "directories": removed, "bytes": freed}
+
+
+def main(argv: Optional[List[Text]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Retrain the Rasa model only as far as the inputs changed.")
+    parser.add_argument("--config", default="config.yml")
+    parser.add_argument("--domain", default="domain.yml")
+    parser.add_argument("--data", default="data")
+    parser.add_argument("--out", default="models")
+    parser.add_argument("--manifest", default=MANIFEST_PATH)
+    parser.add_argument("--cache-dir", default=os.path.join(".rasa", "cache"))
+    parser.add_argument("--epoch-fraction", type=float, default=0.2,
+                        help="share of the configured epochs used when fine-tuning")
+    parser.add_argument("--cache-max-age-days", type=float, default=30.0,
+                        help="drop Rasa cache entries unused for this long; 0 keeps them all")
+    parser.add_argument("--rasa", default="rasa", help="Rasa executable")
+    parser.add_argument("--force", action="store_true", help="full training regardless of the fingerprints")
+    parser.add_argument("--dry-run", action="store_true", help="print the plan without training or deleting")
+    parser.add_argument("--gc-only", action="store_true", help="only collect stale cache directories")
+    parser.add_argument("rasa_args", nargs=argparse.REMAINDER,
+                        help="passed on to `rasa train`, after `--`")
+    args = parser.parse_args(argv)
+    if args.rasa_args[:1] == ["--"]:
+        args.rasa_args = args.rasa_args[1:]
+
+    if not args.gc_only:
+        manifest = read_manifest(args.manifest)
+        current = current_fingerprints(args.config, args.domain, args.data)
+        mode, reasons = plan_training(manifest, current, args.out, force=args.force)
+        print(f"Training plan: {mode}")
+        for reason in reasons:
+            print(f"  - {reason}")
+
+        if mode != "skip":
+            command = train_command(mode, args, manifest.get("model") if manifest else None)
+            print("$ " + " ".join(command))
+
+            if not args.dry_run:
+                started = time.perf_counter()
+                result = subprocess.run(command)
+                if result.returncode != 0:
+                    sys.exit(result.returncode)
+                model = latest_model(args.out)
+                write_manifest(args.manifest, dict(
+                    current,
+                    model=model,
+                    mode=mode,
+                    trained_at=datetime.datetime.now().isoformat(timespec="seconds"),
+                ))
+                print(f"Trained {model} ({mode}) in {time.perf_counter() - started:.0f}s")
+
+    max_age = args.cache_max_age_days or None
+    stats = collect_cache_garbage(args.cache_dir, max_age, dry_run=args.dry_run)
+    verb = "Would remove" if args.dry_run else "Removed"
+    print(
+        f"{verb} {stats['directories']} stale cache directories ({stats['bytes'] / 1024 ** 2:.1f} MB) "
+        f"and {stats['expired_entries']} cache entries unused for {args.cache_max_age_days:g} days"
+    )
+
+
+if __name__ == "__main__":
+    main()
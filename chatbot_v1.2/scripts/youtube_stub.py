@@ -0,0 +1,151 @@
+"""
+Local stand-in for the YouTube Data API v3 `search` and `videos` endpoints.
+
+Returns deterministic fake videos for any query and counts the calls it
+receives, so the video action can be exercised without an API key or
+quota. Run from the `chatbot_v1.2` folder and point the action server at it:
+
+    python -m scripts.youtube_stub --port 8089
+    YOUTUBE_API_ROOT=http://localhost:8089/youtube/v3/ rasa run actions
+
+`GET /_stats` returns the call counters, `POST /_reset` clears them.
+"""
+
+import argparse
+import hashlib
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Text
+from urllib.parse import parse_qs, urlparse
+
+DESCRIPTIONS = [
+    "Learn the basics in this beginner tutorial with a worked example.",
+    "A complete course explained step by step.",
+    "Lesson 1 of the full guide.",
+    "Vlog from my holiday.",
+    "Live stream highlights.",
+]
+
+
+def _video_id(query: Text, index: int) -> Text:
+    return hashlib.sha1(f"{query}:{index}".encode("utf-8")).hexdigest()[:11]
+
+
+def _number(video_id: Text, salt: Text, limit: int) -> int:
+    return int(hashlib.sha1(f"{video_id}:{salt}".encode("utf-8")).hexdigest(), 16) % limit
+
+
+class YoutubeStub:
+    def __init__(self, latency: float = 0.0):
+        self.latency = latency
+        self.calls: Dict[Text, int] = {"search": 0, "videos": 0}
+        self._lock = threading.Lock()
+
+    def count(self, endpoint: Text) -> None:
+        with self._lock:
+            self.calls[endpoint] += 1
+
+    def search(self, params: Dict[Text, List[Text]]) -> Dict[Text, Any]:
+        query = params.get("q", [""])[0]
+        max_results = int(params.get("maxResults", ["5"])[0])
+        return {
+            "kind": "youtube#searchListResponse",
+            "items": [
+                {
+                    "kind": "youtube#searchResult",
+                    "id": {"kind": "youtube#video", "videoId": _video_id(query, i)},
+                    "snippet": {
+                        "title": f"{query.split(' tutorial')[0].title()} - part {i + 1}",
+                        "channelTitle": f"Stub Academy {i % 3 + 1}",
+                    },
+                }
+                for i in range(max_results)
+            ],
+        }
+
+    def videos(self, params: Dict[Text, List[Text]]) -> Dict[Text, Any]:
+        ids = [video_id for video_id in params.get("id", [""])[0].split(",") if video_id]
+        return {
+            "kind": "youtube#videoListResponse",
+            "items": [
+                {
+                    "kind": "youtube#video",
+                    "id": video_id,
+                    "snippet": {"description": DESCRIPTIONS[_number(video_id, "description", len(DESCRIPTIONS))]},
+                    "statistics": {
+                        "viewCount": str(_number(video_id, "views", 1_000_000)),
+                        "likeCount": str(_number(video_id, "likes", 50_000)),
+                    },
+                    "contentDetails": {"duration": "PT12M30S"},
+                }
+                for video_id in ids
+            ],
+        }
+
+
+def make_handler(stub: YoutubeStub):
+    class Handler(BaseHTTPRequestHandler):
+        def _send_json(self, payload: Dict[Text, Any], status: int = 200) -> None:
+            body = json.dumps(payload).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_GET(self) -> None:
+            url = urlparse(self.path)
+            params = parse_qs(url.query)
+            endpoint = url.path.rstrip("/").rsplit("/", 1)[-1]
+            if endpoint == "_stats":
+                self._send_json(stub.calls)
+                return
+            if endpoint not in ("search", "videos"):
+                self._send_json({"error": {"code": 404, "message": "Not found"}}, status=404)
+                return
+            stub.count(endpoint)
+            if stub.latency:
+                time.sleep(stub.latency)
+            self._send_json(getattr(stub, endpoint)(params))
+
+        def do_POST(self) -> None:
+            if self.path.rstrip("/").endswith("_reset"):
+                for endpoint in stub.calls:
+                    stub.calls[endpoint] = 0
+                self._send_json(stub.calls)
+            else:
+                self._send_json({"error": {"code": 404, "message": "Not found"}}, status=404)
+
+        def log_message(self, format: Text, *args) -> None:
+            pass
+
+    return Handler
+
+
+def serve(host: Text = "127.0.0.1", port: int = 8089, latency: float = 0.0) -> ThreadingHTTPServer:
+    """Start the stub on a background thread and return the server."""
+    server = ThreadingHTTPServer((host, port), make_handler(YoutubeStub(latency)))
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name="youtube-stub", daemon=True).start()
+    return server
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Fake YouTube Data API for local testing.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8089)
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds added to every API call")
+    args = parser.parse_args()
+
+    server = ThreadingHTTPServer((args.host, args.port), make_handler(YoutubeStub(args.latency)))
+    print(f"YouTube stub listening on http://{args.host}:{args.port}/youtube/v3/")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()